@@ -0,0 +1,74 @@
+"""order_book_partial_indexes
+
+Revision ID: a3d5e7f90b12
+Revises: 84e9c2f3b5e1
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3d5e7f90b12'
+down_revision: Union[str, Sequence[str], None] = '84e9c2f3b5e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+OPEN_BUYS = "status = 'open' AND order_type = 'buy'"
+OPEN_SELLS = "status = 'open' AND order_type = 'sell'"
+OPEN = "status = 'open'"
+
+# name, table, columns, partial index predicate, covered columns (Postgres)
+INDEXES = [
+    ('ix_market_orders_open_buys', 'market_orders',
+     ['good_id', sa.text('price_per_unit DESC'), 'created_at'], OPEN_BUYS, ['quantity']),
+    ('ix_market_orders_open_sells', 'market_orders',
+     ['good_id', 'price_per_unit', 'created_at'], OPEN_SELLS, ['quantity']),
+    ('ix_market_orders_open_company', 'market_orders',
+     ['company_id', 'good_id'], OPEN, None),
+    ('ix_market_trades_good_created', 'market_trades',
+     ['good_id', 'created_at', 'id'], None, None),
+]
+
+
+def _existing_tables() -> set[str]:
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade() -> None:
+    """Upgrade schema - partial indexes for price-time priority on open orders."""
+    # The market tables predate the migrations and may not exist yet; the
+    # models declare the same indexes for databases created from metadata
+    tables = _existing_tables()
+    postgres = op.get_bind().dialect.name == 'postgresql'
+
+    # Built concurrently on Postgres so trading is not blocked while they build
+    with op.get_context().autocommit_block():
+        for name, table, columns, where, include in INDEXES:
+            if table not in tables:
+                continue
+            predicate = sa.text(where) if where else None
+            op.create_index(
+                name, table, columns,
+                if_not_exists=True,
+                postgresql_where=predicate,
+                postgresql_include=include or [],
+                postgresql_concurrently=postgres,
+                sqlite_where=predicate,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema - drop the order book indexes."""
+    tables = _existing_tables()
+    postgres = op.get_bind().dialect.name == 'postgresql'
+
+    with op.get_context().autocommit_block():
+        for name, table, _, _, _ in reversed(INDEXES):
+            if table in tables:
+                op.drop_index(name, table_name=table, if_exists=True,
+                              postgresql_concurrently=postgres)
@@ -0,0 +1,51 @@
+"""market_order_client_order_id
+
+Revision ID: a8c2e4f6b1d3
+Revises: f7a9c1e3b5d2
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8c2e4f6b1d3'
+down_revision: Union[str, Sequence[str], None] = 'f7a9c1e3b5d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - client order IDs, unique per company."""
+    bind = op.get_bind()
+    if 'market_orders' not in sa.inspect(bind).get_table_names():
+        return  # created from the models, which declare the column and index
+
+    op.add_column('market_orders', sa.Column('client_order_id', sa.String(length=64), nullable=True))
+
+    predicate = sa.text("client_order_id IS NOT NULL")
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_market_orders_client_order_id', 'market_orders',
+            ['company_id', 'client_order_id'],
+            unique=True,
+            if_not_exists=True,
+            postgresql_where=predicate,
+            postgresql_concurrently=bind.dialect.name == 'postgresql',
+            sqlite_where=predicate,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema - drop market_orders.client_order_id."""
+    bind = op.get_bind()
+    if 'market_orders' not in sa.inspect(bind).get_table_names():
+        return
+
+    with op.get_context().autocommit_block():
+        op.drop_index('uq_market_orders_client_order_id', table_name='market_orders', if_exists=True,
+                      postgresql_concurrently=bind.dialect.name == 'postgresql')
+    op.drop_column('market_orders', 'client_order_id')
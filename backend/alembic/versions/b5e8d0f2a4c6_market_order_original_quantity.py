@@ -0,0 +1,35 @@
+"""market_order_original_quantity
+
+Revision ID: b5e8d0f2a4c6
+Revises: d2f4a6c8e0b7
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e8d0f2a4c6'
+down_revision: Union[str, Sequence[str], None] = 'd2f4a6c8e0b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - keep the submitted quantity for matching retried client order IDs."""
+    if 'market_orders' not in sa.inspect(op.get_bind()).get_table_names():
+        return  # created from the models, which declare the column
+
+    # Existing orders stay NULL: their remaining quantity may no longer be what was submitted
+    op.add_column('market_orders', sa.Column('original_quantity', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema - drop market_orders.original_quantity."""
+    if 'market_orders' not in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.drop_column('market_orders', 'original_quantity')
@@ -0,0 +1,131 @@
+"""partition_market_trades
+
+Revision ID: c6f1a2b3d4e5
+Revises: a3d5e7f90b12
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from datetime import date, datetime, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6f1a2b3d4e5'
+down_revision: Union[str, Sequence[str], None] = 'a3d5e7f90b12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Partitions created past today; the scheduler keeps this window filled
+DAYS_AHEAD = 7
+
+COLUMNS = "id, good_id, buyer_company_id, seller_company_id, quantity, price_per_unit, created_at"
+
+INDEXES = [
+    ('ix_market_trades_good_id', ['good_id']),
+    ('ix_market_trades_buyer_company_id', ['buyer_company_id']),
+    ('ix_market_trades_seller_company_id', ['seller_company_id']),
+    ('ix_market_trades_created_at', ['created_at']),
+    ('ix_market_trades_good_created', ['good_id', 'created_at', 'id']),
+]
+
+
+def _create_table(name: str, id_default: str, partitioned: bool) -> None:
+    # The partition key must be part of the primary key
+    primary_key = "(id, created_at)" if partitioned else "(id)"
+    op.execute(f"""
+        CREATE TABLE {name} (
+            id integer NOT NULL DEFAULT {id_default},
+            good_id integer NOT NULL REFERENCES goods (id),
+            buyer_company_id integer NOT NULL REFERENCES companies (id),
+            seller_company_id integer NOT NULL REFERENCES companies (id),
+            quantity integer NOT NULL,
+            price_per_unit integer NOT NULL,
+            created_at timestamp without time zone NOT NULL,
+            PRIMARY KEY {primary_key}
+        ){" PARTITION BY RANGE (created_at)" if partitioned else ""}
+    """)
+
+
+def _create_indexes() -> None:
+    for name, columns in INDEXES:
+        op.create_index(name, 'market_trades', columns)
+
+
+def _swap_out_existing() -> str | None:
+    """Rename the current table out of the way; return its id sequence."""
+    bind = op.get_bind()
+    sequence = bind.scalar(sa.text("SELECT pg_get_serial_sequence('market_trades', 'id')"))
+
+    for name, _ in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    op.execute("ALTER TABLE market_trades RENAME TO market_trades_old")
+    op.execute("ALTER TABLE market_trades_old RENAME CONSTRAINT market_trades_pkey TO market_trades_old_pkey")
+    if sequence:
+        # Keep ids continuing from the old table's sequence
+        op.execute(f"ALTER SEQUENCE {sequence} OWNED BY NONE")
+    return sequence
+
+
+def _adopt_sequence(sequence: str | None) -> None:
+    if sequence:
+        op.execute(f"ALTER SEQUENCE {sequence} OWNED BY market_trades.id")
+
+
+def upgrade() -> None:
+    """Upgrade schema - range-partition market_trades by day (Postgres only)."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    exists = 'market_trades' in sa.inspect(bind).get_table_names()
+    today = datetime.utcnow().date()
+    first_day = today
+
+    if exists:
+        oldest = bind.scalar(sa.text("SELECT min(created_at) FROM market_trades"))
+        if oldest is not None:
+            first_day = min(oldest.date(), today)
+        sequence = _swap_out_existing()
+    else:
+        op.execute("CREATE SEQUENCE market_trades_id_seq")
+        sequence = "market_trades_id_seq"
+
+    _create_table('market_trades', f"nextval('{sequence}')", partitioned=True)
+
+    day = first_day
+    while day <= today + timedelta(days=DAYS_AHEAD):
+        op.execute(
+            f"CREATE TABLE market_trades_p{day:%Y%m%d} PARTITION OF market_trades "
+            f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+        )
+        day += timedelta(days=1)
+    # Safety net for rows outside every daily range (clock skew, missed maintenance)
+    op.execute("CREATE TABLE market_trades_default PARTITION OF market_trades DEFAULT")
+
+    _create_indexes()
+
+    if exists:
+        op.execute(f"INSERT INTO market_trades ({COLUMNS}) SELECT {COLUMNS} FROM market_trades_old")
+        op.execute("DROP TABLE market_trades_old")
+
+    _adopt_sequence(sequence)
+
+
+def downgrade() -> None:
+    """Downgrade schema - back to a single market_trades table (archived days stay archived)."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    sequence = _swap_out_existing()
+    _create_table('market_trades', f"nextval('{sequence}')", partitioned=False)
+    _create_indexes()
+
+    op.execute(f"INSERT INTO market_trades ({COLUMNS}) SELECT {COLUMNS} FROM market_trades_old")
+    op.execute("DROP TABLE market_trades_old")  # drops the partitions with it
+
+    _adopt_sequence(sequence)
@@ -0,0 +1,50 @@
+"""market_order_expires_at
+
+Revision ID: d2f4a6c8e0b7
+Revises: a8c2e4f6b1d3
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f4a6c8e0b7'
+down_revision: Union[str, Sequence[str], None] = 'a8c2e4f6b1d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - good-till-time orders, indexed by expiry."""
+    bind = op.get_bind()
+    if 'market_orders' not in sa.inspect(bind).get_table_names():
+        return  # created from the models, which declare the column and index
+
+    op.add_column('market_orders', sa.Column('expires_at', sa.DateTime(), nullable=True))
+
+    predicate = sa.text("status = 'open' AND expires_at IS NOT NULL")
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_market_orders_open_expiry', 'market_orders',
+            ['expires_at'],
+            if_not_exists=True,
+            postgresql_where=predicate,
+            postgresql_concurrently=bind.dialect.name == 'postgresql',
+            sqlite_where=predicate,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema - drop market_orders.expires_at."""
+    bind = op.get_bind()
+    if 'market_orders' not in sa.inspect(bind).get_table_names():
+        return
+
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_market_orders_open_expiry', table_name='market_orders', if_exists=True,
+                      postgresql_concurrently=bind.dialect.name == 'postgresql')
+    op.drop_column('market_orders', 'expires_at')
@@ -0,0 +1,60 @@
+"""open_order_listing_index
+
+Revision ID: e4b7c9d1f203
+Revises: c6f1a2b3d4e5
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b7c9d1f203'
+down_revision: Union[str, Sequence[str], None] = 'c6f1a2b3d4e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Almost every filled order has quantity 0, so the planner multiplies the
+# selectivities of status = 'open' and quantity > 0 and expects a few
+# hundred open orders; it then sorts them all instead of walking the index
+STATISTICS = 'market_orders_status_quantity'
+
+
+def upgrade() -> None:
+    """Upgrade schema - keyset index and planner statistics for paging through open orders."""
+    bind = op.get_bind()
+    if 'market_orders' not in sa.inspect(bind).get_table_names():
+        return  # created from the models, which declare the index
+
+    predicate = sa.text("status = 'open'")
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_market_orders_open_listing', 'market_orders',
+            ['good_id', 'price_per_unit', 'created_at', 'id'],
+            if_not_exists=True,
+            postgresql_where=predicate,
+            postgresql_concurrently=bind.dialect.name == 'postgresql',
+            sqlite_where=predicate,
+        )
+
+    if bind.dialect.name == 'postgresql':
+        op.execute(f"CREATE STATISTICS IF NOT EXISTS {STATISTICS} (mcv) ON status, quantity FROM market_orders")
+        op.execute("ANALYZE market_orders")
+
+
+def downgrade() -> None:
+    """Downgrade schema - drop the open order listing index."""
+    bind = op.get_bind()
+    if 'market_orders' not in sa.inspect(bind).get_table_names():
+        return
+
+    if bind.dialect.name == 'postgresql':
+        op.execute(f"DROP STATISTICS IF EXISTS {STATISTICS}")
+
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_market_orders_open_listing', table_name='market_orders', if_exists=True,
+                      postgresql_concurrently=bind.dialect.name == 'postgresql')
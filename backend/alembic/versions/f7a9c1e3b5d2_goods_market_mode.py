@@ -0,0 +1,31 @@
+"""goods_market_mode
+
+Revision ID: f7a9c1e3b5d2
+Revises: e4b7c9d1f203
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7a9c1e3b5d2'
+down_revision: Union[str, Sequence[str], None] = 'e4b7c9d1f203'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - per-good market mode (continuous matching or call auctions)."""
+    op.add_column(
+        'goods',
+        sa.Column('market_mode', sa.String(length=16), nullable=False, server_default='continuous'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema - drop goods.market_mode."""
+    op.drop_column('goods', 'market_mode')
@@ -1,9 +1,95 @@
+import os
+import tempfile
+
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     DATABASE_URL: str
     JWT_SECRET: str = "dev-secret"
+    # Sent as X-Admin-Token to reach operator endpoints (GET /metrics/slow); unset disables them
+    ADMIN_TOKEN: str | None = None
+
+    # Optional explicit URL for the async engine; derived from DATABASE_URL if unset
+    ASYNC_DATABASE_URL: str | None = None
+
+    # Log every SQL statement (development only; very noisy)
+    SQL_ECHO: bool = False
+
+    # Connection pool per engine (ignored for SQLite)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
+    # Server-side statement timeout in milliseconds (Postgres); 0 disables
+    DB_STATEMENT_TIMEOUT_MS: int = 15000
+
+    # Attempts per write transaction that fails with a deadlock or serialization error
+    TRANSACTION_MAX_ATTEMPTS: int = 5
+    # Backoff before retry n: random 0..min(max, base * 2**n) milliseconds
+    TRANSACTION_RETRY_BASE_MS: float = 10.0
+    TRANSACTION_RETRY_MAX_MS: float = 500.0
+
+    # Requests slower than this are logged and sampled with their SQL
+    SLOW_REQUEST_MS: int = 500
+    SLOW_REQUEST_SAMPLES: int = 50
+
+    # Responses at least this large are gzip/brotli compressed when the client accepts it
+    COMPRESSION_MIN_BYTES: int = 1024
+    GZIP_LEVEL: int = 5
+    BROTLI_QUALITY: int = 4
+
+    # Directory for memory-mapped terrain buildability bitmaps (regenerable, so temp by default)
+    TERRAIN_CACHE_DIR: str = os.path.join(tempfile.gettempdir(), "economy-terrain-cache")
+    # Reject placements on steep terrain. The noise is pinned to the reference
+    # FastNoiseLite; off until tests/fixtures/terrain holds client heightmap
+    # exports (godot-client/scripts/export_terrain_fixtures.gd) that pass
+    TERRAIN_ENFORCE_PLACEMENT: bool = False
+
+    # Max age of cached goods/blueprints/recipes; bounds staleness across processes
+    REFERENCE_CACHE_TTL_SECONDS: float = 60.0
+
+    # Daily market_trades partitions (Postgres): created ahead of time, and
+    # exported to Parquet under TRADE_ARCHIVE_DIR once older than the retention
+    TRADE_PARTITION_DAYS_AHEAD: int = 7
+    TRADE_RETENTION_DAYS: int = 30
+    TRADE_ARCHIVE_DIR: str = "var/trade_archive"
+
+    # Run background jobs (trade partitions, auctions, order expiry, journal
+    # snapshots) inside the API process. Enable it in exactly one process:
+    # every process that does runs every job
+    SCHEDULER_ENABLED: bool = False
+
+    # Full reload interval of the in-memory quote book (picks up other workers' trades)
+    QUOTE_CACHE_TTL_SECONDS: float = 10.0
+
+    # Interval between call auctions for goods in "auction" market mode
+    AUCTION_INTERVAL_SECONDS: float = 60.0
+
+    # Matching worker processes per API process, goods sharded across them; 0 matches inline
+    MATCHING_WORKERS: int = 0
+    # Longest a request waits for its matching worker before answering 504
+    MATCHING_TIMEOUT_SECONDS: float = 10.0
+    # Recent results kept per process for answering retried orders (by client order ID)
+    ORDER_DEDUP_CACHE_SIZE: int = 10000
+    # Sweep cancelling good-till-time orders once past expires_at, in batches of one transaction each
+    ORDER_EXPIRY_INTERVAL_SECONDS: float = 5.0
+    ORDER_EXPIRY_BATCH_SIZE: int = 1000
+
+    # Append-only journal of order events (app/services/journal.py), with
+    # snapshots of the rebuilt market state taken every interval. Off by
+    # default; when enabling it, point JOURNAL_DIR at a data volume
+    JOURNAL_ENABLED: bool = False
+    JOURNAL_DIR: str = "var/market_journal"
+    # Segment files roll over past this size
+    JOURNAL_SEGMENT_BYTES: int = 64 * 1024 * 1024
+    # fsync every committed batch (durable across power loss, slower)
+    JOURNAL_FSYNC: bool = False
+    JOURNAL_SNAPSHOT_INTERVAL_SECONDS: float = 600.0
+    # Snapshots kept; segments only the older ones covered are deleted
+    JOURNAL_KEEP_SNAPSHOTS: int = 3
 
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
@@ -3,14 +3,17 @@ from sqlalchemy import select
 
 from app.models.good import Good
 from app.schemas.good import GoodCreate
+from app.services.reference_cache import GOODS
 
 def create_good(db: Session, good_in: GoodCreate) -> Good:
     good = Good(name=good_in.name)
     db.add(good)
     db.commit()
     db.refresh(good)
+    GOODS.invalidate()
     return good
 
+# Session-bound instances (safe to modify or delete); read-only callers use GOODS
 def get_good(db: Session, good_id: int) -> Good | None:
     return db.get(Good, good_id)
 
@@ -25,3 +28,4 @@ def get_goods(db: Session, skip: int = 0, limit: int = 100) -> list[Good]:
 def delete_good(db: Session, good: Good) -> None:
     db.delete(good)
     db.commit()
+    GOODS.invalidate()
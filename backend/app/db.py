@@ -1,11 +1,93 @@
+import time
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from app.config import settings
+from app.metrics import PoolMetrics
+
+# asyncio driver used on the async path for each database backend
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def async_database_url(url: str) -> URL:
+    """Swap the sync driver in DATABASE_URL for its asyncio counterpart."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+class _TimedCheckout:
+    """Pool mixin recording how long each connection checkout takes."""
+
+    metrics: PoolMetrics
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.checkout.observe(time.perf_counter() - start)
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    metrics = PoolMetrics()
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    metrics = PoolMetrics()
 
-engine = create_engine(settings.DATABASE_URL, echo=True)
+
+def engine_options(url: URL, is_async: bool = False) -> dict:
+    """Pool, timeout and echo options for an engine from Settings."""
+    options = {"echo": settings.SQL_ECHO}
+
+    # SQLite keeps SQLAlchemy's default pool; sizing and timeouts don't apply
+    if url.get_backend_name() == "sqlite":
+        return options
+
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+
+    timeout_ms = settings.DB_STATEMENT_TIMEOUT_MS
+    if timeout_ms:
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(timeout_ms)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout_ms}"}
+
+    return options
+
+
+database_url = make_url(settings.DATABASE_URL)
+
+engine = create_engine(database_url, **engine_options(database_url))
 
 SessionLocal = sessionmaker(bind=engine)
 
+# Async engine for read-heavy endpoints; shares the schema with the sync engine
+async_url = (
+    make_url(settings.ASYNC_DATABASE_URL)
+    if settings.ASYNC_DATABASE_URL
+    else async_database_url(settings.DATABASE_URL)
+)
+
+async_engine = create_async_engine(async_url, **engine_options(async_url, is_async=True))
+
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
 class Base(DeclarativeBase):
     pass
\ No newline at end of file
@@ -1,6 +1,11 @@
-from app.db import SessionLocal
+import secrets
+
+from app.config import settings
+from app.db import AsyncSessionLocal, SessionLocal
+from fastapi import Header, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -8,4 +13,18 @@ def get_db() -> Generator[Session, None, None]:
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def require_admin(x_admin_token: str | None = Header(default=None)) -> None:
+    """Reject requests without the configured admin token (all of them if none is set)."""
+    if not (
+        settings.ADMIN_TOKEN
+        and x_admin_token
+        and secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN)
+    ):
+        raise HTTPException(status_code=403, detail="Admin token required")
@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
 from app.routers.goods import router as goods_router
@@ -14,10 +16,33 @@ from app.routers.simulation import router as simulation_router
 from app.routers.tilemap import router as tilemap_router
 from app.routers.universe_viz import router as universe_viz_router
 from app.routers.buildings import router as buildings_router
+from app.routers.metrics import router as metrics_router
 
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI(title="Economy MMO MVP")
+from app.config import settings
+from app.db import async_engine, engine
+from app.middleware import PerformanceMiddleware, track_queries
+from app.negotiation import ContentNegotiationMiddleware
+from app.pagination import NEXT_CURSOR_HEADER, POLL_CURSOR_HEADER
+from app.responses import ORJSONResponse
+from app.scheduler import shutdown_scheduler, start_scheduler
+from app.services.journal import JOURNAL
+from app.services.matching_pool import MATCHING_POOL
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.SCHEDULER_ENABLED:
+        start_scheduler()
+    MATCHING_POOL.start(settings.MATCHING_WORKERS)
+    yield
+    MATCHING_POOL.stop()
+    shutdown_scheduler()
+    JOURNAL.close()
+
+
+app = FastAPI(title="Economy MMO MVP", default_response_class=ORJSONResponse, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -25,8 +50,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, POLL_CURSOR_HEADER],
 )
 
+app.add_middleware(ContentNegotiationMiddleware)
+
+# Outermost, so timings include every other middleware
+app.add_middleware(PerformanceMiddleware)
+track_queries(engine)
+track_queries(async_engine.sync_engine)
+
 app.include_router(goods_router)
 app.include_router(companies_router)
 app.include_router(inventories_router)
@@ -41,6 +74,7 @@ app.include_router(simulation_router)
 app.include_router(tilemap_router)
 app.include_router(universe_viz_router)
 app.include_router(buildings_router)
+app.include_router(metrics_router)
 
 @app.get("/")
 def read_root():
@@ -0,0 +1,133 @@
+import threading
+from bisect import bisect_left
+from collections import Counter
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram with approximate percentiles.
+
+    Memory is constant regardless of traffic; a percentile is reported as
+    the upper bound of the bucket it falls in (or the observed max for the
+    overflow bucket).
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def percentile(self, q: float) -> float | None:
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                if index < len(self.buckets):
+                    return min(self.buckets[index], self.max)
+                break
+        return self.max
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "count": self.count,
+                "mean": self.sum / self.count if self.count else None,
+                "p50": self.percentile(0.50),
+                "p95": self.percentile(0.95),
+                "p99": self.percentile(0.99),
+                "max": self.max if self.count else None,
+            }
+
+
+class PoolMetrics:
+    """Checkout latency and timeout counts for one connection pool."""
+
+    def __init__(self):
+        self.checkout = Histogram()
+        self.timeouts = 0
+
+    def snapshot(self, pool) -> dict:
+        # Saturation gauges are read from the live pool at scrape time
+        size = pool.size()
+        checked_out = pool.checkedout()
+        capacity = size + max(pool._max_overflow, 0)
+        return {
+            "size": size,
+            "checked_out": checked_out,
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "saturation": checked_out / capacity if capacity else None,
+            "timeouts": self.timeouts,
+            "checkout_seconds": self.checkout.snapshot(),
+        }
+
+
+class TransactionMetrics:
+    """
+    Write transactions per operation: runs, retries by reason, give-ups.
+
+    Matching worker processes keep their own and ship them to the API
+    process with each result (take/merge), so one scrape covers both.
+    """
+
+    def __init__(self):
+        self.operations: dict[str, Counter] = {}
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, event: str) -> None:
+        with self._lock:
+            self.operations.setdefault(operation, Counter())[event] += 1
+
+    def take(self) -> dict[str, dict[str, int]]:
+        """Counts since the last take, reset to zero."""
+        with self._lock:
+            operations, self.operations = self.operations, {}
+        return {operation: dict(counts) for operation, counts in operations.items()}
+
+    def merge(self, operations: dict[str, dict[str, int]]) -> None:
+        with self._lock:
+            for operation, counts in operations.items():
+                self.operations.setdefault(operation, Counter()).update(counts)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                operation: {
+                    "transactions": counts["transactions"],
+                    "retries": {
+                        reason.removeprefix("retry:"): count
+                        for reason, count in sorted(counts.items())
+                        if reason.startswith("retry:")
+                    },
+                    "exhausted": counts["exhausted"],
+                }
+                for operation, counts in sorted(self.operations.items())
+            }
+
+
+def pool_status(pool) -> dict:
+    metrics = getattr(pool, "metrics", None)
+    if metrics is None:
+        # Uninstrumented pool (e.g. SQLite): report the pool type only
+        return {"pool": type(pool).__name__}
+    return {"pool": type(pool).__name__, **metrics.snapshot(pool)}
@@ -0,0 +1,190 @@
+import logging
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+from app.metrics import Histogram
+
+logger = logging.getLogger("app.perf")
+
+# Buckets for per-request query counts
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# Statements kept per request for slow-request samples
+MAX_SAMPLED_STATEMENTS = 100
+
+# Route key for requests that matched no route (keeps 404 paths out of the table)
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class RequestStats:
+    """Database activity of the request currently being served."""
+
+    __slots__ = ("queries", "db_seconds", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements: list[tuple[str, float]] = []
+
+
+_current_request: ContextVar[RequestStats | None] = ContextVar("current_request", default=None)
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.latency = Histogram()
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.db_time = Histogram()
+        self.errors = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "errors": self.errors,
+            "latency_seconds": self.latency.snapshot(),
+            "queries": self.queries.snapshot(),
+            "db_seconds": self.db_time.snapshot(),
+        }
+
+
+class RequestMetrics:
+    """Per-route latency, query count and DB time, plus recent slow requests."""
+
+    def __init__(self, slow_seconds: float, max_samples: int):
+        self.slow_seconds = slow_seconds
+        self.routes: dict[str, RouteMetrics] = {}
+        self.slow_requests: deque[dict] = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def _route(self, key: str) -> RouteMetrics:
+        metrics = self.routes.get(key)
+        if metrics is None:
+            with self._lock:
+                metrics = self.routes.setdefault(key, RouteMetrics())
+        return metrics
+
+    def record(self, method: str, route: str, status: int, seconds: float, stats: RequestStats) -> None:
+        key = f"{method} {route}"
+        metrics = self._route(key)
+        metrics.latency.observe(seconds)
+        metrics.queries.observe(stats.queries)
+        metrics.db_time.observe(stats.db_seconds)
+        if status >= 500:
+            metrics.errors += 1
+
+        if seconds >= self.slow_seconds:
+            sample = {
+                "route": key,
+                "status": status,
+                "at": datetime.utcnow().isoformat(),
+                "seconds": seconds,
+                "queries": stats.queries,
+                "db_seconds": stats.db_seconds,
+                "statements": [
+                    {"sql": sql, "seconds": elapsed} for sql, elapsed in stats.statements
+                ],
+            }
+            self.slow_requests.append(sample)
+            logger.warning(
+                "Slow request %s: %.3fs, %d queries, %.3fs in DB",
+                key, seconds, stats.queries, stats.db_seconds,
+            )
+
+    def snapshot(self) -> dict:
+        return {key: metrics.snapshot() for key, metrics in sorted(self.routes.items())}
+
+
+REQUEST_METRICS = RequestMetrics(
+    slow_seconds=settings.SLOW_REQUEST_MS / 1000,
+    max_samples=settings.SLOW_REQUEST_SAMPLES,
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Statements on one connection never overlap, so one slot is enough
+    conn.info["query_start_time"] = time.perf_counter()
+
+
+def _record_statement(conn, statement: str) -> None:
+    started = conn.info.pop("query_start_time", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+
+    stats = _current_request.get()
+    if stats is None:
+        # Not inside a request (scheduler, scripts)
+        return
+
+    stats.queries += 1
+    stats.db_seconds += elapsed
+    if len(stats.statements) < MAX_SAMPLED_STATEMENTS:
+        stats.statements.append((statement, elapsed))
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record_statement(conn, statement)
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    if exception_context.connection is not None:
+        _record_statement(exception_context.connection, exception_context.statement)
+
+
+def track_queries(engine: Engine) -> None:
+    """Attribute every statement run on `engine` to the current request."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class PerformanceMiddleware:
+    """
+    Pure ASGI middleware timing each HTTP request.
+
+    Requests are grouped by method and route template (e.g.
+    "GET /market/stats/{good_id}"). Query counts come from engine events,
+    which reach the request through a context variable; sync routes run
+    in the threadpool with a copy of the context, so they are counted too.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            _current_request.reset(token)
+
+            route = scope.get("route")
+            REQUEST_METRICS.record(
+                scope["method"],
+                route.path if route is not None else UNMATCHED_ROUTE,
+                status,
+                elapsed,
+                stats,
+            )
@@ -5,4 +5,11 @@ from app.models.universe import Universe
 from app.models.region import Region
 from app.models.star_system import StarSystem
 from app.models.planet import Planet
-from app.models.resource_deposit import ResourceDeposit
\ No newline at end of file
+from app.models.resource_deposit import ResourceDeposit
+from app.models.building import Building
+from app.models.building_blueprint import BuildingBlueprint
+from app.models.inventory import Inventory
+from app.models.market_order import MarketOrder
+from app.models.market_trade import MarketTrade
+from app.models.production_job import ProductionJob
+from app.models.production_recipe import ProductionRecipe
@@ -10,4 +10,7 @@ class Good(Base):
     name: Mapped[str] = mapped_column(String, nullable=False, unique=True)  # Name of the good
     primary_category: Mapped[str] = mapped_column(String, nullable=False)  # High-level grouping
     subcategory: Mapped[str | None] = mapped_column(String, nullable=True)  # Optional finer classification
-    rarity: Mapped[str] = mapped_column(String, nullable=False)  # Rarity of the good
\ No newline at end of file
+    rarity: Mapped[str] = mapped_column(String, nullable=False)  # Rarity of the good
+    market_mode: Mapped[str] = mapped_column(
+        String(16), nullable=False, default="continuous", server_default="continuous"
+    )  # "continuous" matching or periodic "auction" clearing
\ No newline at end of file
@@ -1,12 +1,64 @@
 ﻿from datetime import datetime
-from sqlalchemy import ForeignKey, Integer, String, DateTime
+from sqlalchemy import ForeignKey, Index, Integer, String, DateTime, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db import Base
 
 
+# Partial index predicates: only resting orders are indexed, so the indexes
+# stay small however much filled/cancelled history accumulates
+OPEN_BUYS = text("status = 'open' AND order_type = 'buy'")
+OPEN_SELLS = text("status = 'open' AND order_type = 'sell'")
+OPEN = text("status = 'open'")
+HAS_CLIENT_ORDER_ID = text("client_order_id IS NOT NULL")
+OPEN_EXPIRING = text("status = 'open' AND expires_at IS NOT NULL")
+
+
 class MarketOrder(Base):
     __tablename__ = "market_orders"
+    __table_args__ = (
+        # Price-time priority per side: matching walks these in order, the
+        # order book and best bid/ask read them (quantity included for
+        # index-only scans on Postgres)
+        Index(
+            "ix_market_orders_open_buys",
+            "good_id", text("price_per_unit DESC"), "created_at",
+            postgresql_where=OPEN_BUYS, sqlite_where=OPEN_BUYS,
+            postgresql_include=["quantity"],
+        ),
+        Index(
+            "ix_market_orders_open_sells",
+            "good_id", "price_per_unit", "created_at",
+            postgresql_where=OPEN_SELLS, sqlite_where=OPEN_SELLS,
+            postgresql_include=["quantity"],
+        ),
+        # A company's resting orders (order lists, cancels)
+        Index(
+            "ix_market_orders_open_company",
+            "company_id", "good_id",
+            postgresql_where=OPEN, sqlite_where=OPEN,
+        ),
+        # Keyset order of the open-order listing (/market/orders pages)
+        Index(
+            "ix_market_orders_open_listing",
+            "good_id", "price_per_unit", "created_at", "id",
+            postgresql_where=OPEN, sqlite_where=OPEN,
+        ),
+        # A client order ID names one order per company: retried submissions
+        # find the original instead of placing it again
+        Index(
+            "uq_market_orders_client_order_id",
+            "company_id", "client_order_id",
+            unique=True,
+            postgresql_where=HAS_CLIENT_ORDER_ID, sqlite_where=HAS_CLIENT_ORDER_ID,
+        ),
+        # Expiry timer: the sweeper reads the due orders off the front
+        Index(
+            "ix_market_orders_open_expiry",
+            "expires_at",
+            postgresql_where=OPEN_EXPIRING, sqlite_where=OPEN_EXPIRING,
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
 
@@ -18,17 +70,25 @@ class MarketOrder(Base):
     )
 
     order_type: Mapped[str] = mapped_column(String(4))  # "buy" or "sell"
-    quantity: Mapped[int] = mapped_column(Integer)
+    quantity: Mapped[int] = mapped_column(Integer)  # remaining
+    # As submitted, for matching retried submissions; None on orders placed before it was stored
+    original_quantity: Mapped[int | None] = mapped_column(Integer, nullable=True)
     price_per_unit: Mapped[int] = mapped_column(Integer)
 
     status: Mapped[str] = mapped_column(
         String(20), default="open"
     )
 
+    # Chosen by the client, for idempotent retries
+    client_order_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
+
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow
     )
 
+    # Good-till-time (UTC): cancelled by the expiry sweeper once past; None rests until filled or cancelled
+    expires_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
     # ✅ ADD THESE TWO LINES
     company = relationship("Company")
     good = relationship("Good")
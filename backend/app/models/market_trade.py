@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import ForeignKey, Integer, DateTime
+from sqlalchemy import ForeignKey, Index, Integer, DateTime
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db import Base
@@ -7,6 +7,10 @@ from app.db import Base
 
 class MarketTrade(Base):
     __tablename__ = "market_trades"
+    __table_args__ = (
+        # Latest trades per good: last price, candles, trade lists
+        Index("ix_market_trades_good_created", "good_id", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
 
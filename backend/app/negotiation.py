@@ -0,0 +1,186 @@
+import gzip
+from contextvars import ContextVar
+from datetime import date, datetime
+
+import msgpack
+import orjson
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+
+# Content types worth compressing (images and other binary payloads are not)
+COMPRESSIBLE_TYPES = (JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, "text/")
+
+# Set for the duration of a request that negotiated MessagePack
+_wants_msgpack: ContextVar[bool] = ContextVar("wants_msgpack", default=False)
+
+
+def wants_msgpack() -> bool:
+    """True when the current request asked for MessagePack (Accept header)."""
+    return _wants_msgpack.get()
+
+
+def _msgpack_default(obj):
+    # Mirror the JSON encoding so both formats carry the same values
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if hasattr(obj, "tolist"):  # numpy arrays and scalars
+        return obj.tolist()
+    raise TypeError(f"Cannot serialize {type(obj).__name__} to MessagePack")
+
+
+def packb(content) -> bytes:
+    return msgpack.packb(content, default=_msgpack_default)
+
+
+def _weighted(header: str) -> dict[str, float]:
+    """Parse an Accept/Accept-Encoding header into {token: q}."""
+    weights = {}
+    for part in header.split(","):
+        token, *params = part.strip().split(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[token] = q
+    return weights
+
+
+def accepts_msgpack(accept: str) -> bool:
+    """MessagePack wins if the client ranks it at least as high as JSON."""
+    weights = _weighted(accept)
+    msgpack_q = max(weights.get(t, 0.0) for t in MSGPACK_MEDIA_TYPES)
+    json_q = max(weights.get(JSON_MEDIA_TYPE, 0.0), weights.get("*/*", 0.0))
+    return msgpack_q > 0 and msgpack_q >= json_q
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    """Pick br over gzip when both are acceptable (br only if installed)."""
+    weights = _weighted(accept_encoding)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best = max(candidates, key=lambda c: weights.get(c, weights.get("*", 0.0)))
+    return best if weights.get(best, weights.get("*", 0.0)) > 0 else None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.GZIP_LEVEL)
+
+
+class ContentNegotiationMiddleware:
+    """
+    Pure ASGI middleware for MessagePack bodies and gzip/brotli compression.
+
+    `Accept: application/msgpack` switches the body format. Responses built
+    by ORJSONResponse encode MessagePack directly (see wants_msgpack); any
+    other JSON body (response_model routes, error handlers) is converted
+    here. Bodies of at least COMPRESSION_MIN_BYTES are then compressed with
+    the best encoding the client accepts. Streamed responses pass through.
+    """
+
+    def __init__(self, app, minimum_size: int | None = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_BYTES if minimum_size is None else minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        msgpack_requested = accepts_msgpack(headers.get("accept", ""))
+        encoding = choose_encoding(headers.get("accept-encoding", ""))
+
+        if not msgpack_requested and encoding is None:
+            await self.app(scope, receive, self._with_vary(send))
+            return
+
+        token = _wants_msgpack.set(msgpack_requested)
+        start_message = None
+        chunks: list[bytes] = []
+        streaming = False
+
+        async def negotiated_send(message):
+            nonlocal start_message, streaming
+
+            if streaming or message["type"] not in ("http.response.start", "http.response.body"):
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                # Held back until the body is known: headers may change
+                start_message = message
+                return
+
+            if message.get("more_body", False) and not chunks:
+                # Streaming response: send it untouched
+                streaming = True
+                await send(start_message)
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = self._negotiate(start_message, b"".join(chunks), msgpack_requested, encoding)
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        try:
+            await self.app(scope, receive, negotiated_send)
+        finally:
+            _wants_msgpack.reset(token)
+
+    @staticmethod
+    def _with_vary(send):
+        # Plain responses still vary on these headers for shared caches
+        async def send_with_vary(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.add_vary_header("Accept")
+                headers.add_vary_header("Accept-Encoding")
+            await send(message)
+
+        return send_with_vary
+
+    def _negotiate(self, start_message, body: bytes, msgpack_requested: bool, encoding: str | None) -> bytes:
+        """Convert and compress a complete body, updating the start message's headers."""
+        headers = MutableHeaders(scope=start_message)
+        content_type = headers.get("content-type", "")
+
+        if msgpack_requested and content_type.startswith(JSON_MEDIA_TYPE) and body:
+            body = packb(orjson.loads(body))
+            headers["content-type"] = MSGPACK_MEDIA_TYPE
+
+        headers.add_vary_header("Accept")
+        headers.add_vary_header("Accept-Encoding")
+
+        if (
+            encoding is not None
+            and len(body) >= self.minimum_size
+            and "content-encoding" not in headers
+            and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+        ):
+            body = compress(body, encoding)
+            headers["content-encoding"] = encoding
+
+        headers["content-length"] = str(len(body))
+        return body
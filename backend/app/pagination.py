@@ -0,0 +1,58 @@
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException, Response
+
+# Response header carrying the cursor for the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Response header carrying the cursor to poll from for rows newer than the page
+POLL_CURSOR_HEADER = "X-Poll-Cursor"
+
+
+def encode_cursor(*values) -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor."""
+    raw = json.dumps(list(values), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Decode a cursor produced by encode_cursor, checking the key length."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    return values
+
+
+def decode_keyset(cursor: str, *types) -> tuple:
+    """decode_cursor, converting each value to its type (datetimes from ISO strings)."""
+    values = decode_cursor(cursor, len(types))
+    try:
+        return tuple(
+            datetime.fromisoformat(value) if kind is datetime else kind(value)
+            for value, kind in zip(values, types)
+        )
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def split_page(rows: list, limit: int) -> tuple[list, bool]:
+    """Split a `limit + 1` result into the page and a has-more flag."""
+    return rows[:limit], len(rows) > limit
+
+
+def set_next_cursor(response: Response, cursor: str | None) -> None:
+    if cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+
+
+def set_poll_cursor(response: Response, cursor: str | None) -> None:
+    if cursor is not None:
+        response.headers[POLL_CURSOR_HEADER] = cursor
@@ -0,0 +1,49 @@
+from typing import Any, Iterable, Sequence
+
+import orjson
+from fastapi.responses import JSONResponse
+from sqlalchemy.engine import Result
+
+from app.negotiation import MSGPACK_MEDIA_TYPE, packb, wants_msgpack
+
+# datetime/date are serialized natively (ISO 8601), numpy arrays from the terrain code too
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    Default response class: orjson instead of the stdlib encoder.
+
+    Routes with a response_model keep FastAPI's Pydantic fast path; this
+    renders everything returned as plain dicts/lists. When the request
+    negotiated MessagePack the content is packed directly instead.
+    """
+
+    def __init__(self, content: Any, *args, **kwargs):
+        self.msgpack = wants_msgpack()
+        if self.msgpack:
+            self.media_type = MSGPACK_MEDIA_TYPE
+        super().__init__(content, *args, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        if self.msgpack:
+            return packb(content)
+        return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+class RowsResponse(ORJSONResponse):
+    """
+    Serialize row tuples straight to a JSON array of objects.
+
+    For trusted bulk list endpoints: no ORM instances, no response_model
+    validation. The selected column labels must match the documented schema.
+    """
+
+    def __init__(self, columns: Sequence[str], rows: Iterable[Sequence], **kwargs):
+        columns = tuple(columns)
+        super().__init__([dict(zip(columns, row)) for row in rows], **kwargs)
+
+
+def rows_response(result: Result, **kwargs) -> RowsResponse:
+    """RowsResponse for an executed select of labeled columns."""
+    return RowsResponse(result.keys(), result.all(), **kwargs)
@@ -1,15 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.deps import get_db
 from app.models.inventory import Inventory
 from app.models.company import Company
 from app.models.good import Good
+from app.services.auction import clear_auction, uncross
+from app.services.market import MARKET_MODES, lock_book
+from app.services.reference_cache import GOODS
+from app.services.transactions import lock_inventories, transactional
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 
 @router.post("/inventory/add")
+@transactional
 def admin_add_inventory(
     company_id: int,
     good_id: int,
@@ -23,18 +29,11 @@ def admin_add_inventory(
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
 
-    good = db.query(Good).get(good_id)
+    good = GOODS.get(db, good_id)
     if not good:
         raise HTTPException(status_code=404, detail="Good not found")
 
-    inventory = (
-        db.query(Inventory)
-        .filter(
-            Inventory.company_id == company_id,
-            Inventory.good_id == good_id,
-        )
-        .first()
-    )
+    inventory = lock_inventories(db, [(company_id, good_id)]).get((company_id, good_id))
 
     if not inventory:
         inventory = Inventory(
@@ -53,3 +52,44 @@ def admin_add_inventory(
         "quantity_added": quantity,
         "new_quantity": inventory.quantity,
     }
+
+
+@router.post("/goods/{good_id}/market-mode")
+@transactional
+def admin_set_market_mode(
+    good_id: int,
+    mode: str,
+    db: Session = Depends(get_db),
+):
+    if mode not in MARKET_MODES:
+        raise HTTPException(status_code=400, detail=f"Mode must be one of {', '.join(MARKET_MODES)}")
+
+    # Under the book lock, so no order or auction of this good sees the mode change half done
+    lock_book(db, good_id)
+    good = db.query(Good).populate_existing().get(good_id)
+    if not good:
+        raise HTTPException(status_code=404, detail="Good not found")
+
+    leaving_auction = good.market_mode == "auction" and mode != "auction"
+    good.market_mode = mode
+
+    # Uncross the orders collected for the auction before continuous matching
+    # resumes, in the same transaction: a retry redoes both or neither
+    auction = uncross(db, good_id) if leaving_auction else None
+    db.commit()
+    GOODS.invalidate()
+
+    return {"good_id": good_id, "market_mode": mode, "auction": auction}
+
+
+@router.post("/goods/{good_id}/auction")
+def admin_run_auction(good_id: int, db: Session = Depends(get_db)):
+    # From the database: the mode may have changed in another process since GOODS loaded it
+    mode = db.scalar(select(Good.market_mode).where(Good.id == good_id))
+    if mode is None:
+        raise HTTPException(status_code=404, detail="Good not found")
+
+    if mode != "auction":
+        raise HTTPException(status_code=400, detail="Good is not in auction mode")
+
+    return clear_auction(db, good_id)
@@ -7,6 +7,8 @@ from app.schemas.production_recipe import (
     ProductionRecipeCreate,
     ProductionRecipeRead,
 )
+from app.services.reference_cache import PRODUCTION_RECIPES
+from app.services.transactions import transactional
 
 router = APIRouter(prefix="/admin/recipes", tags=["admin:recipes"])
 
@@ -16,6 +18,7 @@ router = APIRouter(prefix="/admin/recipes", tags=["admin:recipes"])
     response_model=ProductionRecipeRead,
     status_code=status.HTTP_201_CREATED,
 )
+@transactional
 def create_recipe(
     payload: ProductionRecipeCreate,
     db: Session = Depends(get_db),
@@ -24,23 +27,25 @@ def create_recipe(
     db.add(recipe)
     db.commit()
     db.refresh(recipe)
+    PRODUCTION_RECIPES.invalidate()
     return recipe
 
 
 @router.get("/", response_model=list[ProductionRecipeRead])
 def list_recipes(db: Session = Depends(get_db)):
-    return db.query(ProductionRecipe).order_by(ProductionRecipe.id).all()
+    return PRODUCTION_RECIPES.all(db)
 
 
 @router.get("/{recipe_id}", response_model=ProductionRecipeRead)
 def get_recipe(recipe_id: int, db: Session = Depends(get_db)):
-    recipe = db.query(ProductionRecipe).get(recipe_id)
+    recipe = PRODUCTION_RECIPES.get(db, recipe_id)
     if not recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
     return recipe
 
 
 @router.delete("/{recipe_id}", status_code=status.HTTP_204_NO_CONTENT)
+@transactional
 def delete_recipe(recipe_id: int, db: Session = Depends(get_db)):
     recipe = db.query(ProductionRecipe).get(recipe_id)
     if not recipe:
@@ -48,3 +53,4 @@ def delete_recipe(recipe_id: int, db: Session = Depends(get_db)):
 
     db.delete(recipe)
     db.commit()
+    PRODUCTION_RECIPES.invalidate()
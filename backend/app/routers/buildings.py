@@ -4,14 +4,22 @@ from sqlalchemy import select
 from typing import List
 from pydantic import BaseModel
 
+from app.config import settings
 from app.deps import get_db
 from app.models.building import Building
 from app.models.building_blueprint import BuildingBlueprint
 from app.models.location import Location
 from app.models.company import Company
+from app.services.occupancy import OCCUPANCY_CACHE, OccupancyGrid, rotated_footprint
+from app.services.reference_cache import BUILDING_BLUEPRINTS
+from app.services.terrain import BUILDABILITY_CACHE, BuildabilityMap
+from app.services.transactions import lock_rows, transactional
 
 router = APIRouter(prefix="/buildings", tags=["buildings"])
 
+# Upper bound on placements accepted by one batch request
+MAX_BATCH_PLACEMENTS = 500
+
 
 # Schemas
 class BuildingPlacementRequest(BaseModel):
@@ -21,6 +29,10 @@ class BuildingPlacementRequest(BaseModel):
     rotation: int = 0  # 0, 90, 180, 270
 
 
+class BatchPlacementRequest(BaseModel):
+    placements: List[BuildingPlacementRequest]
+
+
 class BuildingResponse(BaseModel):
     id: int
     blueprint_id: int
@@ -62,16 +74,13 @@ class BuildingBlueprintResponse(BaseModel):
 @router.get("/blueprints", response_model=List[BuildingBlueprintResponse])
 def list_building_blueprints(db: Session = Depends(get_db)):
     """Get all available building blueprints"""
-    blueprints = db.scalars(select(BuildingBlueprint)).all()
-    return blueprints
+    return BUILDING_BLUEPRINTS.all(db)
 
 
 @router.get("/blueprints/{blueprint_id}", response_model=BuildingBlueprintResponse)
 def get_building_blueprint(blueprint_id: int, db: Session = Depends(get_db)):
     """Get a specific building blueprint"""
-    blueprint = db.scalar(
-        select(BuildingBlueprint).where(BuildingBlueprint.id == blueprint_id)
-    )
+    blueprint = BUILDING_BLUEPRINTS.get(db, blueprint_id)
     if not blueprint:
         raise HTTPException(status_code=404, detail="Blueprint not found")
     return blueprint
@@ -87,6 +96,7 @@ def list_buildings_at_location(location_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/location/{location_id}", response_model=BuildingResponse)
+@transactional
 def place_building(
     location_id: int,
     placement: BuildingPlacementRequest,
@@ -95,80 +105,124 @@ def place_building(
 ):
     """Place a new building at a location"""
     
-    # Verify location exists
-    location = db.scalar(select(Location).where(Location.id == location_id))
-    if not location:
-        raise HTTPException(status_code=404, detail="Location not found")
-    
-    # Verify company owns the location
-    if location.claimed_by_company_id != company_id:
-        raise HTTPException(
-            status_code=403, 
-            detail="Company does not own this location"
-        )
+    location = get_owned_location(db, location_id, company_id)
     
     # Verify blueprint exists
-    blueprint = db.scalar(
-        select(BuildingBlueprint).where(BuildingBlueprint.id == placement.blueprint_id)
+    blueprint = BUILDING_BLUEPRINTS.get(db, placement.blueprint_id)
+    
+    error = placement_error(
+        placement,
+        blueprint,
+        location,
+        placement_terrain(location),
+        OCCUPANCY_CACHE.get(db, location),
     )
-    if not blueprint:
-        raise HTTPException(status_code=404, detail="Blueprint not found")
+    if error:
+        raise HTTPException(status_code=error[0], detail=error[1])
     
-    # Validate rotation
-    if placement.rotation not in [0, 90, 180, 270]:
-        raise HTTPException(status_code=400, detail="Rotation must be 0, 90, 180, or 270")
+    # TODO: Check construction cost and deduct resources
     
-    # Check grid bounds
-    building_width = blueprint.grid_width
-    building_height = blueprint.grid_height
+    building = new_building(placement, blueprint, location_id, company_id)
     
-    # Swap dimensions if rotated 90 or 270 degrees
-    if placement.rotation in [90, 270]:
-        building_width, building_height = building_height, building_width
+    db.add(building)
+    db.commit()
+    db.refresh(building)
     
-    if (placement.grid_x < 0 or placement.grid_y < 0 or
-        placement.grid_x + building_width > location.grid_width or
-        placement.grid_y + building_height > location.grid_height):
+    OCCUPANCY_CACHE.placed(
+        location_id,
+        building,
+        *rotated_footprint(blueprint.grid_width, blueprint.grid_height, placement.rotation),
+    )
+    
+    return building
+
+
+@router.post("/location/{location_id}/batch", response_model=List[BuildingResponse])
+@transactional
+def place_buildings_batch(
+    location_id: int,
+    payload: BatchPlacementRequest,
+    company_id: int,  # TODO: Get from auth token
+    db: Session = Depends(get_db),
+):
+    """
+    Place a whole layout of buildings atomically.
+    
+    Every placement is validated against the location grid, the terrain (when
+    enforced) and the other placements in the batch. If any placement fails, nothing is
+    created and the response lists each failing index with its reason.
+    """
+    
+    if not payload.placements:
+        return []
+    
+    if len(payload.placements) > MAX_BATCH_PLACEMENTS:
         raise HTTPException(
-            status_code=400, 
-            detail=f"Building placement out of bounds. Location grid: {location.grid_width}x{location.grid_height}"
+            status_code=400,
+            detail=f"At most {MAX_BATCH_PLACEMENTS} placements per batch"
         )
     
-    # Check for collisions with existing buildings
-    existing_buildings = db.scalars(
-        select(Building).where(Building.location_id == location_id)
-    ).all()
+    location = get_owned_location(db, location_id, company_id)
+    
+    blueprints = {
+        blueprint_id: BUILDING_BLUEPRINTS.get(db, blueprint_id)
+        for blueprint_id in {p.blueprint_id for p in payload.placements}
+    }
+    
+    terrain = placement_terrain(location)
+    occupancy = OCCUPANCY_CACHE.get(db, location)
+    batch_grid = OccupancyGrid(location.grid_width, location.grid_height)
+    
+    failures = []
+    footprints = []
+    
+    for index, placement in enumerate(payload.placements):
+        blueprint = blueprints.get(placement.blueprint_id)
+        error = placement_error(placement, blueprint, location, terrain, occupancy)
+        
+        if not error:
+            width, height = rotated_footprint(
+                blueprint.grid_width, blueprint.grid_height, placement.rotation
+            )
+            if not batch_grid.is_free(placement.grid_x, placement.grid_y, width, height):
+                error = (400, "Building placement collides with another placement in this batch")
+        
+        if error:
+            failures.append({"index": index, "status_code": error[0], "reason": error[1]})
+            continue
+        
+        batch_grid.mark(placement.grid_x, placement.grid_y, width, height)
+        footprints.append((width, height))
     
-    if has_collision(placement, blueprint, existing_buildings, db):
+    if failures:
         raise HTTPException(
-            status_code=400, 
-            detail="Building placement collides with existing building"
+            status_code=400,
+            detail={"message": "Batch placement rejected", "failures": failures},
         )
     
     # TODO: Check construction cost and deduct resources
     
-    # Create the building
-    building = Building(
-        blueprint_id=placement.blueprint_id,
-        name=blueprint.name,  # Can be customized later
-        owner_company_id=company_id,
-        location_id=location_id,
-        grid_x=placement.grid_x,
-        grid_y=placement.grid_y,
-        rotation=placement.rotation,
-        status="constructing",
-        current_capacity=0,
-        current_efficiency=blueprint.base_efficiency,
-    )
+    buildings = [
+        new_building(placement, blueprints[placement.blueprint_id], location_id, company_id)
+        for placement in payload.placements
+    ]
+    
+    db.add_all(buildings)
+    db.flush()
+    
+    # Serialise before commit so the response needs no per-row refresh
+    result = [BuildingResponse.model_validate(b) for b in buildings]
     
-    db.add(building)
     db.commit()
-    db.refresh(building)
     
-    return building
+    for building, (width, height) in zip(result, footprints):
+        OCCUPANCY_CACHE.placed(location_id, building, width, height)
+    
+    return result
 
 
 @router.delete("/{building_id}")
+@transactional
 def demolish_building(
     building_id: int,
     company_id: int,  # TODO: Get from auth token
@@ -189,58 +243,125 @@ def demolish_building(
     
     # TODO: Refund some resources, stop production, etc.
     
+    blueprint = BUILDING_BLUEPRINTS.get(db, building.blueprint_id)
+    width, height = rotated_footprint(
+        blueprint.grid_width, blueprint.grid_height, building.rotation
+    )
+    location_id = building.location_id
+    x, y = building.grid_x, building.grid_y
+    
     db.delete(building)
     db.commit()
     
+    OCCUPANCY_CACHE.demolished(location_id, building_id, x, y, width, height)
+    
     return {"message": "Building demolished", "building_id": building_id}
 
 
 def has_collision(
     placement: BuildingPlacementRequest,
     blueprint: BuildingBlueprint,
-    existing_buildings: List[Building],
-    db: Session,
+    occupancy: OccupancyGrid,
 ) -> bool:
     """Check if a building placement collides with existing buildings"""
     
-    # Calculate building footprint
-    building_width = blueprint.grid_width
-    building_height = blueprint.grid_height
+    building_width, building_height = rotated_footprint(
+        blueprint.grid_width, blueprint.grid_height, placement.rotation
+    )
     
-    # Swap dimensions if rotated
-    if placement.rotation in [90, 270]:
-        building_width, building_height = building_height, building_width
+    # Only the new footprint's cells are inspected
+    return not occupancy.is_free(
+        placement.grid_x, placement.grid_y, building_width, building_height
+    )
+
+
+def get_owned_location(db: Session, location_id: int, company_id: int) -> Location:
+    """Load and lock a location, verifying the company owns it"""
     
-    new_x1 = placement.grid_x
-    new_y1 = placement.grid_y
-    new_x2 = placement.grid_x + building_width
-    new_y2 = placement.grid_y + building_height
+    # Row lock serialises placements per location
+    location = lock_rows(db, {Location: [location_id]})[Location].get(location_id)
+    if not location:
+        raise HTTPException(status_code=404, detail="Location not found")
     
-    for existing in existing_buildings:
-        # Get existing building's blueprint for dimensions
-        existing_blueprint = db.scalar(
-            select(BuildingBlueprint).where(
-                BuildingBlueprint.id == existing.blueprint_id
-            )
+    if location.claimed_by_company_id != company_id:
+        raise HTTPException(
+            status_code=403, 
+            detail="Company does not own this location"
         )
-        if not existing_blueprint:
-            continue
-        
-        existing_width = existing_blueprint.grid_width
-        existing_height = existing_blueprint.grid_height
-        
-        # Swap if rotated
-        if existing.rotation in [90, 270]:
-            existing_width, existing_height = existing_height, existing_width
-        
-        ex_x1 = existing.grid_x
-        ex_y1 = existing.grid_y
-        ex_x2 = existing.grid_x + existing_width
-        ex_y2 = existing.grid_y + existing_height
-        
-        # Check for overlap (AABB collision)
-        if not (new_x2 <= ex_x1 or new_x1 >= ex_x2 or 
-                new_y2 <= ex_y1 or new_y1 >= ex_y2):
-            return True  # Collision detected
     
-    return False
+    return location
+
+
+def placement_terrain(location: Location) -> BuildabilityMap | None:
+    """Terrain to validate placements against, or None when it isn't enforced"""
+    
+    if not settings.TERRAIN_ENFORCE_PLACEMENT:
+        return None
+    
+    # Never generate inline: a miss starts generation and asks the client to retry
+    terrain = BUILDABILITY_CACHE.peek(location)
+    if terrain is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Terrain is still being generated, retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    
+    return terrain
+
+
+def placement_error(
+    placement: BuildingPlacementRequest,
+    blueprint: BuildingBlueprint | None,
+    location: Location,
+    terrain: BuildabilityMap | None,
+    occupancy: OccupancyGrid,
+) -> tuple[int, str] | None:
+    """Validate one placement, returning (status_code, detail) on failure"""
+    
+    if not blueprint:
+        return 404, "Blueprint not found"
+    
+    if placement.rotation not in [0, 90, 180, 270]:
+        return 400, "Rotation must be 0, 90, 180, or 270"
+    
+    # Dimensions swap if rotated 90 or 270 degrees
+    building_width, building_height = rotated_footprint(
+        blueprint.grid_width, blueprint.grid_height, placement.rotation
+    )
+    
+    if (placement.grid_x < 0 or placement.grid_y < 0 or
+        placement.grid_x + building_width > location.grid_width or
+        placement.grid_y + building_height > location.grid_height):
+        return 400, f"Building placement out of bounds. Location grid: {location.grid_width}x{location.grid_height}"
+    
+    # Terrain slope under the whole footprint
+    if terrain is not None and not terrain.footprint_buildable(
+        placement.grid_x, placement.grid_y, building_width, building_height
+    ):
+        return 400, "Building placement on unbuildable terrain"
+    
+    if has_collision(placement, blueprint, occupancy):
+        return 400, "Building placement collides with existing building"
+    
+    return None
+
+
+def new_building(
+    placement: BuildingPlacementRequest,
+    blueprint: BuildingBlueprint,
+    location_id: int,
+    company_id: int,
+) -> Building:
+    return Building(
+        blueprint_id=placement.blueprint_id,
+        name=blueprint.name,  # Can be customized later
+        owner_company_id=company_id,
+        location_id=location_id,
+        grid_x=placement.grid_x,
+        grid_y=placement.grid_y,
+        rotation=placement.rotation,
+        status="constructing",
+        current_capacity=0,
+        current_efficiency=blueprint.base_efficiency,
+    )
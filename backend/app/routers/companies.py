@@ -6,11 +6,13 @@ from app.models.company import Company
 from app.models.good import Good
 from app.models.inventory import Inventory
 from app.schemas.company import CompanyCreate, CompanyRead
+from app.services.transactions import transactional
 
 router = APIRouter(prefix="/companies", tags=["companies"])
 
 
 @router.post("/", response_model=CompanyRead, status_code=status.HTTP_201_CREATED)
+@transactional
 def create_company(payload: CompanyCreate, db: Session = Depends(get_db)):
     existing = db.query(Company).filter(Company.name == payload.name).first()
     if existing:
@@ -3,12 +3,16 @@ from sqlalchemy.orm import Session
 
 from app.deps import get_db
 from app.models.good import Good
+from app.responses import ORJSONResponse
 from app.schemas.good import GoodCreate, GoodRead
+from app.services.reference_cache import GOODS
+from app.services.transactions import transactional
 
 router = APIRouter(prefix="/goods", tags=["goods"])
 
 
 @router.post("/", response_model=GoodRead, status_code=status.HTTP_201_CREATED)
+@transactional
 def create_good(payload: GoodCreate, db: Session = Depends(get_db)):
     existing = db.query(Good).filter(Good.name == payload.name).first()
     if existing:
@@ -18,23 +22,26 @@ def create_good(payload: GoodCreate, db: Session = Depends(get_db)):
     db.add(good)
     db.commit()
     db.refresh(good)
+    GOODS.invalidate()
     return good
 
 
 @router.get("/", response_model=list[GoodRead])
 def list_goods(db: Session = Depends(get_db)):
-    return db.query(Good).order_by(Good.id).all()
+    # Cached snapshots hold exactly the GoodRead columns; skip re-validating them
+    return ORJSONResponse([vars(good) for good in GOODS.all(db)])
 
 
 @router.get("/{good_id}", response_model=GoodRead)
 def get_good(good_id: int, db: Session = Depends(get_db)):
-    good = db.query(Good).get(good_id)
+    good = GOODS.get(db, good_id)
     if not good:
         raise HTTPException(status_code=404, detail="Good not found")
     return good
 
 
 @router.delete("/{good_id}", status_code=status.HTTP_204_NO_CONTENT)
+@transactional
 def delete_good(good_id: int, db: Session = Depends(get_db)):
     good = db.query(Good).get(good_id)
     if not good:
@@ -42,3 +49,4 @@ def delete_good(good_id: int, db: Session = Depends(get_db)):
 
     db.delete(good)
     db.commit()
+    GOODS.invalidate()
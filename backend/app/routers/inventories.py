@@ -1,22 +1,34 @@
 from fastapi import APIRouter, Depends
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.deps import get_db
 from app.models.inventory import Inventory
+from app.responses import rows_response
 from app.schemas.inventory import InventoryRead
 
 router = APIRouter(prefix="/inventories", tags=["inventories"])
 
+# Columns returned for each inventory row, matching InventoryRead
+INVENTORY_COLUMNS = (
+    Inventory.id,
+    Inventory.company_id,
+    Inventory.good_id,
+    Inventory.quantity,
+    Inventory.reserved,
+)
+
 
 @router.get("/", response_model=list[InventoryRead])
 def list_inventories(db: Session = Depends(get_db)):
-    return db.query(Inventory).all()
+    return rows_response(db.execute(select(*INVENTORY_COLUMNS)))
 
 
 @router.get("/company/{company_id}", response_model=list[InventoryRead])
 def company_inventory(company_id: int, db: Session = Depends(get_db)):
-    return (
-        db.query(Inventory)
-        .filter(Inventory.company_id == company_id)
-        .all()
+    return rows_response(
+        db.execute(
+            select(*INVENTORY_COLUMNS)
+            .where(Inventory.company_id == company_id)
+        )
     )
@@ -1,60 +1,98 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.deps import get_db
+from app.deps import get_async_db, get_db
 from app.models.location import Location
 from app.models.company import Company
 from app.models.resource_deposit import ResourceDeposit
+from app.pagination import decode_keyset, encode_cursor, set_next_cursor, split_page
+from app.responses import ORJSONResponse
 from app.schemas.location import LocationRead
+from app.services.locations import MAX_LOCATION_PAGE_SIZE, location_page_query
+from app.services.transactions import lock_rows, transactional
 
 router = APIRouter(prefix="/locations", tags=["locations"])
 
 @router.get("/", response_model=list[LocationRead])
-def list_locations(db: Session = Depends(get_db)):
-    locations = db.query(Location).all()
-
-    result = []
-
-    for loc in locations:
-        deposits = (
-            db.query(ResourceDeposit)
-            .filter(ResourceDeposit.location_id == loc.id)
-            .all()
-        )
+async def list_locations(
+    planet_id: int | None = None,
+    system_id: int | None = None,
+    biome: str | None = None,
+    claimed: bool | None = None,
+    include_deposits: bool = True,
+    cursor: str | None = None,
+    limit: int = Query(500, ge=1, le=MAX_LOCATION_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    List locations one keyset page at a time.
+
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    Pass include_deposits=false to skip loading resource deposits.
+    Rows are built here to match LocationRead and returned without
+    re-validation.
+    """
+    after_id = decode_keyset(cursor, int)[0] if cursor else None
+
+    stmt = location_page_query(
+        planet_id=planet_id,
+        system_id=system_id,
+        biome=biome,
+        claimed=claimed,
+        after_id=after_id,
+        limit=limit,
+        include_deposits=include_deposits,
+    )
+    locations, has_more = split_page((await db.scalars(stmt)).all(), limit)
 
-        result.append({
+    page = ORJSONResponse([
+        {
             "id": loc.id,
             "name": loc.name,
+            "planet_id": loc.planet_id,
             "x": loc.x,
             "y": loc.y,
             "z": loc.z,
             "biome": loc.biome,
+            "grid_width": loc.grid_width,
+            "grid_height": loc.grid_height,
+            "tilemap_seed": loc.tilemap_seed,
             "claimed": loc.claimed_by_company_id is not None,
+            "claimed_by_company_id": loc.claimed_by_company_id,
             "resources": [
                 {
-                    "good_id": d.good_id,
-                    "remaining_amount": d.remaining_amount,
+                    "resource_type": d.resource_type,
+                    "quantity": d.quantity,
+                    "rarity": d.rarity,
                 }
-                for d in deposits
-            ],
-        })
+                for d in loc.resource_deposits
+            ] if include_deposits else [],
+        }
+        for loc in locations
+    ])
 
-    return result
+    if has_more:
+        set_next_cursor(page, encode_cursor(locations[-1].id))
+
+    return page
 
 @router.get("/{location_id}", response_model=LocationRead)
-def get_location(location_id: int, db: Session = Depends(get_db)):
+async def get_location(location_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get a single location by ID with its resources"""
-    location = db.query(Location).filter(Location.id == location_id).first()
+    location = await db.get(Location, location_id)
     
     if not location:
         raise HTTPException(404, "Location not found")
     
     deposits = (
-        db.query(ResourceDeposit)
-        .filter(ResourceDeposit.location_id == location.id)
-        .all()
-    )
+        await db.scalars(
+            select(ResourceDeposit)
+            .where(ResourceDeposit.location_id == location.id)
+        )
+    ).all()
     
     return {
         "id": location.id,
@@ -80,17 +118,15 @@ def get_location(location_id: int, db: Session = Depends(get_db)):
     }
 
 @router.post("/{location_id}/claim")
+@transactional
 def claim_location(
     location_id: int,
     company_id: int,
     db: Session = Depends(get_db),
 ):
-    location = (
-        db.query(Location)
-        .filter(Location.id == location_id)
-        .with_for_update()
-        .first()
-    )
+    # Both rows locked up front, location first (canonical order)
+    locked = lock_rows(db, {Location: [location_id], Company: [company_id]})
+    location = locked[Location].get(location_id)
 
     if not location:
         raise HTTPException(404, "Location not found")
@@ -98,7 +134,7 @@ def claim_location(
     if location.claimed_by_company_id is not None:
         raise HTTPException(400, "Location already claimed")
 
-    company = db.query(Company).get(company_id)
+    company = locked[Company].get(company_id)
 
     if not company:
         raise HTTPException(404, "Company not found")
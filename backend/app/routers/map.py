@@ -1,38 +1,56 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.orm import Session
 
 from app.deps import get_db
 from app.models.location import Location
-from app.models.resource_deposit import ResourceDeposit
-from app.models.good import Good
 from app.models.company import Company
+from app.pagination import decode_keyset, encode_cursor, set_next_cursor, split_page
+from app.services.locations import MAX_LOCATION_PAGE_SIZE, location_page_query
+from app.services.reference_cache import GOODS
 # from app.simulation.tick import run_simulation_tick
 
 router = APIRouter(prefix="/map", tags=["map"])
 
 
 @router.get("/")
-def get_map(db: Session = Depends(get_db)):
+def get_map(
+    response: Response,
+    planet_id: int | None = None,
+    system_id: int | None = None,
+    biome: str | None = None,
+    claimed: bool | None = None,
+    include_deposits: bool = True,
+    cursor: str | None = None,
+    limit: int = Query(500, ge=1, le=MAX_LOCATION_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
     # run_simulation_tick(db)
-    goods = {g.id: g.name for g in db.query(Good).all()}
-    companies = {c.id: c.name for c in db.query(Company).all()}
+    after_id = decode_keyset(cursor, int)[0] if cursor else None
 
-    locations = db.query(Location).all()
-    result = []
+    stmt = location_page_query(
+        planet_id=planet_id,
+        system_id=system_id,
+        biome=biome,
+        claimed=claimed,
+        after_id=after_id,
+        limit=limit,
+        include_deposits=include_deposits,
+    )
+    # Owner names come from the same query instead of a full companies scan
+    stmt = stmt.outerjoin(
+        Company, Company.id == Location.claimed_by_company_id
+    ).add_columns(Company.name)
+
+    rows, has_more = split_page(db.execute(stmt).all(), limit)
+
+    if has_more:
+        set_next_cursor(response, encode_cursor(rows[-1][0].id))
 
-    for loc in locations:
-        deposits = (
-            db.query(ResourceDeposit)
-            .filter(ResourceDeposit.location_id == loc.id)
-            .all()
-        )
+    goods = GOODS.index(db, "name") if include_deposits else {}
 
-        extractors = (
-            db.query(ExtractionSite)
-            .filter(ExtractionSite.location_id == loc.id)
-            .all()
-        )
+    result = []
 
+    for loc, company_name in rows:
         result.append({
             "id": loc.id,
             "name": loc.name,
@@ -40,29 +58,19 @@ def get_map(db: Session = Depends(get_db)):
             "y": loc.y,
             "biome": loc.biome,
             "claimed_by_company_id": loc.claimed_by_company_id,
-            "claimed_by_company_name": companies.get(loc.claimed_by_company_id),
+            "claimed_by_company_name": company_name,
 
             "deposits": [
                 {
-                    "good_id": d.good_id,
-                    "good_name": goods.get(d.good_id),
-                    "remaining_amount": d.remaining_amount,
+                    "good_id": goods[d.resource_type].id if d.resource_type in goods else None,
+                    "good_name": d.resource_type,
+                    "remaining_amount": d.quantity,
                 }
-                for d in deposits
-            ],
+                for d in loc.resource_deposits
+            ] if include_deposits else [],
 
-            "extraction_sites": [
-                {
-                    "id": s.id,
-                    "company_id": s.company_id,
-                    "company_name": companies.get(s.company_id),
-                    "good_id": s.good_id,
-                    "good_name": goods.get(s.good_id),
-                    "rate_per_hour": s.rate_per_hour,
-                    "active": s.active,
-                }
-                for s in extractors
-            ],
+            # Extraction sites are not modelled yet; kept for client compatibility
+            "extraction_sites": [],
         })
 
     return {"locations": result}
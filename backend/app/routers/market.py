@@ -1,108 +1,127 @@
-﻿from fastapi import APIRouter, Depends, HTTPException
+﻿from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import case, func, select
 
-from app.deps import get_db
-from app.models.market_order import MarketOrder
+from app.deps import get_async_db, get_db
 from app.models.market_trade import MarketTrade
-from app.models.inventory import Inventory
-from app.schemas.market_order import MarketOrderCreate, MarketOrderRead
-from app.services.market import try_execute_order
+from app.pagination import decode_keyset, encode_cursor, set_next_cursor, split_page
+from app.responses import RowsResponse
+from app.schemas.market_order import (
+    MarketOrderBatch,
+    MarketOrderBatchRead,
+    MarketOrderCreate,
+    MarketOrderRead,
+)
+from app.services import orders
+from app.services.market import book_side_query
+from app.services.market_pages import MAX_MARKET_PAGE_SIZE, order_page_query
+from app.services.matching_pool import MATCHING_POOL
+from app.services.quotes import QUOTE_BOOK
 
 router = APIRouter(prefix="/market", tags=["market"])
 
+# Upper bound on goods per /market/quotes call
+MAX_QUOTE_GOODS = 500
+
+# Upper bound on orders per /market/orders/batch call
+MAX_BATCH_ORDERS = 500
+
 
 # ============================================================
-# CREATE ORDER (BUY / SELL)
+# BATCH ORDER ENTRY / MASS CANCEL
 # ============================================================
-@router.post("/orders/{company_id}", response_model=MarketOrderRead)
-def create_order(
+# Declared before /orders/{company_id} so "batch" is not read as an id.
+# These span goods, so they run here rather than in a matching worker,
+# holding every affected good's book lock (taken in good id order).
+@router.post("/orders/batch", response_model=MarketOrderBatchRead)
+def create_orders(
     company_id: int,
-    payload: MarketOrderCreate,
+    payload: MarketOrderBatch,
     db: Session = Depends(get_db),
 ):
-    if payload.order_type not in ("buy", "sell"):
-        raise HTTPException(status_code=400, detail="Invalid order type")
-
-    # 🔒 SELL → reserve inventory
-    if payload.order_type == "sell":
-        inventory = (
-            db.query(Inventory)
-            .filter(
-                Inventory.company_id == company_id,
-                Inventory.good_id == payload.good_id,
-            )
-            .with_for_update()
-            .first()
-        )
-
-        if not inventory:
-            raise HTTPException(status_code=400, detail="No inventory")
-
-        free_qty = inventory.quantity - inventory.reserved
-        if free_qty < payload.quantity:
-            raise HTTPException(status_code=400, detail="Not enough free inventory")
+    if len(payload.orders) > MAX_BATCH_ORDERS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_ORDERS} orders per batch")
 
-        inventory.reserved += payload.quantity
-
-    order = MarketOrder(
-        company_id=company_id,
-        **payload.dict(),
+    return orders.place_orders(
+        db, company_id, [order.dict() for order in payload.orders], replace=payload.replace,
     )
 
-    db.add(order)
-    db.flush()  # 🔑 REQUIRED so order.id exists but no commit yet
 
-    # ⚙️ match + execute (NO commit inside!)
-    try_execute_order(db, order)
+@router.post("/orders/cancel-all")
+def cancel_all_orders(
+    company_id: int,
+    good_id: int | None = None,
+    side: str | None = None,
+    db: Session = Depends(get_db),
+):
+    return orders.cancel_orders(db, company_id, good_id, side)
 
-    db.commit()
-    db.refresh(order)
 
-    return {
-    "id": order.id,
-    "order_type": order.order_type,
-    "quantity": order.quantity,
-    "price_per_unit": order.price_per_unit,
-    "status": order.status,
-    "good_id": order.good_id,
-    "good_name": order.good.name,
-    "company_id": order.company_id,
-    "company_name": order.company.name,
-}
+# ============================================================
+# CREATE ORDER (BUY / SELL)
+# ============================================================
+@router.post("/orders/{company_id}", response_model=MarketOrderRead)
+def create_order(
+    company_id: int,
+    payload: MarketOrderCreate,
+    db: Session = Depends(get_db),
+):
+    # A retry of an order this process placed is answered without any work
+    previous = orders.RECENT_ORDERS.get(company_id, payload.client_order_id)
+    if previous is not None:
+        return orders.replayed_order(previous, payload.dict())
 
+    if MATCHING_POOL.running:
+        # Matched by the worker owning the good; this session stays unused
+        result = MATCHING_POOL.submit(payload.good_id, "place", company_id, payload.dict())
+        orders.RECENT_ORDERS.put(result)
+        return result
+
+    return orders.place_order(db, company_id, payload.dict())
 
 
 # ============================================================
 # LIST OPEN ORDERS
 # ============================================================
 @router.get("/orders", response_model=list[MarketOrderRead])
-def list_orders(db: Session = Depends(get_db)):
-    orders = (
-        db.query(MarketOrder)
-        .join(MarketOrder.company)
-        .join(MarketOrder.good)
-        .filter(
-            MarketOrder.status == "open",
-            MarketOrder.quantity > 0,
-        )
-        .all()
-    )
+async def list_orders(
+    good_id: int | None = None,
+    company_id: int | None = None,
+    side: str | None = None,
+    cursor: str | None = None,
+    limit: int = Query(500, ge=1, le=MAX_MARKET_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Open orders one keyset page at a time, by good, price and age.
 
-    return [
-        {
-            "id": o.id,
-            "order_type": o.order_type,
-            "quantity": o.quantity,
-            "price_per_unit": o.price_per_unit,
-            "status": o.status,
-            "good_id": o.good_id,
-            "good_name": o.good.name,
-            "company_id": o.company_id,
-            "company_name": o.company.name,
-        }
-        for o in orders
-    ]
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    Row tuples go straight to JSON; names come from the joins, no ORM objects.
+    """
+    if side is not None and side not in ("buy", "sell"):
+        raise HTTPException(status_code=400, detail="Invalid order type")
+
+    after = decode_keyset(cursor, int, int, datetime, int) if cursor else None
+
+    result = await db.execute(order_page_query(
+        good_id=good_id,
+        company_id=company_id,
+        side=side,
+        after=after,
+        limit=limit,
+    ))
+    columns = result.keys()
+    rows, has_more = split_page(result.all(), limit)
+    page = RowsResponse(columns, rows)
+
+    if has_more:
+        last = rows[-1]
+        set_next_cursor(page, encode_cursor(last.good_id, last.price_per_unit, last.created_at, last.id))
+
+    return page
 
 
 # ============================================================
@@ -114,76 +133,23 @@ def cancel_order(
     company_id: int,
     db: Session = Depends(get_db),
 ):
-    order = db.query(MarketOrder).get(order_id)
-
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found")
-
-    if order.company_id != company_id:
-        raise HTTPException(status_code=403, detail="Not your order")
-
-    if order.status != "open":
-        raise HTTPException(status_code=400, detail="Order not open")
-
-    # 🔓 release reserved inventory
-    if order.order_type == "sell":
-        inventory = (
-            db.query(Inventory)
-            .filter(
-                Inventory.company_id == order.company_id,
-                Inventory.good_id == order.good_id,
-            )
-            .with_for_update()
-            .first()
-        )
-
-        if not inventory:
-            raise HTTPException(status_code=500, detail="Inventory missing")
+    order = orders.get_order(db, order_id)
 
-        inventory.reserved -= order.quantity
-        if inventory.reserved < 0:
-            inventory.reserved = 0
+    if MATCHING_POOL.running:
+        good_id = order.good_id
+        db.close()
+        return MATCHING_POOL.submit(good_id, "cancel", order_id, company_id)
 
-    order.status = "cancelled"
-    db.commit()
-
-    return {"status": "cancelled", "order_id": order_id}
+    return orders.cancel_order(db, order, company_id)
 
 
 # ============================================================
 # ORDER BOOK
 # ============================================================
 @router.get("/orderbook/{good_id}")
-def get_order_book(good_id: int, db: Session = Depends(get_db)):
-    buys = (
-        db.query(
-            MarketOrder.price_per_unit.label("price"),
-            func.sum(MarketOrder.quantity).label("quantity"),
-        )
-        .filter(
-            MarketOrder.good_id == good_id,
-            MarketOrder.order_type == "buy",
-            MarketOrder.status == "open",
-        )
-        .group_by(MarketOrder.price_per_unit)
-        .order_by(MarketOrder.price_per_unit.desc())
-        .all()
-    )
-
-    sells = (
-        db.query(
-            MarketOrder.price_per_unit.label("price"),
-            func.sum(MarketOrder.quantity).label("quantity"),
-        )
-        .filter(
-            MarketOrder.good_id == good_id,
-            MarketOrder.order_type == "sell",
-            MarketOrder.status == "open",
-        )
-        .group_by(MarketOrder.price_per_unit)
-        .order_by(MarketOrder.price_per_unit.asc())
-        .all()
-    )
+async def get_order_book(good_id: int, db: AsyncSession = Depends(get_async_db)):
+    buys = (await db.execute(book_side_query(good_id, "buy"))).all()
+    sells = (await db.execute(book_side_query(good_id, "sell"))).all()
 
     return {
         "buy": [{"price": b.price, "quantity": b.quantity} for b in buys],
@@ -195,48 +161,31 @@ def get_order_book(good_id: int, db: Session = Depends(get_db)):
 # MARKET STATS
 # ============================================================
 @router.get("/stats/{good_id}")
-def get_market_stats(good_id: int, db: Session = Depends(get_db)):
-    last_trade = (
-        db.query(MarketTrade)
-        .filter(MarketTrade.good_id == good_id)
-        .order_by(MarketTrade.created_at.desc())
-        .first()
-    )
+async def get_market_stats(good_id: int, db: AsyncSession = Depends(get_async_db)):
+    # Served from the in-memory quote book; no order/trade queries while it is fresh
+    (quote,) = await QUOTE_BOOK.quotes(db, [good_id])
+    return quote
 
-    last_price = last_trade.price_per_unit if last_trade else None
-
-    best_bid = (
-        db.query(func.max(MarketOrder.price_per_unit))
-        .filter(
-            MarketOrder.good_id == good_id,
-            MarketOrder.order_type == "buy",
-            MarketOrder.status == "open",
-        )
-        .scalar()
-    )
 
-    best_ask = (
-        db.query(func.min(MarketOrder.price_per_unit))
-        .filter(
-            MarketOrder.good_id == good_id,
-            MarketOrder.order_type == "sell",
-            MarketOrder.status == "open",
-        )
-        .scalar()
-    )
+# ============================================================
+# QUOTES (MANY GOODS)
+# ============================================================
+@router.get("/quotes")
+async def get_quotes(
+    good_ids: str | None = Query(None, description="Comma-separated good ids; all traded goods if omitted"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    ids = None
+    if good_ids:
+        try:
+            ids = [int(good_id) for good_id in good_ids.split(",") if good_id.strip()]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="good_ids must be comma-separated integers")
 
-    spread = (
-        best_ask - best_bid
-        if best_bid is not None and best_ask is not None
-        else None
-    )
+        if len(ids) > MAX_QUOTE_GOODS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_QUOTE_GOODS} goods per request")
 
-    return {
-        "last_price": last_price,
-        "best_bid": best_bid,
-        "best_ask": best_ask,
-        "spread": spread,
-    }
+    return await QUOTE_BOOK.quotes(db, ids)
 
 
 # ============================================================
@@ -246,49 +195,47 @@ def get_market_stats(good_id: int, db: Session = Depends(get_db)):
 def get_candles(good_id: int, minutes: int = 60, db: Session = Depends(get_db)):
     bucket = func.date_trunc("minute", MarketTrade.created_at)
 
-    aggregates = (
-        db.query(
+    # Rank trades inside each bucket so open/close come from the same query
+    ranked = (
+        select(
             bucket.label("time"),
-            func.min(MarketTrade.price_per_unit).label("low"),
-            func.max(MarketTrade.price_per_unit).label("high"),
-            func.sum(MarketTrade.quantity).label("volume"),
-            func.min(MarketTrade.created_at).label("open_time"),
-            func.max(MarketTrade.created_at).label("close_time"),
+            MarketTrade.price_per_unit.label("price"),
+            MarketTrade.quantity.label("quantity"),
+            func.row_number().over(
+                partition_by=bucket,
+                order_by=(MarketTrade.created_at.asc(), MarketTrade.id.asc()),
+            ).label("first_rank"),
+            func.row_number().over(
+                partition_by=bucket,
+                order_by=(MarketTrade.created_at.desc(), MarketTrade.id.desc()),
+            ).label("last_rank"),
         )
-        .filter(MarketTrade.good_id == good_id)
-        .group_by(bucket)
-        .order_by(bucket.desc())
-        .limit(minutes)
-        .all()
+        .where(MarketTrade.good_id == good_id)
+        .subquery()
     )
 
-    candles = []
-    for row in aggregates:
-        open_price = (
-            db.query(MarketTrade.price_per_unit)
-            .filter(
-                MarketTrade.good_id == good_id,
-                MarketTrade.created_at == row.open_time,
-            )
-            .scalar()
-        )
-
-        close_price = (
-            db.query(MarketTrade.price_per_unit)
-            .filter(
-                MarketTrade.good_id == good_id,
-                MarketTrade.created_at == row.close_time,
-            )
-            .scalar()
+    rows = db.execute(
+        select(
+            ranked.c.time,
+            func.max(case((ranked.c.first_rank == 1, ranked.c.price))).label("open"),
+            func.max(ranked.c.price).label("high"),
+            func.min(ranked.c.price).label("low"),
+            func.max(case((ranked.c.last_rank == 1, ranked.c.price))).label("close"),
+            func.sum(ranked.c.quantity).label("volume"),
         )
+        .group_by(ranked.c.time)
+        .order_by(ranked.c.time.desc())
+        .limit(minutes)
+    ).all()
 
-        candles.append({
+    return [
+        {
             "time": row.time,
-            "open": open_price,
+            "open": row.open,
             "high": row.high,
             "low": row.low,
-            "close": close_price,
+            "close": row.close,
             "volume": row.volume,
-        })
-
-    return candles
+        }
+        for row in rows
+    ]
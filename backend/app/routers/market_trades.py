@@ -1,26 +1,62 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from datetime import datetime
 
-from app.deps import get_db
-from app.models.market_trade import MarketTrade
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.deps import get_async_db
+from app.pagination import decode_keyset, encode_cursor, set_next_cursor, set_poll_cursor, split_page
+from app.responses import RowsResponse
+from app.services.market_pages import MAX_MARKET_PAGE_SIZE, trade_page_query
 
 router = APIRouter(prefix="/market/trades", tags=["market"])
 
 
 @router.get("/")
-def list_trades(
+async def list_trades(
     good_id: int | None = None,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+    company_id: int | None = None,
+    side: str | None = None,
+    cursor: str | None = None,
+    since: str | None = None,
+    limit: int = Query(100, ge=1, le=MAX_MARKET_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    query = db.query(MarketTrade)
+    """
+    The trade tape, one keyset page at a time, newest first.
+
+    Older pages: pass the X-Next-Cursor header back as `cursor`.
+    Polling: pass X-Poll-Cursor back as `since` to get only the trades
+    after it, oldest first; each response carries the cursor for the next
+    poll. `side` (buy/sell) requires `company_id`.
+    """
+    if side is not None and (side not in ("buy", "sell") or company_id is None):
+        raise HTTPException(status_code=400, detail="side must be buy or sell, with company_id")
+
+    if cursor and since:
+        raise HTTPException(status_code=400, detail="Pass either cursor or since, not both")
+
+    before = decode_keyset(cursor, datetime, int) if cursor else None
+    after = decode_keyset(since, datetime, int) if since else None
+
+    result = await db.execute(trade_page_query(
+        good_id=good_id,
+        company_id=company_id,
+        side=side,
+        before=before,
+        since=after,
+        limit=limit,
+    ))
+    columns = result.keys()
+    rows, has_more = split_page(result.all(), limit)
+    page = RowsResponse(columns, rows)
 
-    if good_id:
-        query = query.filter(MarketTrade.good_id == good_id)
+    if since:
+        # Caught up or not, the next poll continues after the last row seen
+        set_poll_cursor(page, encode_cursor(rows[-1].created_at, rows[-1].id) if rows else since)
+    else:
+        if rows and not cursor:
+            set_poll_cursor(page, encode_cursor(rows[0].created_at, rows[0].id))
+        if has_more:
+            set_next_cursor(page, encode_cursor(rows[-1].created_at, rows[-1].id))
 
-    return (
-        query
-        .order_by(MarketTrade.created_at.desc())
-        .limit(limit)
-        .all()
-    )
+    return page
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends
+
+from app.db import async_engine, engine
+from app.deps import require_admin
+from app.metrics import pool_status
+from app.middleware import REQUEST_METRICS
+from app.services.transactions import TRANSACTION_METRICS
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("/")
+def get_metrics():
+    """
+    Runtime metrics for the API process.
+
+    Pool entries report checkout latency percentiles (seconds), checkout
+    timeouts and saturation (checked-out connections / pool capacity).
+    Route entries report latency, query count and DB time percentiles per
+    method and route template. Transaction entries report, per write
+    operation, how many ran, how many attempts were retried by reason
+    (deadlock, serialization, conflict) and how many gave up.
+    """
+    return {
+        "pools": {
+            "sync": pool_status(engine.pool),
+            "async": pool_status(async_engine.pool),
+        },
+        "routes": REQUEST_METRICS.snapshot(),
+        "transactions": TRANSACTION_METRICS.snapshot(),
+    }
+
+
+@router.get("/slow", dependencies=[Depends(require_admin)])
+def get_slow_requests():
+    """Most recent slow requests with the SQL they ran, newest first (admin only: raw SQL)"""
+    return list(reversed(REQUEST_METRICS.slow_requests))
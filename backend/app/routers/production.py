@@ -4,31 +4,25 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from app.deps import get_db
-from app.models.inventory import Inventory
 from app.models.production_job import ProductionJob
-from app.models.production_recipe import ProductionRecipe
 from app.schemas.production_job import ProductionJobRead
 from app.services.production import complete_finished_jobs
+from app.services.reference_cache import PRODUCTION_RECIPES
+from app.services.transactions import lock_inventories, transactional
 
 router = APIRouter(prefix="/production", tags=["production"])
 
 
 @router.post("/start/{company_id}", response_model=ProductionJobRead)
+@transactional
 def start_production(company_id: int, recipe_id: int, db: Session = Depends(get_db)):
     complete_finished_jobs(db)
 
-    recipe = db.query(ProductionRecipe).get(recipe_id)
+    recipe = PRODUCTION_RECIPES.get(db, recipe_id)
     if not recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
 
-    inventory = (
-        db.query(Inventory)
-        .filter(
-            Inventory.company_id == company_id,
-            Inventory.good_id == recipe.input_good_id,
-        )
-        .first()
-    )
+    inventory = lock_inventories(db, [(company_id, recipe.input_good_id)]).get((company_id, recipe.input_good_id))
 
     if not inventory or inventory.quantity < recipe.input_quantity:
         raise HTTPException(
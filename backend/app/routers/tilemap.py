@@ -1,16 +1,26 @@
+import asyncio
+
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from sqlalchemy import select, func
-from app.deps import get_db
+import base64
+
+from app.deps import get_async_db
 from app.models.location import Location
 from app.models.resource_deposit import ResourceDeposit
 from app.models.planet import Planet
+from app.services.terrain import (
+    BUILDABILITY_CACHE,
+    BUILDABLE_SLOPE_MAX,
+    CONDITIONAL_SLOPE_MAX,
+)
 
 router = APIRouter(prefix="/tilemap", tags=["Tilemap"])
 
 
 @router.get("/location/{location_id}")
-def get_location_tilemap_info(location_id: int, db: Session = Depends(get_db)):
+async def get_location_tilemap_info(location_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Get tilemap generation parameters for a specific location.
     
@@ -23,14 +33,20 @@ def get_location_tilemap_info(location_id: int, db: Session = Depends(get_db)):
     Godot will use this data to procedurally generate the tilemap on the client side.
     """
     # Fetch location
-    location = db.scalar(select(Location).where(Location.id == location_id))
+    location = await db.scalar(
+        select(Location)
+        .options(selectinload(Location.planet))
+        .where(Location.id == location_id)
+    )
     if not location:
         raise HTTPException(status_code=404, detail="Location not found")
     
     # Fetch resources for this location
-    resources = db.scalars(
-        select(ResourceDeposit)
-        .where(ResourceDeposit.location_id == location_id)
+    resources = (
+        await db.scalars(
+            select(ResourceDeposit)
+            .where(ResourceDeposit.location_id == location_id)
+        )
     ).all()
     
     resource_data = [
@@ -64,7 +80,7 @@ def get_location_tilemap_info(location_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/planets")
-def get_all_planets_with_locations(db: Session = Depends(get_db)):
+async def get_all_planets_with_locations(db: AsyncSession = Depends(get_async_db)):
     """
     Get all planets that have at least one location, with their first location ID.
     Used for planet navigation in Godot client.
@@ -77,7 +93,7 @@ def get_all_planets_with_locations(db: Session = Depends(get_db)):
         .order_by(Planet.id)
     )
     
-    results = db.execute(planets_query).all()
+    results = (await db.execute(planets_query)).all()
     
     planets_data = []
     for planet, first_location_id in results:
@@ -91,3 +107,31 @@ def get_all_planets_with_locations(db: Session = Depends(get_db)):
     
     return {"planets": planets_data}
 
+
+@router.get("/location/{location_id}/buildability")
+async def get_location_buildability(location_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Get the server-side terrain buildability bitmaps for a location.
+
+    Both planes are row-major bitsets over grid_width x grid_height packed
+    MSB-first (numpy.packbits) and base64 encoded:
+    - buildable: slope <= BUILDABLE_SLOPE_MAX (any building)
+    - conditional: slope <= CONDITIONAL_SLOPE_MAX (roads, farms)
+    """
+    location = await db.scalar(select(Location).where(Location.id == location_id))
+    if not location:
+        raise HTTPException(status_code=404, detail="Location not found")
+
+    # A cache miss generates terrain (CPU-bound) on the cache's background thread
+    bitmap = await asyncio.wrap_future(BUILDABILITY_CACHE.fetch(location))
+
+    return {
+        "location_id": location.id,
+        "tilemap_seed": location.tilemap_seed,
+        "grid_width": location.grid_width,
+        "grid_height": location.grid_height,
+        "buildable_slope_max": BUILDABLE_SLOPE_MAX,
+        "conditional_slope_max": CONDITIONAL_SLOPE_MAX,
+        "buildable": base64.b64encode(bitmap.plane(0)).decode(),
+        "conditional": base64.b64encode(bitmap.plane(1)).decode(),
+    }
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, Response
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from sqlalchemy import select, func
-from app.deps import get_db
+from app.deps import get_async_db
 from app.models.universe import Universe
 from app.models.region import Region
 from app.models.star_system import StarSystem
@@ -14,35 +15,35 @@ router = APIRouter(prefix="/viz", tags=["Visualization"])
 
 
 @router.get("/universe")
-def visualize_universe(db: Session = Depends(get_db)):
+async def visualize_universe(db: AsyncSession = Depends(get_async_db)):
     """
     Generate an interactive 3D visualization of the universe using Three.js.
     """
     
     # Fetch regions (small, fast)
-    regions = db.scalars(select(Region)).all()
+    regions = (await db.scalars(select(Region))).all()
     
     # Fetch systems with region data (avoid N+1 queries)
-    systems_query = select(StarSystem).join(Region)
-    systems = db.scalars(systems_query).all()
+    systems_query = select(StarSystem).join(Region).options(selectinload(StarSystem.region))
+    systems = (await db.scalars(systems_query)).all()
     
     # Pre-count planets per system and locations per planet in bulk
     planets_per_system = dict(
-        db.execute(
+        (await db.execute(
             select(Planet.star_system_id, func.count(Planet.id))
             .group_by(Planet.star_system_id)
-        ).all()
+        )).all()
     )
     
     locations_per_planet = dict(
-        db.execute(
+        (await db.execute(
             select(Location.planet_id, func.count(Location.id))
             .group_by(Location.planet_id)
-        ).all()
+        )).all()
     )
     
     # Fetch planets (without loading relationships)
-    planets = db.scalars(select(Planet)).all()
+    planets = (await db.scalars(select(Planet))).all()
     
     # Prepare data for JavaScript
     regions_data = [
@@ -598,16 +599,18 @@ def visualize_universe(db: Session = Depends(get_db)):
 
 
 @router.get("/planet/{planet_id}/resources")
-def get_planet_resources(planet_id: int, db: Session = Depends(get_db)):
+async def get_planet_resources(planet_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Get resource breakdown for a specific planet (on-demand).
     """
     # Get resource totals grouped by type
-    resources = db.execute(
-        select(ResourceDeposit.resource_type, func.sum(ResourceDeposit.quantity))
-        .join(Location)
-        .where(Location.planet_id == planet_id)
-        .group_by(ResourceDeposit.resource_type)
+    resources = (
+        await db.execute(
+            select(ResourceDeposit.resource_type, func.sum(ResourceDeposit.quantity))
+            .join(Location)
+            .where(Location.planet_id == planet_id)
+            .group_by(ResourceDeposit.resource_type)
+        )
     ).all()
     
     resource_breakdown = {
@@ -621,14 +624,28 @@ def get_planet_resources(planet_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/universe/data")
-def get_universe_data(db: Session = Depends(get_db)):
+async def get_universe_data(db: AsyncSession = Depends(get_async_db)):
     """
     Get universe data as JSON for custom visualizations.
     """
-    universe = db.scalar(select(Universe))
-    regions = db.scalars(select(Region)).all()
-    systems = db.scalars(select(StarSystem)).all()
-    planets = db.scalars(select(Planet)).all()
+    universe = await db.scalar(select(Universe).limit(1))
+    regions = (await db.scalars(select(Region))).all()
+    systems = (await db.scalars(select(StarSystem))).all()
+    planets = (await db.scalars(select(Planet))).all()
+    
+    # Child counts in bulk; relationships cannot lazy-load on the async path
+    systems_per_region = dict(
+        (await db.execute(
+            select(StarSystem.region_id, func.count(StarSystem.id))
+            .group_by(StarSystem.region_id)
+        )).all()
+    )
+    planets_per_system = dict(
+        (await db.execute(
+            select(Planet.star_system_id, func.count(Planet.id))
+            .group_by(Planet.star_system_id)
+        )).all()
+    )
     
     return {
         "universe": {
@@ -642,7 +659,7 @@ def get_universe_data(db: Session = Depends(get_db)):
                 "id": r.id,
                 "name": r.name,
                 "position": {"x": r.x, "y": r.y, "z": r.z},
-                "systems_count": len(r.star_systems)
+                "systems_count": systems_per_region.get(r.id, 0)
             }
             for r in regions
         ],
@@ -652,7 +669,7 @@ def get_universe_data(db: Session = Depends(get_db)):
                 "name": s.name,
                 "region_id": s.region_id,
                 "position": {"x": s.x, "y": s.y, "z": s.z},
-                "planets_count": len(s.planets)
+                "planets_count": planets_per_system.get(s.id, 0)
             }
             for s in systems
         ]
@@ -0,0 +1,82 @@
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from app.config import settings
+from app.db import SessionLocal, engine
+from app.services.auction import run_auctions
+from app.services.journal_replay import take_snapshot
+from app.services.orders import expire_orders
+from app.services.trade_partitions import maintain_trade_partitions
+
+logger = logging.getLogger("app.scheduler")
+
+scheduler = BackgroundScheduler(timezone="UTC")
+
+
+def _maintain_trade_partitions() -> None:
+    stats = maintain_trade_partitions(engine)
+    if stats["created"] or stats["archived"]:
+        logger.info("Trade partitions: created %s, archived %s", stats["created"], stats["archived"])
+
+
+def _run_auctions() -> None:
+    with SessionLocal() as db:
+        for result in run_auctions(db):
+            if result["volume"]:
+                logger.info(
+                    "Auction good %d: %d units at %d in %d trades",
+                    result["good_id"], result["volume"], result["price"], result["trades"],
+                )
+
+
+def _expire_orders() -> None:
+    expired = 0
+    with SessionLocal() as db:
+        while True:
+            batch = expire_orders(db, settings.ORDER_EXPIRY_BATCH_SIZE)
+            expired += len(batch)
+            if len(batch) < settings.ORDER_EXPIRY_BATCH_SIZE:
+                break
+    if expired:
+        logger.info("Expired %d good-till-time orders", expired)
+
+
+def _snapshot_journal() -> None:
+    result = take_snapshot(Path(settings.JOURNAL_DIR), settings.JOURNAL_KEEP_SNAPSHOTS)
+    if result:
+        logger.info(
+            "Journal snapshot %s: %d events applied, %d open orders, %d segments pruned",
+            result["path"].name, result["applied"], result["orders"], result["pruned_segments"],
+        )
+
+
+def start_scheduler() -> None:
+    # Hourly, and once right away so a fresh deploy has tomorrow's partition
+    scheduler.add_job(
+        _maintain_trade_partitions, "interval", hours=1,
+        id="trade_partitions", replace_existing=True, coalesce=True,
+        next_run_time=datetime.now(timezone.utc),
+    )
+    scheduler.add_job(
+        _run_auctions, "interval", seconds=settings.AUCTION_INTERVAL_SECONDS,
+        id="market_auctions", replace_existing=True, coalesce=True,
+    )
+    scheduler.add_job(
+        _expire_orders, "interval", seconds=settings.ORDER_EXPIRY_INTERVAL_SECONDS,
+        id="order_expiry", replace_existing=True, coalesce=True,
+    )
+    if settings.JOURNAL_ENABLED:
+        # Extends the newest snapshot only; the first is bootstrapped by hand at deploy
+        scheduler.add_job(
+            _snapshot_journal, "interval", seconds=settings.JOURNAL_SNAPSHOT_INTERVAL_SECONDS,
+            id="journal_snapshots", replace_existing=True, coalesce=True,
+        )
+    scheduler.start()
+
+
+def shutdown_scheduler() -> None:
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
@@ -14,6 +14,7 @@ class GoodRead(BaseModel):
     primary_category: str
     subcategory: str | None
     rarity: str
+    market_mode: str = "continuous"
     
     class Config:
         from_attributes = True
\ No newline at end of file
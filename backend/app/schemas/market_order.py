@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from datetime import datetime, timezone
+
+from pydantic import BaseModel, Field, field_validator
 
 
 class MarketOrderCreate(BaseModel):
@@ -6,6 +8,18 @@ class MarketOrderCreate(BaseModel):
     order_type: str  # "buy" or "sell"
     quantity: int
     price_per_unit: int
+    # Resubmitting with the same ID returns the original order instead of placing another
+    client_order_id: str | None = Field(None, min_length=1, max_length=64)
+    # Good-till-time: cancelled automatically once past (naive times are UTC)
+    expires_at: datetime | None = None
+
+    @field_validator("expires_at")
+    @classmethod
+    def _naive_utc(cls, value: datetime | None) -> datetime | None:
+        # Stored like created_at: naive UTC
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
 
 
 class MarketOrderRead(BaseModel):
@@ -21,5 +35,21 @@ class MarketOrderRead(BaseModel):
     company_id: int
     company_name: str
 
+    created_at: datetime | None = None
+    client_order_id: str | None = None
+    expires_at: datetime | None = None
+    original_quantity: int | None = None
+
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class MarketOrderBatch(BaseModel):
+    orders: list[MarketOrderCreate]
+    # Cancel the company's open orders in these goods first (a full quote refresh)
+    replace: bool = False
+
+
+class MarketOrderBatchRead(BaseModel):
+    orders: list[MarketOrderRead]
+    cancelled: list[int]
@@ -0,0 +1,67 @@
+"""
+Trade partition maintenance and archive queries.
+
+    python -m app.scripts.archive_trades run
+    python -m app.scripts.archive_trades query --good-id 3 --start 2026-01-01 --end 2026-02-01 \
+        --output trades.csv
+
+`run` does what the hourly scheduler job does: create the upcoming daily
+partitions and move partitions older than TRADE_RETENTION_DAYS to Parquet.
+`query` reads the Parquet archive only (not the live table).
+"""
+import argparse
+from datetime import datetime
+
+from app.db import engine
+from app.services.trade_archive import read_archived_trades
+from app.services.trade_partitions import maintain_trade_partitions
+
+
+def run(args: argparse.Namespace) -> None:
+    stats = maintain_trade_partitions(engine)
+    print(f"Created partitions: {', '.join(stats['created']) or 'none'}")
+    for name, rows in stats["archived"].items():
+        print(f"Archived {name}: {rows} trades")
+    if not stats["archived"]:
+        print("Nothing to archive")
+
+
+def query(args: argparse.Namespace) -> None:
+    table = read_archived_trades(start=args.start, end=args.end, good_id=args.good_id)
+    print(f"{table.num_rows} archived trades")
+
+    if args.output:
+        import pyarrow.csv
+
+        pyarrow.csv.write_csv(table, args.output)
+        print(f"Written to {args.output}")
+    elif table.num_rows:
+        print(table.slice(0, 20).to_pandas() if _has_pandas() else table.slice(0, 20))
+
+
+def _has_pandas() -> bool:
+    try:
+        import pandas  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("run", help="Create upcoming partitions and archive expired ones")
+
+    query_parser = commands.add_parser("query", help="Read trades from the Parquet archive")
+    query_parser.add_argument("--good-id", type=int)
+    query_parser.add_argument("--start", type=datetime.fromisoformat, help="Inclusive, ISO date/time")
+    query_parser.add_argument("--end", type=datetime.fromisoformat, help="Exclusive, ISO date/time")
+    query_parser.add_argument("--output", help="Write matching trades to this CSV file")
+
+    args = parser.parse_args()
+    {"run": run, "query": query}[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Order intake throughput, inline versus sharded matching workers.
+
+    python -m app.scripts.bench_matching_pool --workers 0 --threads 16 --goods 1
+    python -m app.scripts.bench_matching_pool --workers 4 --threads 16 --goods 8
+
+Concurrent request threads place resting buy orders (price 1, so nothing
+fills) for companies 1..--companies in goods 1..--goods, either inline
+(--workers 0) or through a MatchingPool. The orders are deleted
+afterwards. Run it against Postgres on the hardware MATCHING_WORKERS is
+meant for: the pool only serializes each good's intake onto one
+process, so any gain comes from spreading goods over cores and from
+requests queueing instead of waiting on the book lock.
+"""
+import argparse
+import random
+import threading
+import time
+import uuid
+
+from sqlalchemy import delete
+
+from app.db import SessionLocal
+from app.models.market_order import MarketOrder
+from app.services.matching_pool import MatchingPool
+from app.services.orders import place_order
+
+CLIENT_ORDER_PREFIX = "bench-"
+
+
+def _payload(good_id: int) -> dict:
+    return {
+        "good_id": good_id,
+        "order_type": "buy",
+        "quantity": 1,
+        "price_per_unit": 1,
+        "client_order_id": CLIENT_ORDER_PREFIX + uuid.uuid4().hex[:24],
+        "expires_at": None,
+    }
+
+
+def run(args: argparse.Namespace) -> float:
+    """Orders per second over all threads."""
+    pool = MatchingPool() if args.workers else None
+    if pool is not None:
+        pool.start(args.workers)
+
+    def place(seed: int, count: int) -> None:
+        rng = random.Random(seed)
+        for _ in range(count):
+            payload = _payload(rng.randint(1, args.goods))
+            company_id = rng.randint(1, args.companies)
+            if pool is not None:
+                pool.submit(payload["good_id"], "place", company_id, payload)
+            else:
+                with SessionLocal() as db:
+                    place_order(db, company_id, payload)
+
+    try:
+        place(-1, 10)  # warm up connections (and the workers' imports)
+        threads = [threading.Thread(target=place, args=(seed, args.orders)) for seed in range(args.threads)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        if pool is not None:
+            pool.stop()
+        with SessionLocal() as db:
+            db.execute(delete(MarketOrder).where(MarketOrder.client_order_id.startswith(CLIENT_ORDER_PREFIX)))
+            db.commit()
+
+    return args.threads * args.orders / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=0, help="Matching workers (0: inline)")
+    parser.add_argument("--threads", type=int, default=16, help="Concurrent request threads")
+    parser.add_argument("--orders", type=int, default=50, help="Orders per thread")
+    parser.add_argument("--goods", type=int, default=8, help="Goods the orders are spread over")
+    parser.add_argument("--companies", type=int, default=100, help="Companies placing them")
+    args = parser.parse_args()
+
+    rate = run(args)
+    mode = f"{args.workers} workers" if args.workers else "inline"
+    print(f"{mode}, {args.threads} threads, {args.goods} goods: {rate:.0f} orders/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Print query plans for the market's hot queries and check that they use
+the order-book indexes.
+
+    python -m app.scripts.explain_market_queries [--analyze]
+
+Run it against a database holding realistic data: on near-empty tables
+the planner picks sequential scans whatever indexes exist. Index usage is
+checked on PostgreSQL (exit status 1 if a query misses its index); on
+SQLite the plans are only printed.
+"""
+import argparse
+import sys
+from types import SimpleNamespace
+
+from sqlalchemy import select, text
+
+from app.db import engine
+from app.models.market_order import MarketOrder
+from app.models.market_trade import MarketTrade
+from app.services.market import book_side_query, crossing_orders_query
+from app.services.market_pages import order_page_query, trade_page_query
+from app.services.quotes import last_prices_query
+
+
+def sample_order(conn) -> SimpleNamespace:
+    """An open order from the busiest good, so plans reflect real selectivity."""
+    row = conn.execute(
+        select(MarketOrder.good_id, MarketOrder.company_id, MarketOrder.price_per_unit)
+        .where(MarketOrder.status == "open")
+        .limit(1)
+    ).first()
+    if row is None:
+        return SimpleNamespace(good_id=1, company_id=1, price_per_unit=100)
+    return SimpleNamespace(good_id=row.good_id, company_id=row.company_id, price_per_unit=row.price_per_unit)
+
+
+def hot_queries(sample: SimpleNamespace) -> list[tuple[str, object, str | tuple[str, ...]]]:
+    """(name, statement, index expected on PostgreSQL, or alternative names)."""
+    incoming_buy = SimpleNamespace(order_type="buy", good_id=sample.good_id, price_per_unit=sample.price_per_unit)
+    incoming_sell = SimpleNamespace(order_type="sell", good_id=sample.good_id, price_per_unit=sample.price_per_unit)
+
+    return [
+        ("matching: incoming buy", crossing_orders_query(incoming_buy), "ix_market_orders_open_sells"),
+        ("matching: incoming sell", crossing_orders_query(incoming_sell), "ix_market_orders_open_buys"),
+        ("order book: bids", book_side_query(sample.good_id, "buy"), "ix_market_orders_open_buys"),
+        ("order book: asks", book_side_query(sample.good_id, "sell"), "ix_market_orders_open_sells"),
+        (
+            "stats: last trade",
+            select(MarketTrade.price_per_unit)
+            .where(MarketTrade.good_id == sample.good_id)
+            .order_by(MarketTrade.created_at.desc())
+            .limit(1),
+            # Partitions of market_trades carry generated index names
+            ("ix_market_trades_good_created", "_good_id_created_at_id_idx"),
+        ),
+        (
+            "quotes: last trade per good",
+            last_prices_query(),
+            ("ix_market_trades_good_created", "_good_id_created_at_id_idx"),
+        ),
+        ("orders: listing page", order_page_query(limit=500), "ix_market_orders_open_listing"),
+        (
+            "trades: tape page",
+            trade_page_query(limit=100),
+            ("ix_market_trades_created_at", "_created_at_idx"),
+        ),
+        (
+            "cancel: company's open orders",
+            select(MarketOrder)
+            .where(MarketOrder.company_id == sample.company_id, MarketOrder.status == "open"),
+            "ix_market_orders_open_company",
+        ),
+        (
+            "cancel: order by id",
+            select(MarketOrder).where(MarketOrder.id == 1),
+            "market_orders_pkey",
+        ),
+    ]
+
+
+def explain(conn, statement, analyze: bool) -> list[str]:
+    sql = str(statement.compile(conn.engine, compile_kwargs={"literal_binds": True}))
+
+    if conn.dialect.name == "postgresql":
+        prefix = "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+        return [row[0] for row in conn.execute(text(prefix + sql))]
+
+    return [" ".join(str(col) for col in row) for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--analyze", action="store_true", help="Run the queries (EXPLAIN ANALYZE, PostgreSQL only)")
+    args = parser.parse_args()
+
+    missing = []
+    with engine.connect() as conn:
+        check = conn.dialect.name == "postgresql"
+
+        for name, statement, index in hot_queries(sample_order(conn)):
+            plan = explain(conn, statement, args.analyze)
+            names = (index,) if isinstance(index, str) else index
+            uses_index = any(n in line for n in names for line in plan)
+
+            status = "ok" if uses_index else "MISSING INDEX"
+            print(f"== {name}" + (f" (expects {names[0]}: {status})" if check else ""))
+            for line in plan:
+                print(f"   {line}")
+            print()
+
+            if check and not uses_index:
+                missing.append(name)
+
+    if missing:
+        print(f"❌ {len(missing)} queries do not use their index: {', '.join(missing)}")
+        sys.exit(1)
+    if check:
+        print("✅ All market queries use their indexes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Market event journal: snapshots, replay and verification.
+
+    python -m app.scripts.market_journal snapshot
+    python -m app.scripts.market_journal replay --good-id 3
+    python -m app.scripts.market_journal replay --verify
+    python -m app.scripts.market_journal bootstrap
+
+`snapshot` does what the scheduler job does: replay the newest snapshot
+plus the tail into a new snapshot and prune what is no longer needed.
+`replay` rebuilds state in memory and reports it; --verify compares it
+with the database (cash and goods changed outside the market show up as
+differences). `bootstrap` writes a snapshot read from the database: the
+first one, and a fresh one after admin edits. Run it while no orders are
+being placed (at deploy, before the API starts), or events committed
+meanwhile are counted twice or not at all.
+"""
+import argparse
+import time
+from pathlib import Path
+
+from app.config import settings
+from app.db import SessionLocal
+from app.services.journal_replay import bootstrap, compare_with_db, replay, take_snapshot, write_snapshot
+
+
+def _directory(args: argparse.Namespace) -> Path:
+    return Path(args.dir or settings.JOURNAL_DIR)
+
+
+def snapshot_command(args: argparse.Namespace) -> None:
+    result = take_snapshot(_directory(args), settings.JOURNAL_KEEP_SNAPSHOTS)
+    if result is None:
+        print("No snapshot written: another process is taking one, or none exists yet (run bootstrap)")
+        return
+    print(f"Wrote {result['path']} from {result['applied']} journal events: {result['orders']} open orders")
+    print(f"Pruned {result['pruned_segments']} segments")
+
+
+def bootstrap_command(args: argparse.Namespace) -> None:
+    directory = _directory(args)
+    with SessionLocal() as db:
+        state = bootstrap(directory, db)
+    path = write_snapshot(directory, state)
+    print(f"Wrote {path}: {len(state.orders)} open orders, {len(state.cash)} companies")
+
+
+def replay_command(args: argparse.Namespace) -> None:
+    started = time.perf_counter()
+    state, applied = replay(_directory(args))
+    elapsed = time.perf_counter() - started
+
+    print(f"Replayed {applied} events in {elapsed * 1000:.1f} ms")
+    print(f"{len(state.orders)} open orders, {len(state.cash)} companies, {len(state.inventory)} inventories")
+
+    if args.good_id is not None:
+        book = state.book(args.good_id)
+        for side, reverse in (("sell", True), ("buy", True)):
+            for price in sorted(book[side], reverse=reverse):
+                print(f"  {side:4} {price:>10} x {book[side][price]}")
+
+    if args.verify:
+        with SessionLocal() as db:
+            differences = compare_with_db(state, db)
+        for line in differences[:args.limit]:
+            print(line)
+        if len(differences) > args.limit:
+            print(f"... and {len(differences) - args.limit} more")
+        print(f"{len(differences)} differences from the database")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", help="Journal directory (default JOURNAL_DIR)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("snapshot", help="Write a snapshot from the previous one plus the tail")
+    commands.add_parser("bootstrap", help="Write a snapshot read from the database")
+
+    replay_parser = commands.add_parser("replay", help="Rebuild state from the newest snapshot and the tail")
+    replay_parser.add_argument("--good-id", type=int, help="Print this good's rebuilt book")
+    replay_parser.add_argument("--verify", action="store_true", help="Compare with the database")
+    replay_parser.add_argument("--limit", type=int, default=20, help="Differences to print")
+
+    args = parser.parse_args()
+    {
+        "snapshot": snapshot_command,
+        "bootstrap": bootstrap_command,
+        "replay": replay_command,
+    }[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Periodic call auctions for goods in "auction" market mode.
+
+Orders for such goods rest on the book without matching. Each auction
+clears a good's whole book at one uniform price, the price that executes
+the most volume, with the demand and supply curves computed over all limit
+prices at once in numpy. Fills are allocated in price-time priority and
+settled in a fixed number of bulk statements however many orders take
+part, with one trade per buyer/seller company pair instead of one per
+partial fill (the journal still gets every order-level fill).
+"""
+import logging
+from collections import defaultdict
+from types import SimpleNamespace
+
+import numpy as np
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.company import Company
+from app.models.good import Good
+from app.models.market_order import MarketOrder
+from app.models.market_trade import MarketTrade
+from app.services import journal
+from app.services.market import lock_book
+from app.services.quotes import QUOTE_BOOK
+from app.services.settlement import Settlement
+from app.services.transactions import lock_inventories, transactional
+
+logger = logging.getLogger("app.auction")
+
+ORDER_COLUMNS = (
+    MarketOrder.id,
+    MarketOrder.company_id,
+    MarketOrder.good_id,
+    MarketOrder.order_type,
+    MarketOrder.price_per_unit,
+    MarketOrder.quantity,
+)
+
+
+def clearing_price(
+    buy_prices: np.ndarray,
+    buy_quantities: np.ndarray,
+    sell_prices: np.ndarray,
+    sell_quantities: np.ndarray,
+) -> tuple[int | None, int]:
+    """
+    Uniform price and volume where the demand and supply curves cross.
+
+    Candidates are every limit price. The price executing the most volume
+    wins; ties go to the smallest imbalance between demand and supply, then
+    to the middle of the remaining prices. (None, 0) when nothing crosses.
+    """
+    if not len(buy_prices) or not len(sell_prices):
+        return None, 0
+
+    candidates = np.unique(np.concatenate([buy_prices, sell_prices]))
+
+    # Demand at p: buy quantity priced at p or higher
+    order = np.argsort(buy_prices, kind="stable")
+    prices = buy_prices[order]
+    at_or_above = np.append(np.cumsum(buy_quantities[order][::-1])[::-1], 0)
+    demand = at_or_above[np.searchsorted(prices, candidates, side="left")]
+
+    # Supply at p: sell quantity priced at p or lower
+    order = np.argsort(sell_prices, kind="stable")
+    prices = sell_prices[order]
+    at_or_below = np.insert(np.cumsum(sell_quantities[order]), 0, 0)
+    supply = at_or_below[np.searchsorted(prices, candidates, side="right")]
+
+    volume = np.minimum(demand, supply)
+    best_volume = int(volume.max())
+    if best_volume == 0:
+        return None, 0
+
+    imbalance = np.abs(demand - supply)
+    best = volume == best_volume
+    best &= imbalance == imbalance[best].min()
+    tied = candidates[best]
+    return int(tied[(len(tied) - 1) // 2]), best_volume
+
+
+def allocate(quantities: np.ndarray, volume: int) -> np.ndarray:
+    """Fill `volume` across orders already in priority order."""
+    ahead = np.cumsum(quantities) - quantities
+    return np.clip(volume - ahead, 0, quantities)
+
+
+def _priority(side: str):
+    """Sort key for price-time priority (orders arrive sorted by created_at, id)."""
+    return (lambda o: -o.price_per_unit) if side == "buy" else (lambda o: o.price_per_unit)
+
+
+def _order_fills(buys, buy_fills, sells, sell_fills) -> list[tuple]:
+    """(buy order, sell order, quantity) matches, filled orders walked in priority."""
+    fills = []
+    buys = [[o, int(q)] for o, q in zip(buys, buy_fills) if q]
+    sells = [[o, int(q)] for o, q in zip(sells, sell_fills) if q]
+
+    b = s = 0
+    while b < len(buys) and s < len(sells):
+        qty = min(buys[b][1], sells[s][1])
+        fills.append((buys[b][0], sells[s][0], qty))
+        buys[b][1] -= qty
+        sells[s][1] -= qty
+        if buys[b][1] == 0:
+            b += 1
+        if sells[s][1] == 0:
+            s += 1
+    return fills
+
+
+def _pair_trades(fills: list[tuple]) -> dict[tuple[int, int], int]:
+    """Quantity traded per (buyer company, seller company)."""
+    pairs: dict[tuple[int, int], int] = defaultdict(int)
+    for buy, sell, qty in fills:
+        pairs[(buy.company_id, sell.company_id)] += qty
+    return pairs
+
+
+@transactional
+def clear_auction(db: Session, good_id: int) -> dict:
+    """Run one call auction for `good_id` and commit it."""
+    result = uncross(db, good_id)
+    db.commit()
+    return result
+
+
+def uncross(db: Session, good_id: int) -> dict:
+    """Clear `good_id`'s book at one price (no commit)."""
+    lock_book(db, good_id)
+
+    orders = db.execute(
+        select(*ORDER_COLUMNS)
+        .where(
+            MarketOrder.good_id == good_id,
+            MarketOrder.status == "open",
+            MarketOrder.quantity > 0,
+        )
+        .order_by(MarketOrder.created_at, MarketOrder.id)
+        .with_for_update()
+    ).all()
+    buys = sorted((o for o in orders if o.order_type == "buy"), key=_priority("buy"))
+    sells = sorted((o for o in orders if o.order_type == "sell"), key=_priority("sell"))
+
+    sell_prices = np.array([o.price_per_unit for o in sells], dtype=np.int64)
+    sell_quantities = np.array([o.quantity for o in sells], dtype=np.int64)
+
+    # Every participant locked up front in canonical order, as the
+    # settlement would: their inventories of the good, then the companies
+    company_ids = sorted({o.company_id for o in orders})
+    lock_inventories(db, [(company_id, good_id) for company_id in company_ids])
+    cash = dict(db.execute(
+        select(Company.id, Company.cash)
+        .where(Company.id.in_(company_ids))
+        .order_by(Company.id)
+        .with_for_update(key_share=True)
+    ).all()) if company_ids else {}
+
+    # A buyer that cannot pay for its fills loses its buy orders, as in
+    # continuous matching; the price is then found again without them
+    cancelled = []
+    while True:
+        buy_prices = np.array([o.price_per_unit for o in buys], dtype=np.int64)
+        buy_quantities = np.array([o.quantity for o in buys], dtype=np.int64)
+        price, volume = clearing_price(buy_prices, buy_quantities, sell_prices, sell_quantities)
+        if price is None:
+            break
+
+        buy_fills = allocate(buy_quantities, volume)
+        cost: dict[int, int] = defaultdict(int)
+        for order, qty in zip(buys, buy_fills):
+            cost[order.company_id] += int(qty) * price
+
+        broke = {company_id for company_id, total in cost.items() if total > cash.get(company_id, 0)}
+        if not broke:
+            break
+        cancelled += [o for o in buys if o.company_id in broke]
+        buys = [o for o in buys if o.company_id not in broke]
+
+    if cancelled:
+        db.execute(
+            update(MarketOrder),
+            [{"id": o.id, "status": "cancelled"} for o in cancelled],
+        )
+        for order in cancelled:
+            QUOTE_BOOK.record_level(db, order, -order.quantity)
+            journal.record_cancel(db, order, "insufficient_cash")
+
+    if price is None:
+        return {"good_id": good_id, "price": None, "volume": 0, "trades": 0, "cancelled": len(cancelled)}
+
+    sell_fills = allocate(sell_quantities, volume)
+    fills = _order_fills(buys, buy_fills, sells, sell_fills)
+    _settle(db, good_id, price, buys, buy_fills, sells, sell_fills, fills)
+    trades = _pair_trades(fills)
+    for buy, sell, qty in fills:
+        journal.record(
+            db, journal.ORDER_FILLED,
+            good_id=good_id,
+            buy_order_id=buy.id,
+            sell_order_id=sell.id,
+            buyer_company_id=buy.company_id,
+            seller_company_id=sell.company_id,
+            quantity=qty,
+            price=price,
+        )
+
+    trade_rows = [
+        {
+            "good_id": good_id,
+            "buyer_company_id": buyer_id,
+            "seller_company_id": seller_id,
+            "quantity": qty,
+            "price_per_unit": price,
+        }
+        for (buyer_id, seller_id), qty in sorted(trades.items())
+    ]
+    db.execute(insert(MarketTrade), trade_rows)
+    for row in trade_rows:
+        QUOTE_BOOK.record_trade(db, SimpleNamespace(**row))
+
+    return {
+        "good_id": good_id,
+        "price": price,
+        "volume": volume,
+        "trades": len(trade_rows),
+        "cancelled": len(cancelled),
+    }
+
+
+def _settle(db: Session, good_id: int, price: int, buys, buy_fills, sells, sell_fills, fills) -> None:
+    """Bulk-write order, cash and inventory changes for the auction's fills."""
+    order_rows = []
+    for orders, order_fills in ((buys, buy_fills), (sells, sell_fills)):
+        for order, qty in zip(orders, order_fills):
+            qty = int(qty)
+            if not qty:
+                continue
+            remaining = order.quantity - qty
+            order_rows.append({
+                "id": order.id,
+                "quantity": remaining,
+                "status": "open" if remaining else "filled",
+            })
+            QUOTE_BOOK.record_level(db, order, -qty)
+
+    db.execute(update(MarketOrder), order_rows)
+
+    settlement = Settlement()
+    for buy, sell, qty in fills:
+        settlement.transfer(buy.company_id, sell.company_id, good_id, qty, qty * price)
+    settlement.apply(db)
+
+
+def run_auctions(db: Session) -> list[dict]:
+    """Scheduler job body: clear every auction-mode good, each in its own transaction."""
+    results = []
+    # From the database: a good that just entered auction mode is cleared this round
+    good_ids = db.scalars(select(Good.id).where(Good.market_mode == "auction").order_by(Good.id)).all()
+    db.rollback()  # end the read transaction; each auction runs in its own
+    for good_id in good_ids:
+        try:
+            results.append(clear_auction(db, good_id))
+        except Exception:
+            db.rollback()
+            logger.exception("Auction for good %d failed", good_id)
+    return results
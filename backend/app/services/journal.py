@@ -0,0 +1,141 @@
+"""
+Append-only journal of market events.
+
+Every committed order acceptance, fill and cancellation is appended, once
+its transaction has committed, to newline-delimited JSON segment files:
+
+    JOURNAL_DIR/streams/<stream>/<first seq>.jsonl
+
+Each process writes its own stream (host, pid and start time), numbered
+from 1, so writers never share a file. Sequence numbers and timestamps
+are taken at write time, so across streams they need not follow commit
+order; app/services/journal_replay.py rebuilds the resident order book,
+cash and inventories from the latest snapshot plus the tail in any order.
+
+The database stays the source of truth: events are written after the
+commit, and a failed journal write is logged rather than failing the
+request.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import orjson
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+logger = logging.getLogger("app.journal")
+
+# Session.info key holding events not yet committed
+PENDING_KEY = "pending_journal_events"
+
+# Event types: what happened to an order (fills also move cash and goods)
+ORDER_ACCEPTED = "order_accepted"
+ORDER_FILLED = "order_filled"
+ORDER_CANCELLED = "order_cancelled"
+
+
+def segment_name(first_seq: int) -> str:
+    return f"{first_seq:012d}.jsonl"
+
+
+def record(db: Session, kind: str, **fields) -> None:
+    """Queue an event on the session; it is journaled only if the session commits."""
+    if settings.JOURNAL_ENABLED:
+        db.info.setdefault(PENDING_KEY, []).append((kind, fields))
+
+
+def record_cancel(db: Session, order, reason: str) -> None:
+    """Queue an order's cancellation with the remaining quantity it releases."""
+    record(
+        db,
+        ORDER_CANCELLED,
+        order_id=order.id,
+        company_id=order.company_id,
+        good_id=order.good_id,
+        side=order.order_type,
+        quantity=order.quantity,
+        reason=reason,
+    )
+
+
+class EventJournal:
+    """This process's stream: sequence numbers, segment files and rolling."""
+
+    def __init__(self, directory: str, segment_bytes: int, fsync: bool):
+        self.directory = Path(directory)
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self.stream: str | None = None
+        self.seq = 0
+        self._pid: int | None = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _start_stream(self) -> None:
+        # Per process; a forked child must not continue its parent's stream
+        self._pid = os.getpid()
+        self.stream = f"{socket.gethostname()}-{self._pid}-{datetime.utcnow():%Y%m%dT%H%M%S}"
+        self.seq = 0
+        self._file = None
+
+    def _roll(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        stream_dir = self.directory / "streams" / self.stream
+        stream_dir.mkdir(parents=True, exist_ok=True)
+        self._file = open(stream_dir / segment_name(self.seq + 1), "ab")
+
+    def append(self, events: list[tuple[str, dict]]) -> None:
+        with self._lock:
+            if self._pid != os.getpid():
+                self._start_stream()
+            if self._file is None or self._file.tell() >= self.segment_bytes:
+                self._roll()
+
+            ts = round(time.time(), 6)
+            lines = []
+            for kind, fields in events:
+                self.seq += 1
+                lines.append(orjson.dumps({"seq": self.seq, "ts": ts, "type": kind, **fields}))
+
+            self._file.write(b"\n".join(lines) + b"\n")
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+JOURNAL = EventJournal(
+    settings.JOURNAL_DIR,
+    settings.JOURNAL_SEGMENT_BYTES,
+    settings.JOURNAL_FSYNC,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _write_pending_events(session: Session) -> None:
+    events = session.info.pop(PENDING_KEY, None)
+    if not events:
+        return
+    try:
+        JOURNAL.append(events)
+    except OSError:
+        logger.exception("Could not journal %d market events", len(events))
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_events(session: Session, previous_transaction) -> None:
+    if previous_transaction.parent is None:
+        session.info.pop(PENDING_KEY, None)
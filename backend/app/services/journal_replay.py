@@ -0,0 +1,369 @@
+"""
+Rebuild market state from the event journal.
+
+State is the resident order book (every open order with its remaining
+quantity), company cash and inventories (quantity and reserved). A
+snapshot stores that state together with the last sequence number of each
+stream it covers, under
+
+    JOURNAL_DIR/snapshots/<UTC time>.json
+
+Replay loads the newest snapshot and applies the tail: every later event
+of every stream, merged by the time each was written. That is not commit
+order: events are written after the commit, so a fill can land in its
+stream before the acceptance of its order lands in another (or on the
+other side of a snapshot). Replay therefore does not depend on order.
+Every event carries the quantities it moves, and a fill or cancellation
+of an order not yet accepted is held until its acceptance arrives.
+
+The first snapshot is bootstrapped from the database by hand
+(`python -m app.scripts.market_journal bootstrap`), at startup before the
+API takes orders: a bootstrap is only exact while the market is quiet.
+After that each snapshot is the previous one plus the tail, so the
+database is never scanned again; the scheduler only ever does that.
+
+Only market events are journaled. Cash and goods that change outside the
+market (production, extraction, admin edits) are picked up by the next
+bootstrap, not by replay.
+"""
+import heapq
+import logging
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.company import Company
+from app.models.inventory import Inventory
+from app.models.market_order import MarketOrder
+from app.services.journal import ORDER_ACCEPTED, ORDER_CANCELLED, ORDER_FILLED
+
+try:
+    import fcntl
+except ImportError:  # Windows: snapshot writers are not serialized
+    fcntl = None
+
+logger = logging.getLogger("app.journal")
+
+SNAPSHOT_FORMAT = 2
+
+
+class MarketState:
+    """Open orders, cash and inventories, and the stream positions they reflect."""
+
+    def __init__(self):
+        # order id -> [company_id, good_id, side, price, remaining quantity]
+        self.orders: dict[int, list] = {}
+        self.cash: dict[int, int] = {}
+        # (company_id, good_id) -> [quantity, reserved]
+        self.inventory: dict[tuple[int, int], list[int]] = {}
+        # order id -> [filled quantity, cancelled] for orders filled or cancelled
+        # before their acceptance was applied
+        self.early: dict[int, list] = {}
+        self.positions: dict[str, int] = {}
+        self.last_ts: float | None = None
+
+    def _holding(self, company_id: int, good_id: int) -> list[int]:
+        key = (company_id, good_id)
+        if key not in self.inventory:
+            self.inventory[key] = [0, 0]
+        return self.inventory[key]
+
+    def _early(self, order_id: int) -> list:
+        if order_id not in self.early:
+            self.early[order_id] = [0, False]
+        return self.early[order_id]
+
+    def _reduce(self, order_id: int, quantity: int) -> None:
+        order = self.orders.get(order_id)
+        if order is None:
+            self._early(order_id)[0] += quantity
+            return
+        order[4] -= quantity
+        if order[4] <= 0:
+            del self.orders[order_id]
+
+    def apply(self, event: dict) -> None:
+        """Apply one journal event; mirrors the database writes of the matching path."""
+        kind = event["type"]
+
+        if kind == ORDER_ACCEPTED:
+            filled, cancelled = self.early.pop(event["order_id"], (0, False))
+            remaining = event["quantity"] - filled
+            if remaining > 0 and not cancelled:
+                self.orders[event["order_id"]] = [
+                    event["company_id"], event["good_id"], event["side"], event["price"], remaining,
+                ]
+            if event["side"] == "sell":
+                self._holding(event["company_id"], event["good_id"])[1] += event["quantity"]
+
+        elif kind == ORDER_FILLED:
+            qty = event["quantity"]
+            total = qty * event["price"]
+            self._reduce(event["buy_order_id"], qty)
+            self._reduce(event["sell_order_id"], qty)
+            self.cash[event["buyer_company_id"]] = self.cash.get(event["buyer_company_id"], 0) - total
+            self.cash[event["seller_company_id"]] = self.cash.get(event["seller_company_id"], 0) + total
+            seller = self._holding(event["seller_company_id"], event["good_id"])
+            seller[0] -= qty
+            seller[1] -= qty
+            self._holding(event["buyer_company_id"], event["good_id"])[0] += qty
+
+        elif kind == ORDER_CANCELLED:
+            if self.orders.pop(event["order_id"], None) is None:
+                self._early(event["order_id"])[1] = True
+            # The quantity left when it was cancelled, whatever this state has seen of its fills
+            if event["side"] == "sell":
+                self._holding(event["company_id"], event["good_id"])[1] -= event["quantity"]
+
+        self.positions[event["stream"]] = event["seq"]
+        self.last_ts = event["ts"] if self.last_ts is None else max(self.last_ts, event["ts"])
+
+    def book(self, good_id: int) -> dict[str, dict[int, int]]:
+        """Open quantity per price level on each side of one good."""
+        levels = {"buy": {}, "sell": {}}
+        for _, order_good_id, side, price, quantity in self.orders.values():
+            if order_good_id == good_id:
+                levels[side][price] = levels[side].get(price, 0) + quantity
+        return levels
+
+    # -- snapshots -----------------------------------------------------------
+
+    def to_dict(self) -> dict:
+        return {
+            "format": SNAPSHOT_FORMAT,
+            "positions": self.positions,
+            "last_ts": self.last_ts,
+            "orders": [[order_id, *order] for order_id, order in sorted(self.orders.items())],
+            "early": [[order_id, *early] for order_id, early in sorted(self.early.items())],
+            "cash": sorted(self.cash.items()),
+            "inventory": [[*key, *holding] for key, holding in sorted(self.inventory.items())],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "MarketState":
+        if data.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported snapshot format {data.get('format')!r}")
+
+        state = cls()
+        state.positions = dict(data["positions"])
+        state.last_ts = data["last_ts"]
+        state.orders = {row[0]: list(row[1:]) for row in data["orders"]}
+        state.early = {row[0]: list(row[1:]) for row in data["early"]}
+        state.cash = {company_id: cash for company_id, cash in data["cash"]}
+        state.inventory = {(row[0], row[1]): [row[2], row[3]] for row in data["inventory"]}
+        return state
+
+    @classmethod
+    def from_db(cls, db: Session) -> "MarketState":
+        state = cls()
+        rows = db.execute(
+            select(
+                MarketOrder.id,
+                MarketOrder.company_id,
+                MarketOrder.good_id,
+                MarketOrder.order_type,
+                MarketOrder.price_per_unit,
+                MarketOrder.quantity,
+            ).where(MarketOrder.status == "open", MarketOrder.quantity > 0)
+        )
+        state.orders = {row[0]: list(row[1:]) for row in rows}
+        state.cash = dict(db.execute(select(Company.id, Company.cash)).all())
+        rows = db.execute(select(Inventory.company_id, Inventory.good_id, Inventory.quantity, Inventory.reserved))
+        state.inventory = {(c, g): [q, r or 0] for c, g, q, r in rows}
+        return state
+
+
+# -- reading the journal ------------------------------------------------------
+
+def stream_segments(directory: Path) -> dict[str, list[tuple[int, Path]]]:
+    """Segment files of every stream as (first seq, path), in order."""
+    streams = {}
+    root = directory / "streams"
+    if not root.is_dir():
+        return streams
+    for stream_dir in sorted(root.iterdir()):
+        segments = sorted((int(path.stem), path) for path in stream_dir.glob("*.jsonl"))
+        if segments:
+            streams[stream_dir.name] = segments
+    return streams
+
+
+def _read_stream(stream: str, segments: list[tuple[int, Path]], after_seq: int):
+    for index, (first_seq, path) in enumerate(segments):
+        next_first = segments[index + 1][0] if index + 1 < len(segments) else None
+        if next_first is not None and next_first - 1 <= after_seq:
+            continue  # wholly covered
+
+        for line in path.read_bytes().splitlines():
+            try:
+                event = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                # A write cut short by a crash; nothing after it was committed to the file
+                logger.warning("Stopping stream %s at a torn line in %s", stream, path.name)
+                return
+            if event["seq"] > after_seq:
+                event["stream"] = stream
+                yield event
+
+
+def read_events(directory: Path, positions: dict[str, int]):
+    """Events after `positions`, all streams merged by write time (not commit order)."""
+    streams = [
+        _read_stream(stream, segments, positions.get(stream, 0))
+        for stream, segments in stream_segments(directory).items()
+    ]
+    return heapq.merge(*streams, key=lambda e: (e["ts"], e["stream"], e["seq"]))
+
+
+def _last_seq(segments: list[tuple[int, Path]]) -> int:
+    first_seq, path = segments[-1]
+    last = first_seq - 1
+    for line in path.read_bytes().splitlines():
+        try:
+            last = orjson.loads(line)["seq"]
+        except orjson.JSONDecodeError:
+            break
+    return last
+
+
+def stream_positions(directory: Path) -> dict[str, int]:
+    """Last sequence number written to each stream."""
+    return {stream: _last_seq(segments) for stream, segments in stream_segments(directory).items()}
+
+
+# -- snapshots and replay -------------------------------------------------------
+
+def snapshot_paths(directory: Path) -> list[Path]:
+    """Snapshots, oldest first."""
+    snapshots = directory / "snapshots"
+    return sorted(snapshots.glob("*.json")) if snapshots.is_dir() else []
+
+
+def write_snapshot(directory: Path, state: MarketState) -> Path:
+    snapshots = directory / "snapshots"
+    snapshots.mkdir(parents=True, exist_ok=True)
+    path = snapshots / f"{datetime.utcnow():%Y%m%dT%H%M%S%f}.json"
+    # Dot prefix keeps the partial file out of snapshot_paths until the rename
+    tmp_path = snapshots / f".{path.name}.tmp"
+    tmp_path.write_bytes(orjson.dumps(state.to_dict()))
+    os.replace(tmp_path, path)
+    return path
+
+
+def replay(directory: Path) -> tuple[MarketState, int]:
+    """State from the newest snapshot plus the tail, and how many events were applied."""
+    paths = snapshot_paths(directory)
+    state = MarketState.from_dict(orjson.loads(paths[-1].read_bytes())) if paths else MarketState()
+
+    applied = 0
+    for event in read_events(directory, state.positions):
+        state.apply(event)
+        applied += 1
+    return state, applied
+
+
+def bootstrap(directory: Path, db: Session) -> MarketState:
+    """
+    State read from the database, positioned at the journal's current end.
+
+    Events committed while this runs can be counted twice or not at all, so
+    take it when the market is quiet (or at startup, before any orders).
+    """
+    state = MarketState.from_db(db)
+    state.positions = stream_positions(directory)
+    return state
+
+
+@contextmanager
+def _snapshot_lock(directory: Path):
+    """Hold the directory's snapshot lock, or yield False if another process has it."""
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / "snapshot.lock", "w") as lock_file:
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+        yield True
+
+
+def take_snapshot(directory: Path, keep: int) -> dict | None:
+    """
+    Write a new snapshot from the newest one plus the tail, and prune.
+
+    Returns None when another process is taking one, or when there is no
+    snapshot to start from: the first one is bootstrapped by hand, with the
+    market quiet, never here (this runs while orders are being placed).
+    """
+    with _snapshot_lock(directory) as locked:
+        if not locked:
+            return None
+
+        if not snapshot_paths(directory):
+            logger.warning(
+                "No journal snapshot in %s to extend; bootstrap one before the API takes orders "
+                "(python -m app.scripts.market_journal bootstrap)", directory,
+            )
+            return None
+
+        state, applied = replay(directory)
+        path = write_snapshot(directory, state)
+        removed = prune(directory, keep)
+        return {
+            "path": path,
+            "applied": applied,
+            "orders": len(state.orders),
+            "pruned_segments": removed,
+        }
+
+
+def prune(directory: Path, keep: int) -> int:
+    """Delete all but the newest `keep` snapshots and the segments none of them need."""
+    paths = snapshot_paths(directory)
+    if len(paths) <= keep:
+        return 0
+    for path in paths[:-keep]:
+        path.unlink()
+
+    oldest = orjson.loads(paths[-keep].read_bytes())["positions"]
+    removed = 0
+    for stream, segments in stream_segments(directory).items():
+        covered = oldest.get(stream, 0)
+        # A stream's last segment may still be open for appends: never removed
+        for (_, path), (next_first, _) in zip(segments, segments[1:]):
+            if next_first - 1 > covered:
+                break
+            path.unlink()
+            removed += 1
+    return removed
+
+
+def compare_with_db(state: MarketState, db: Session) -> list[str]:
+    """Differences between replayed state and the database, one line each."""
+    actual = MarketState.from_db(db)
+    differences = []
+
+    for order_id in sorted(state.orders.keys() | actual.orders.keys()):
+        if state.orders.get(order_id) != actual.orders.get(order_id):
+            differences.append(
+                f"order {order_id}: journal {state.orders.get(order_id)}, database {actual.orders.get(order_id)}"
+            )
+    for company_id in sorted(state.cash.keys() | actual.cash.keys()):
+        if state.cash.get(company_id, 0) != actual.cash.get(company_id, 0):
+            differences.append(
+                f"company {company_id} cash: journal {state.cash.get(company_id, 0)}, "
+                f"database {actual.cash.get(company_id, 0)}"
+            )
+    for key in sorted(state.inventory.keys() | actual.inventory.keys()):
+        if state.inventory.get(key, [0, 0]) != actual.inventory.get(key, [0, 0]):
+            differences.append(
+                f"inventory company {key[0]} good {key[1]}: journal {state.inventory.get(key, [0, 0])}, "
+                f"database {actual.inventory.get(key, [0, 0])}"
+            )
+    return differences
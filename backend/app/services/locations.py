@@ -0,0 +1,52 @@
+from sqlalchemy import Select, select
+from sqlalchemy.orm import selectinload
+
+from app.models.location import Location
+from app.models.planet import Planet
+
+# Hard cap on page size for location listings
+MAX_LOCATION_PAGE_SIZE = 5000
+
+
+def location_page_query(
+    *,
+    planet_id: int | None = None,
+    system_id: int | None = None,
+    biome: str | None = None,
+    claimed: bool | None = None,
+    after_id: int | None = None,
+    limit: int = 500,
+    include_deposits: bool = True,
+) -> Select:
+    """
+    Build one keyset-paginated query for a page of locations.
+
+    Deposits are eager-loaded with a single selectin query for the whole
+    page instead of one query per location. Fetches `limit + 1` rows so
+    the caller can tell whether another page follows.
+    """
+    stmt = select(Location)
+
+    if planet_id is not None:
+        stmt = stmt.where(Location.planet_id == planet_id)
+
+    if system_id is not None:
+        stmt = stmt.join(Planet, Planet.id == Location.planet_id).where(
+            Planet.star_system_id == system_id
+        )
+
+    if biome is not None:
+        stmt = stmt.where(Location.biome == biome)
+
+    if claimed is True:
+        stmt = stmt.where(Location.claimed_by_company_id.is_not(None))
+    elif claimed is False:
+        stmt = stmt.where(Location.claimed_by_company_id.is_(None))
+
+    if after_id is not None:
+        stmt = stmt.where(Location.id > after_id)
+
+    if include_deposits:
+        stmt = stmt.options(selectinload(Location.resource_deposits))
+
+    return stmt.order_by(Location.id).limit(limit + 1)
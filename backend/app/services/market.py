@@ -1,119 +1,221 @@
-﻿from sqlalchemy.orm import Session
+﻿from sqlalchemy import Select, func, select, text
+from sqlalchemy.orm import Session
 
+from app.models.good import Good
 from app.models.market_order import MarketOrder
-from app.models.inventory import Inventory
-from app.models.company import Company
 from app.models.market_trade import MarketTrade
+from app.services import journal
+from app.services.quotes import QUOTE_BOOK
+from app.services.settlement import Settlement
 
+# First key of the two-key advisory locks serializing each good's book
+BOOK_LOCK_CLASS = 4_120_043
 
-def try_execute_order(db: Session, incoming: MarketOrder):
-    if incoming.status != "open":
-        return
+# Good.market_mode values: match on arrival, or collect for periodic call auctions
+MARKET_MODES = ("continuous", "auction")
 
-    if incoming.order_type == "buy":
-        match_buy_order(db, incoming)
-    else:
-        match_sell_order(db, incoming)
 
+# Statements below are what the order-book partial indexes are built for
+# (see MarketOrder.__table_args__ and app/scripts/explain_market_queries.py)
 
-def match_buy_order(db: Session, buy: MarketOrder):
-    sell_orders = (
-        db.query(MarketOrder)
-        .filter(
-            MarketOrder.good_id == buy.good_id,
-            MarketOrder.order_type == "sell",
+def crossing_orders_query(incoming: MarketOrder) -> Select:
+    """Resting orders on the other side that cross `incoming`, in price-time priority."""
+    if incoming.order_type == "buy":
+        return (
+            select(MarketOrder)
+            .where(
+                MarketOrder.good_id == incoming.good_id,
+                MarketOrder.order_type == "sell",
+                MarketOrder.status == "open",
+                MarketOrder.price_per_unit <= incoming.price_per_unit,
+            )
+            .order_by(
+                MarketOrder.price_per_unit.asc(),
+                MarketOrder.created_at.asc(),
+            )
+        )
+
+    return (
+        select(MarketOrder)
+        .where(
+            MarketOrder.good_id == incoming.good_id,
+            MarketOrder.order_type == "buy",
             MarketOrder.status == "open",
-            MarketOrder.price_per_unit <= buy.price_per_unit,
+            MarketOrder.price_per_unit >= incoming.price_per_unit,
         )
         .order_by(
-            MarketOrder.price_per_unit.asc(),
+            MarketOrder.price_per_unit.desc(),
             MarketOrder.created_at.asc(),
         )
-        .all()
     )
 
+
+def book_side_query(good_id: int, side: str) -> Select:
+    """Open quantity per price level on one side, best price first."""
+    price = MarketOrder.price_per_unit
+    return (
+        select(
+            price.label("price"),
+            func.sum(MarketOrder.quantity).label("quantity"),
+        )
+        .where(
+            MarketOrder.good_id == good_id,
+            MarketOrder.order_type == side,
+            MarketOrder.status == "open",
+        )
+        .group_by(price)
+        .order_by(price.desc() if side == "buy" else price.asc())
+    )
+
+
+def lock_book(db: Session, good_id: int) -> None:
+    """Serialize writers of one good's book until the transaction ends (Postgres)."""
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(
+            text("SELECT pg_advisory_xact_lock(:lock_class, :good_id)"),
+            {"lock_class": BOOK_LOCK_CLASS, "good_id": good_id},
+        )
+
+
+def is_auction_good(db: Session, good_id: int) -> bool:
+    """
+    Read from the database, not GOODS: other processes' catalogs lag a mode
+    change by up to their TTL. Called under the book lock, which the mode
+    change also takes, so the answer holds until the commit.
+    """
+    return db.scalar(select(Good.market_mode).where(Good.id == good_id)) == "auction"
+
+
+def try_execute_order(db: Session, incoming: MarketOrder, settlement: Settlement | None = None):
+    # Flushes only: the caller commits, once per order or once per batch.
+    # Cash and goods are settled at the end of this match, or by the caller
+    # that passed `settlement` (one settlement for a whole batch).
+    if incoming.status != "open":
+        return
+
+    if is_auction_good(db, incoming.good_id):
+        # Rests until the good's next call auction (app/services/auction.py)
+        QUOTE_BOOK.record_level(db, incoming, incoming.quantity)
+        return
+
+    own_settlement = settlement is None
+    if own_settlement:
+        settlement = Settlement()
+
+    if incoming.order_type == "buy":
+        match_buy_order(db, incoming, settlement)
+    else:
+        match_sell_order(db, incoming, settlement)
+
+    if own_settlement:
+        settlement.apply(db)
+
+
+def best_prices(db: Session, good_ids) -> dict[tuple[int, str], int]:
+    """Best open price per (good, side): highest bid, lowest ask."""
+    price = MarketOrder.price_per_unit
+    rows = db.execute(
+        select(MarketOrder.good_id, MarketOrder.order_type, func.max(price), func.min(price))
+        .where(MarketOrder.good_id.in_(list(good_ids)), MarketOrder.status == "open")
+        .group_by(MarketOrder.good_id, MarketOrder.order_type)
+    )
+    return {
+        (good_id, side): highest if side == "buy" else lowest
+        for good_id, side, highest, lowest in rows
+    }
+
+
+def execute_orders(db: Session, incoming: list[MarketOrder]):
+    """
+    Match a batch of new orders in submission order (no commit).
+
+    Orders arrive with status "pending" and only join the book when their
+    turn comes, so nothing matches against a later order of the batch. The
+    best prices are read once: an order that cannot cross them rests
+    without querying the book. Once an order of a good crosses, fills move
+    the best prices, and the good's remaining orders match one by one.
+    """
+    best = best_prices(db, {order.good_id for order in incoming})
+    matched_goods = set()
+    settlement = Settlement()
+
+    for order in incoming:
+        order.status = "open"
+        buy = order.order_type == "buy"
+        opposite = best.get((order.good_id, "sell" if buy else "buy"))
+        crosses = opposite is not None and (
+            order.price_per_unit >= opposite if buy else order.price_per_unit <= opposite
+        )
+
+        if crosses or order.good_id in matched_goods:
+            matched_goods.add(order.good_id)
+            try_execute_order(db, order, settlement)
+            continue
+
+        QUOTE_BOOK.record_level(db, order, order.quantity)  # rests on the book
+        own = best.get((order.good_id, order.order_type))
+        if own is None or (order.price_per_unit > own if buy else order.price_per_unit < own):
+            best[(order.good_id, order.order_type)] = order.price_per_unit
+
+    settlement.apply(db)
+
+
+def match_buy_order(db: Session, buy: MarketOrder, settlement: Settlement):
+    sell_orders = db.scalars(crossing_orders_query(buy)).all()
+
     for sell in sell_orders:
         if buy.quantity <= 0:
             break
-        execute_partial_trade(db, buyer=buy, seller=sell)
+        resting_quantity = sell.quantity
+        execute_partial_trade(db, buyer=buy, seller=sell, settlement=settlement)
+        record_resting_change(db, sell, resting_quantity)
 
     # 🔥 FINALIZE BUY ORDER
     if buy.quantity == 0:
         buy.status = "filled"
-    db.commit()
+    elif buy.status == "open":
+        QUOTE_BOOK.record_level(db, buy, buy.quantity)  # rests on the book
 
 
-def match_sell_order(db: Session, sell: MarketOrder):
-    buy_orders = (
-        db.query(MarketOrder)
-        .filter(
-            MarketOrder.good_id == sell.good_id,
-            MarketOrder.order_type == "buy",
-            MarketOrder.status == "open",
-            MarketOrder.price_per_unit >= sell.price_per_unit,
-        )
-        .order_by(
-            MarketOrder.price_per_unit.desc(),
-            MarketOrder.created_at.asc(),
-        )
-        .all()
-    )
+def match_sell_order(db: Session, sell: MarketOrder, settlement: Settlement):
+    buy_orders = db.scalars(crossing_orders_query(sell)).all()
 
     for buy in buy_orders:
         if sell.quantity <= 0:
             break
-        execute_partial_trade(db, buyer=buy, seller=sell)
+        resting_quantity = buy.quantity
+        execute_partial_trade(db, buyer=buy, seller=sell, settlement=settlement)
+        record_resting_change(db, buy, resting_quantity)
 
     # ✅ FINALIZE SELL ORDER HERE
     if sell.quantity <= 0:
         sell.status = "filled"
+    elif sell.status == "open":
+        QUOTE_BOOK.record_level(db, sell, sell.quantity)  # rests on the book
+
+
+def record_resting_change(db: Session, order: MarketOrder, quantity_before: int):
+    """Tell the quote book how much of a resting order left its price level."""
+    remaining = order.quantity if order.status == "open" else 0
+    QUOTE_BOOK.record_level(db, order, remaining - quantity_before)
 
-    db.commit()  # ✅ COMMIT ONCE
 
 # IMPORTANT:
 # - Orders represent intent
 # - Trades represent executed facts
-# - Inventory & cash must only change here
-def execute_partial_trade(db: Session, buyer: MarketOrder, seller: MarketOrder):
+# - Inventory & cash must only change here (through the settlement)
+def execute_partial_trade(db: Session, buyer: MarketOrder, seller: MarketOrder, settlement: Settlement):
     qty = min(buyer.quantity, seller.quantity)
     price = seller.price_per_unit
     total = qty * price
 
-    buyer_company = db.query(Company).get(buyer.company_id)
-    seller_company = db.query(Company).get(seller.company_id)
-
-    if buyer_company.cash < total:
+    if settlement.available_cash(db, buyer.company_id) < total:
         buyer.status = "cancelled"
+        journal.record_cancel(db, buyer, "insufficient_cash")
         return
 
-    # 💰 cash transfer
-    buyer_company.cash -= total
-    seller_company.cash += total
-
-    # 📦 INVENTORY — SELLER
-    seller_inventory = (
-        db.query(Inventory)
-        .filter(
-            Inventory.company_id == seller.company_id,
-            Inventory.good_id == seller.good_id,
-        )
-        .with_for_update()
-        .first()
-    )
-
-    seller_inventory.reserved -= qty
-    seller_inventory.quantity -= qty
-
-    # 📦 INVENTORY — BUYER
-    buyer_inventory = (
-        db.query(Inventory)
-        .filter(
-            Inventory.company_id == buyer.company_id,
-            Inventory.good_id == seller.good_id,
-        )
-        .with_for_update()
-        .first()
-    )
+    # 💰📦 cash and goods move when the settlement is applied
+    settlement.transfer(buyer.company_id, seller.company_id, seller.good_id, qty, total)
 
     trade = MarketTrade(
     good_id=seller.good_id,
@@ -124,17 +226,17 @@ def execute_partial_trade(db: Session, buyer: MarketOrder, seller: MarketOrder):
     )
 
     db.add(trade)
-
-    if not buyer_inventory:
-        buyer_inventory = Inventory(
-            company_id=buyer.company_id,
-            good_id=seller.good_id,
-            quantity=0,
-            reserved=0,
-        )
-        db.add(buyer_inventory)
-
-    buyer_inventory.quantity += qty
+    QUOTE_BOOK.record_trade(db, trade)
+    journal.record(
+        db, journal.ORDER_FILLED,
+        good_id=seller.good_id,
+        buy_order_id=buyer.id,
+        sell_order_id=seller.id,
+        buyer_company_id=buyer.company_id,
+        seller_company_id=seller.company_id,
+        quantity=qty,
+        price=price,
+    )
 
     # 📉 ORDER QUANTITIES
     buyer.quantity -= qty
@@ -144,7 +246,3 @@ def execute_partial_trade(db: Session, buyer: MarketOrder, seller: MarketOrder):
         buyer.status = "filled"
     if seller.quantity == 0:
         seller.status = "filled"
-
-    db.flush()
-
-
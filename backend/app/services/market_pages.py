@@ -0,0 +1,126 @@
+from datetime import datetime
+
+from sqlalchemy import Select, or_, select, tuple_
+
+from app.models.company import Company
+from app.models.good import Good
+from app.models.market_order import MarketOrder
+from app.models.market_trade import MarketTrade
+
+# Hard cap on page size for order and trade listings
+MAX_MARKET_PAGE_SIZE = 1000
+
+# Columns returned for each open order, in response order (MarketOrderRead)
+ORDER_COLUMNS = (
+    MarketOrder.id,
+    MarketOrder.order_type,
+    MarketOrder.quantity,
+    MarketOrder.price_per_unit,
+    MarketOrder.status,
+    MarketOrder.good_id,
+    Good.name.label("good_name"),
+    MarketOrder.company_id,
+    Company.name.label("company_name"),
+    MarketOrder.created_at,
+    MarketOrder.client_order_id,
+    MarketOrder.expires_at,
+    MarketOrder.original_quantity,
+)
+
+# Columns returned for each trade, in response order
+TRADE_COLUMNS = (
+    MarketTrade.id,
+    MarketTrade.good_id,
+    MarketTrade.buyer_company_id,
+    MarketTrade.seller_company_id,
+    MarketTrade.quantity,
+    MarketTrade.price_per_unit,
+    MarketTrade.created_at,
+)
+
+# Keyset sort keys; cursors encode these values of a page's last row
+ORDER_KEY = (MarketOrder.good_id, MarketOrder.price_per_unit, MarketOrder.created_at, MarketOrder.id)
+TRADE_KEY = (MarketTrade.created_at, MarketTrade.id)
+
+
+def order_page_query(
+    *,
+    good_id: int | None = None,
+    company_id: int | None = None,
+    side: str | None = None,
+    after: tuple[int, int, datetime, int] | None = None,
+    limit: int = 500,
+) -> Select:
+    """
+    One keyset page of open orders, ordered by (good, price, time, id).
+
+    Reads ix_market_orders_open_listing in order, so every page costs the
+    same however deep the client pages. Fetches `limit + 1` rows so the
+    caller can tell whether another page follows.
+    """
+    stmt = (
+        select(*ORDER_COLUMNS)
+        .join(Company, Company.id == MarketOrder.company_id)
+        .join(Good, Good.id == MarketOrder.good_id)
+        .where(
+            MarketOrder.status == "open",
+            MarketOrder.quantity > 0,
+        )
+    )
+
+    if good_id is not None:
+        stmt = stmt.where(MarketOrder.good_id == good_id)
+
+    if company_id is not None:
+        stmt = stmt.where(MarketOrder.company_id == company_id)
+
+    if side is not None:
+        stmt = stmt.where(MarketOrder.order_type == side)
+
+    if after is not None:
+        stmt = stmt.where(tuple_(*ORDER_KEY) > tuple_(*after))
+
+    return stmt.order_by(*ORDER_KEY).limit(limit + 1)
+
+
+def trade_page_query(
+    *,
+    good_id: int | None = None,
+    company_id: int | None = None,
+    side: str | None = None,
+    before: tuple[datetime, int] | None = None,
+    since: tuple[datetime, int] | None = None,
+    limit: int = 100,
+) -> Select:
+    """
+    One keyset page of the trade tape.
+
+    Newest first, continuing below `before`; or, with `since`, the trades
+    after that key oldest first, for incremental polling. `side` narrows
+    a company filter to the trades it bought or sold. Fetches `limit + 1`
+    rows so the caller can tell whether another page follows.
+    """
+    stmt = select(*TRADE_COLUMNS)
+
+    if good_id is not None:
+        stmt = stmt.where(MarketTrade.good_id == good_id)
+
+    if company_id is not None:
+        if side == "buy":
+            stmt = stmt.where(MarketTrade.buyer_company_id == company_id)
+        elif side == "sell":
+            stmt = stmt.where(MarketTrade.seller_company_id == company_id)
+        else:
+            stmt = stmt.where(or_(
+                MarketTrade.buyer_company_id == company_id,
+                MarketTrade.seller_company_id == company_id,
+            ))
+
+    key = tuple_(*TRADE_KEY)
+    if since is not None:
+        return stmt.where(key > tuple_(*since)).order_by(*TRADE_KEY).limit(limit + 1)
+
+    if before is not None:
+        stmt = stmt.where(key < tuple_(*before))
+
+    return stmt.order_by(*(col.desc() for col in TRADE_KEY)).limit(limit + 1)
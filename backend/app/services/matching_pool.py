@@ -0,0 +1,247 @@
+"""
+Sharded serialization of order intake.
+
+With MATCHING_WORKERS > 0 the API process starts that many worker
+processes. Goods are hashed onto them (good_id % workers): every order
+placed or cancelled for a good is queued to the worker owning it, which
+runs the same intake code as the inline path on its own database
+connection and sends the result back. Workers keep no books in memory:
+the database stays the book, and what sharding buys is a single writer
+per good per API process. Requests for a busy good wait in its worker's
+queue instead of each holding a connection while blocked on the book
+lock, and goods owned by different workers match on separate cores.
+Within a worker a good's orders are applied one at a time, in arrival
+order.
+
+Each job costs a process hop and pickling on top of the inline path. On
+one core it measured no faster than inline intake (python -m
+app.scripts.bench_matching_pool); measure on the target hardware before
+enabling it.
+
+API processes each run their own pool, so on Postgres the intake code
+also takes a per-good transaction-level advisory lock: a book has a
+single writer across the whole deployment, not just within one process.
+Transaction retry counts are shipped back with each result, like quotes.
+
+Batch entry and mass cancels span goods, so they run in the API process;
+they take the same per-good locks, in good id order.
+
+A worker that dies fails the jobs it still owed at once and is restarted
+by the next submit for its goods. Jobs carry their submitter's deadline,
+and a worker drops jobs that were still queued when it passed, so a
+request that timed out is not placed afterwards. A job already running
+when the deadline passed may still commit, so timeouts (and jobs lost
+with a dead worker) answer with a status the client should retry under
+the same client_order_id.
+
+With MATCHING_WORKERS = 0 (the default) orders are matched inline in the
+request thread, as before.
+"""
+import itertools
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from multiprocessing.connection import Connection
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+# Spawned workers import only this module's chain; app.models registers every mapper
+import app.models  # noqa: F401
+from app.config import settings
+from app.db import SessionLocal
+from app.services.orders import cancel_order, get_order, place_order
+from app.services.quotes import QUOTE_BOOK
+from app.services.transactions import TRANSACTION_METRICS
+
+logger = logging.getLogger("app.matching")
+
+# Timeouts and lost jobs: the order may or may not have been placed
+RETRY_DETAIL = "Matching did not answer in time; retry with the same client_order_id"
+
+
+def _cancel(db: Session, order_id: int, company_id: int) -> dict:
+    return cancel_order(db, get_order(db, order_id), company_id)
+
+
+# Work a matching worker accepts, by job kind
+HANDLERS = {
+    "place": place_order,
+    "cancel": _cancel,
+}
+
+
+def _worker_main(shard: int, jobs: multiprocessing.Queue, results: Connection) -> None:
+    """Worker process loop: run jobs for the goods of `shard` until sent None."""
+    # Quote changes committed here are shipped back with each result, so the
+    # API process's quote book stays current
+    committed_quotes: list[tuple] = []
+    QUOTE_BOOK.subscribers.append(committed_quotes.extend)
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+
+        job_id, kind, good_id, args, deadline = job
+        # time.monotonic is system-wide, so the submitter's deadline holds here
+        if time.monotonic() > deadline:
+            results.send((job_id, (504, "Matching timed out"), None, [], {}))
+            continue
+
+        committed_quotes.clear()
+        error = result = None
+        try:
+            with SessionLocal() as db:
+                result = HANDLERS[kind](db, *args)
+        except HTTPException as exc:
+            error = (exc.status_code, exc.detail)
+        except Exception:
+            logger.exception("Matching worker %d failed on %s for good %d", shard, kind, good_id)
+            error = (500, "Matching failed")
+        results.send((job_id, error, result, list(committed_quotes), TRANSACTION_METRICS.take()))
+
+
+class Worker:
+    """One worker process, its job queue and the thread reading its results."""
+
+    def __init__(self, process: multiprocessing.Process, jobs: multiprocessing.Queue, reader: threading.Thread):
+        self.process = process
+        self.jobs = jobs
+        self.reader = reader
+
+
+class MatchingPool:
+    """Worker processes owning the goods' intake, and the routing to them."""
+
+    def __init__(self):
+        self.workers = 0
+        self._context = None
+        self._shards: list[Worker] = []
+        # job id -> (future, process it was sent to)
+        self._pending: dict[int, tuple[Future, multiprocessing.Process]] = {}
+        self._job_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self.workers > 0
+
+    def start(self, workers: int) -> None:
+        if self.running or workers <= 0:
+            return
+
+        # spawn: workers get fresh engines and no copies of the API's threads
+        self._context = multiprocessing.get_context("spawn")
+        self._shards = [self._spawn(shard) for shard in range(workers)]
+        self.workers = workers
+        logger.info("Started %d matching workers", workers)
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+
+        self.workers = 0
+        for worker in self._shards:
+            worker.jobs.put(None)
+        for worker in self._shards:
+            worker.process.join(timeout=10)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            worker.reader.join(timeout=10)
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future, _ in pending.values():
+            future.set_exception(HTTPException(status_code=503, detail="Matching is shutting down"))
+
+        self._shards = []
+
+    def _spawn(self, shard: int) -> Worker:
+        # Results come back on a pipe of the worker's own: a worker killed
+        # mid-write cannot leave a lock held that the other workers need,
+        # and its death closes the pipe
+        reader, writer = self._context.Pipe(duplex=False)
+        jobs = self._context.Queue()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(shard, jobs, writer),
+            name=f"matching-{shard}",
+            daemon=True,
+        )
+        process.start()
+        writer.close()
+
+        thread = threading.Thread(
+            target=self._read_results, args=(process, reader), name=f"matching-results-{shard}", daemon=True,
+        )
+        thread.start()
+        return Worker(process, jobs, thread)
+
+    def shard(self, good_id: int) -> int:
+        return good_id % self.workers
+
+    def _worker(self, shard: int) -> Worker:
+        """The shard's worker, restarted first if its process died."""
+        with self._lock:
+            worker = self._shards[shard]
+            if worker.process.is_alive():
+                return worker
+            logger.error("Matching worker %d exited with code %s, restarting it", shard, worker.process.exitcode)
+            # The dead process may hold its job queue's lock: the new one gets a fresh queue
+            worker = self._shards[shard] = self._spawn(shard)
+            return worker
+
+    def submit(self, good_id: int, kind: str, *args):
+        """Run a job on the worker owning `good_id` and wait for its result."""
+        worker = self._worker(self.shard(good_id))
+        future = Future()
+        job_id = next(self._job_ids)
+        with self._lock:
+            self._pending[job_id] = (future, worker.process)
+
+        deadline = time.monotonic() + settings.MATCHING_TIMEOUT_SECONDS
+        worker.jobs.put((job_id, kind, good_id, args, deadline))
+        try:
+            return future.result(timeout=settings.MATCHING_TIMEOUT_SECONDS)
+        except FutureTimeoutError:
+            # Dropped by the worker if still queued; a job already running may commit
+            with self._lock:
+                self._pending.pop(job_id, None)
+            raise HTTPException(status_code=504, detail=RETRY_DETAIL)
+
+    def _read_results(self, process: multiprocessing.Process, reader: Connection) -> None:
+        """Hand one worker's results to the waiting request threads until the worker exits."""
+        while True:
+            try:
+                job_id, error, result, quote_updates, transactions = reader.recv()
+            except (EOFError, OSError):
+                break
+            if quote_updates:
+                QUOTE_BOOK.apply(quote_updates)
+            if transactions:
+                TRANSACTION_METRICS.merge(transactions)
+
+            with self._lock:
+                future, _ = self._pending.pop(job_id, (None, None))
+            if future is None:
+                continue
+            if error is not None:
+                status_code, detail = error
+                future.set_exception(HTTPException(status_code=status_code, detail=detail))
+            else:
+                future.set_result(result)
+        reader.close()
+
+        # The worker is gone: fail what it still owed instead of letting it time out
+        with self._lock:
+            lost = [job_id for job_id, (_, owner) in self._pending.items() if owner is process]
+            futures = [self._pending.pop(job_id)[0] for job_id in lost]
+        for future in futures:
+            # It may have committed some of them before exiting
+            future.set_exception(HTTPException(status_code=503, detail=RETRY_DETAIL))
+
+
+MATCHING_POOL = MatchingPool()
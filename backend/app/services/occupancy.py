@@ -0,0 +1,146 @@
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.building import Building
+from app.models.building_blueprint import BuildingBlueprint
+
+
+def rotated_footprint(width: int, height: int, rotation: int) -> tuple[int, int]:
+    """Footprint size on the grid, swapping dimensions for 90/270 rotations."""
+    if rotation in (90, 270):
+        return height, width
+    return width, height
+
+
+class OccupancyGrid:
+    """
+    Bitset of occupied tiles for one location.
+
+    Each grid row is a Python int used as a bitmask (bit x = tile x), so
+    checking or marking a footprint touches only the footprint's rows.
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.rows = [0] * height
+        # (building count, max building id) the grid was built from
+        self.stamp: tuple[int, int] = (0, 0)
+
+    def _mask(self, x: int, w: int) -> int:
+        return ((1 << w) - 1) << x
+
+    def is_free(self, x: int, y: int, w: int, h: int) -> bool:
+        mask = self._mask(x, w)
+        return not any(self.rows[row] & mask for row in range(y, y + h))
+
+    def mark(self, x: int, y: int, w: int, h: int) -> None:
+        mask = self._mask(x, w)
+        for row in range(max(y, 0), min(y + h, self.height)):
+            self.rows[row] |= mask
+
+    def clear(self, x: int, y: int, w: int, h: int) -> None:
+        mask = ~self._mask(x, w)
+        for row in range(max(y, 0), min(y + h, self.height)):
+            self.rows[row] &= mask
+
+    def copy(self) -> "OccupancyGrid":
+        grid = OccupancyGrid(self.width, self.height)
+        grid.rows = list(self.rows)
+        grid.stamp = self.stamp
+        return grid
+
+
+class OccupancyCache:
+    """
+    Per-location occupancy grids, rebuilt lazily from the database.
+
+    Every lookup runs one aggregate query to compare the cached stamp with
+    the location's current building count and max id; a mismatch (e.g. a
+    placement handled by another worker) triggers a single-query rebuild.
+    """
+
+    def __init__(self, max_locations: int = 1024):
+        self.max_locations = max_locations
+        self._grids: OrderedDict[int, OccupancyGrid] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _stamp(self, db: Session, location_id: int) -> tuple[int, int]:
+        count, max_id = db.execute(
+            select(func.count(Building.id), func.max(Building.id))
+            .where(Building.location_id == location_id)
+        ).one()
+        return count, max_id or 0
+
+    def _rebuild(self, db: Session, location, stamp: tuple[int, int]) -> OccupancyGrid:
+        grid = OccupancyGrid(location.grid_width, location.grid_height)
+
+        rows = db.execute(
+            select(
+                Building.grid_x,
+                Building.grid_y,
+                Building.rotation,
+                BuildingBlueprint.grid_width,
+                BuildingBlueprint.grid_height,
+            )
+            .join(BuildingBlueprint, BuildingBlueprint.id == Building.blueprint_id)
+            .where(Building.location_id == location.id)
+        ).all()
+
+        for x, y, rotation, width, height in rows:
+            grid.mark(x, y, *rotated_footprint(width, height, rotation))
+
+        grid.stamp = stamp
+        return grid
+
+    def get(self, db: Session, location) -> OccupancyGrid:
+        stamp = self._stamp(db, location.id)
+
+        with self._lock:
+            grid = self._grids.get(location.id)
+            if grid is not None and grid.stamp == stamp and grid.width == location.grid_width:
+                self._grids.move_to_end(location.id)
+                return grid
+
+        grid = self._rebuild(db, location, stamp)
+
+        with self._lock:
+            self._grids[location.id] = grid
+            while len(self._grids) > self.max_locations:
+                self._grids.popitem(last=False)
+
+        return grid
+
+    def placed(self, location_id: int, building: Building, width: int, height: int) -> None:
+        """Record a committed placement so the next lookup needs no rebuild."""
+        with self._lock:
+            grid = self._grids.get(location_id)
+            if grid is None:
+                return
+            count, max_id = grid.stamp
+            grid.mark(building.grid_x, building.grid_y, width, height)
+            grid.stamp = (count + 1, max(max_id, building.id))
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._grids.clear()
+
+    def demolished(self, location_id: int, building_id: int, x: int, y: int, width: int, height: int) -> None:
+        """Free a committed demolition's tiles; drop the grid if its max id went away."""
+        with self._lock:
+            grid = self._grids.get(location_id)
+            if grid is None:
+                return
+            count, max_id = grid.stamp
+            if building_id == max_id:
+                # The new max id is unknown here; rebuild on next lookup
+                del self._grids[location_id]
+                return
+            grid.clear(x, y, width, height)
+            grid.stamp = (count - 1, max_id)
+
+
+OCCUPANCY_CACHE = OccupancyCache()
@@ -0,0 +1,433 @@
+import threading
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.inventory import Inventory
+from app.models.market_order import MarketOrder
+from app.services import journal
+from app.services.market import execute_orders, lock_book, try_execute_order
+from app.services.quotes import QUOTE_BOOK
+from app.services.transactions import RetryableConflict, lock_inventories, lock_rows, transactional
+
+# Order intake and cancellation. Run in the request thread, or in the
+# matching worker that owns the good (app/services/matching_pool.py);
+# either way each call is one unit of work on its own session, taking the
+# book lock first and retried whole on deadlocks (app/services/transactions.py).
+
+
+def order_read(order: MarketOrder) -> dict:
+    """MarketOrderRead for an order, as plain values (crosses process boundaries)."""
+    return {
+        "id": order.id,
+        "order_type": order.order_type,
+        "quantity": order.quantity,
+        "price_per_unit": order.price_per_unit,
+        "status": order.status,
+        "good_id": order.good_id,
+        "good_name": order.good.name,
+        "company_id": order.company_id,
+        "company_name": order.company.name,
+        "client_order_id": order.client_order_id,
+        "expires_at": order.expires_at,
+        "original_quantity": order.original_quantity,
+    }
+
+
+class RecentOrders:
+    """
+    Bounded LRU of placed orders' results by (company_id, client_order_id).
+
+    A retried submission is answered from here without touching the
+    database. Retries it misses (evicted, or placed through another
+    process) fall back to the unique index on market_orders.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._results: OrderedDict[tuple[int, str], dict] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, company_id: int, client_order_id: str | None) -> dict | None:
+        if client_order_id is None:
+            return None
+        with self._lock:
+            result = self._results.get((company_id, client_order_id))
+            if result is not None:
+                self._results.move_to_end((company_id, client_order_id))
+            return result
+
+    def put(self, result: dict) -> None:
+        if result.get("client_order_id") is None:
+            return
+        with self._lock:
+            self._results[(result["company_id"], result["client_order_id"])] = result
+            self._results.move_to_end((result["company_id"], result["client_order_id"]))
+            while len(self._results) > self.max_size:
+                self._results.popitem(last=False)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._results.clear()
+
+
+RECENT_ORDERS = RecentOrders(settings.ORDER_DEDUP_CACHE_SIZE)
+
+
+def replayed_order(result: dict, payload: dict) -> dict:
+    """The original result for a retried submission; 409 if the ID named a different order."""
+    if (
+        any(result[key] != payload[key] for key in ("good_id", "order_type", "price_per_unit"))
+        # The quantity as submitted: fills since only reduce the remaining quantity
+        or result["original_quantity"] not in (None, payload["quantity"])
+        or result["expires_at"] != payload.get("expires_at")
+    ):
+        raise HTTPException(status_code=409, detail="client_order_id already used for a different order")
+    return result
+
+
+def _placed_order(db: Session, company_id: int, payload: dict) -> dict | None:
+    """Result for the order already placed under the payload's client order ID, if any."""
+    order = db.scalars(
+        select(MarketOrder).where(
+            MarketOrder.company_id == company_id,
+            MarketOrder.client_order_id == payload["client_order_id"],
+        )
+    ).first()
+    if order is None:
+        return None
+
+    result = order_read(order)
+    RECENT_ORDERS.put(result)
+    return replayed_order(result, payload)
+
+
+def _check_expiry(payloads: list[dict]) -> None:
+    now = datetime.utcnow()
+    if any(payload.get("expires_at") is not None and payload["expires_at"] <= now for payload in payloads):
+        raise HTTPException(status_code=400, detail="expires_at is in the past")
+
+
+@transactional
+def place_order(db: Session, company_id: int, payload: dict) -> dict:
+    if payload.get("client_order_id") is not None:
+        previous = RECENT_ORDERS.get(company_id, payload["client_order_id"])
+        if previous is not None:
+            return replayed_order(previous, payload)
+        previous = _placed_order(db, company_id, payload)
+        if previous is not None:
+            return previous
+
+    if payload["order_type"] not in ("buy", "sell"):
+        raise HTTPException(status_code=400, detail="Invalid order type")
+    _check_expiry([payload])
+
+    lock_book(db, payload["good_id"])
+
+    # 🔒 SELL → reserve inventory
+    if payload["order_type"] == "sell":
+        inventory = lock_inventories(db, [(company_id, payload["good_id"])]).get((company_id, payload["good_id"]))
+
+        if not inventory:
+            raise HTTPException(status_code=400, detail="No inventory")
+
+        free_qty = inventory.quantity - inventory.reserved
+        if free_qty < payload["quantity"]:
+            raise HTTPException(status_code=400, detail="Not enough free inventory")
+
+        inventory.reserved += payload["quantity"]
+
+    order = MarketOrder(
+        company_id=company_id,
+        original_quantity=payload["quantity"],
+        **payload,
+    )
+
+    db.add(order)
+    try:
+        db.flush()  # 🔑 REQUIRED so order.id exists but no commit yet
+    except IntegrityError:
+        # A concurrent retry with the same client order ID got in first
+        db.rollback()
+        if payload.get("client_order_id") is None:
+            raise
+        previous = _placed_order(db, company_id, payload)
+        if previous is None:
+            raise
+        return previous
+
+    journal.record(
+        db, journal.ORDER_ACCEPTED,
+        order_id=order.id,
+        company_id=company_id,
+        good_id=order.good_id,
+        side=order.order_type,
+        price=order.price_per_unit,
+        quantity=order.quantity,
+    )
+
+    # ⚙️ match + execute (NO commit inside!)
+    try_execute_order(db, order)
+
+    db.commit()
+    db.refresh(order)
+
+    result = order_read(order)
+    RECENT_ORDERS.put(result)
+    return result
+
+
+@transactional
+def cancel_order(db: Session, order: MarketOrder, company_id: int) -> dict:
+    if order.company_id != company_id:
+        raise HTTPException(status_code=403, detail="Not your order")
+
+    # Status as of the lock: a match may have filled it since it was loaded
+    lock_book(db, order.good_id)
+    lock_rows(db, {MarketOrder: [order.id]})
+
+    if order.status != "open":
+        raise HTTPException(status_code=400, detail="Order not open")
+
+    # 🔓 release reserved inventory
+    if order.order_type == "sell":
+        inventory = lock_inventories(db, [(order.company_id, order.good_id)]).get((order.company_id, order.good_id))
+
+        if not inventory:
+            raise HTTPException(status_code=500, detail="Inventory missing")
+
+        inventory.reserved -= order.quantity
+        if inventory.reserved < 0:
+            inventory.reserved = 0
+
+    order_id = order.id  # expired by the commit
+    order.status = "cancelled"
+    QUOTE_BOOK.record_level(db, order, -order.quantity)
+    journal.record_cancel(db, order, "user")
+    db.commit()
+
+    return {"status": "cancelled", "order_id": order_id}
+
+
+def _lock_books(db: Session, good_ids) -> None:
+    # Ascending, so requests spanning several goods never lock in opposite orders
+    for good_id in sorted(set(good_ids)):
+        lock_book(db, good_id)
+
+
+def _locked_inventories(db: Session, company_id: int, good_ids) -> dict[int, Inventory]:
+    locked = lock_inventories(db, [(company_id, good_id) for good_id in good_ids])
+    return {good_id: inventory for (_, good_id), inventory in locked.items()}
+
+
+def _cancel(db: Session, orders: list[MarketOrder], reason: str) -> None:
+    """Cancel locked open orders and release their reservations, one row per company and good (no commit)."""
+    released: dict[tuple[int, int], int] = defaultdict(int)
+    for order in orders:
+        if order.order_type == "sell":
+            released[(order.company_id, order.good_id)] += order.quantity
+        order.status = "cancelled"
+        QUOTE_BOOK.record_level(db, order, -order.quantity)
+        journal.record_cancel(db, order, reason)
+
+    # 🔓 release reserved inventory
+    if released:
+        inventories = lock_inventories(db, released)
+        for key, quantity in released.items():
+            inventory = inventories.get(key)
+            if inventory is None:
+                raise HTTPException(status_code=500, detail="Inventory missing")
+            inventory.reserved = max(inventory.reserved - quantity, 0)
+
+
+def _cancel_open_orders(db: Session, company_id: int, good_ids=None, side: str | None = None) -> list[int]:
+    """Cancel a company's open orders and release their reservations (no commit)."""
+    query = select(MarketOrder).where(MarketOrder.company_id == company_id, MarketOrder.status == "open")
+    if good_ids is not None:
+        query = query.where(MarketOrder.good_id.in_(list(good_ids)))
+    if side is not None:
+        query = query.where(MarketOrder.order_type == side)
+    cancelled = db.scalars(query.order_by(MarketOrder.id).with_for_update()).all()
+
+    _cancel(db, cancelled, "user")
+    return [order.id for order in cancelled]
+
+
+@transactional
+def cancel_orders(db: Session, company_id: int, good_id: int | None = None, side: str | None = None) -> dict:
+    """Cancel every open order of a company, optionally only one good and/or side."""
+    if side is not None and side not in ("buy", "sell"):
+        raise HTTPException(status_code=400, detail="Invalid order type")
+
+    if good_id is not None:
+        _lock_books(db, [good_id])
+        order_ids = _cancel_open_orders(db, company_id, [good_id], side)
+    else:
+        goods = db.scalars(
+            select(MarketOrder.good_id)
+            .where(MarketOrder.company_id == company_id, MarketOrder.status == "open")
+            .distinct()
+        ).all()
+        _lock_books(db, goods)
+        order_ids = _cancel_open_orders(db, company_id, None, side)
+
+    db.commit()
+    return {"status": "cancelled", "order_ids": order_ids}
+
+
+def _placed_orders(db: Session, company_id: int, client_order_ids: list[str]) -> dict[str, dict]:
+    """Results of orders already placed under any of `client_order_ids`, cache first."""
+    previous = {}
+    for client_order_id in client_order_ids:
+        result = RECENT_ORDERS.get(company_id, client_order_id)
+        if result is not None:
+            previous[client_order_id] = result
+
+    missing = [client_order_id for client_order_id in client_order_ids if client_order_id not in previous]
+    if missing:
+        for order in db.scalars(
+            select(MarketOrder).where(
+                MarketOrder.company_id == company_id,
+                MarketOrder.client_order_id.in_(missing),
+            )
+        ):
+            result = previous[order.client_order_id] = order_read(order)
+            RECENT_ORDERS.put(result)
+    return previous
+
+
+@transactional
+def place_orders(db: Session, company_id: int, payloads: list[dict], replace: bool = False) -> dict:
+    """
+    Place many orders for one company in a single transaction.
+
+    With `replace` the company's open orders in the batch's goods are
+    cancelled first. Sell reservations are checked and taken once per good
+    for the whole batch, the orders then match in submission order, and
+    everything commits together. Orders whose client order ID was already
+    placed are answered with the original result, as in place_order.
+    """
+    if any(payload["order_type"] not in ("buy", "sell") for payload in payloads):
+        raise HTTPException(status_code=400, detail="Invalid order type")
+    _check_expiry(payloads)
+
+    client_order_ids = [p["client_order_id"] for p in payloads if p.get("client_order_id") is not None]
+    if len(set(client_order_ids)) != len(client_order_ids):
+        raise HTTPException(status_code=400, detail="Duplicate client_order_id in batch")
+
+    results: list[dict | None] = [None] * len(payloads)
+    if client_order_ids:
+        previous = _placed_orders(db, company_id, client_order_ids)
+        for index, payload in enumerate(payloads):
+            if payload.get("client_order_id") in previous:
+                results[index] = replayed_order(previous[payload["client_order_id"]], payload)
+
+    new = [(index, payload) for index, payload in enumerate(payloads) if results[index] is None]
+    good_ids = sorted({payload["good_id"] for _, payload in new})
+    _lock_books(db, good_ids)
+
+    cancelled = _cancel_open_orders(db, company_id, good_ids) if replace and good_ids else []
+
+    # 🔒 SELL → reserve inventory, summed per good
+    needed: dict[int, int] = defaultdict(int)
+    for _, payload in new:
+        if payload["order_type"] == "sell":
+            needed[payload["good_id"]] += payload["quantity"]
+
+    if needed:
+        inventories = _locked_inventories(db, company_id, needed)
+        for good_id, quantity in needed.items():
+            inventory = inventories.get(good_id)
+            if not inventory:
+                raise HTTPException(status_code=400, detail=f"No inventory of good {good_id}")
+            if inventory.quantity - inventory.reserved < quantity:
+                raise HTTPException(status_code=400, detail=f"Not enough free inventory of good {good_id}")
+            inventory.reserved += quantity
+
+    # Pending until execute_orders reaches them, so earlier orders can't match them
+    placed = [
+        MarketOrder(company_id=company_id, status="pending", original_quantity=payload["quantity"], **payload)
+        for _, payload in new
+    ]
+    db.add_all(placed)
+    try:
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        if not client_order_ids:
+            raise
+        # Another request placed one of the client order IDs meanwhile; the retry replays it
+        raise RetryableConflict("client_order_id placed concurrently, retry the batch")
+
+    for order in placed:
+        journal.record(
+            db, journal.ORDER_ACCEPTED,
+            order_id=order.id,
+            company_id=company_id,
+            good_id=order.good_id,
+            side=order.order_type,
+            price=order.price_per_unit,
+            quantity=order.quantity,
+        )
+
+    # ⚙️ match in submission order (NO commit inside!)
+    if placed:
+        execute_orders(db, placed)
+
+    # Read before the commit expires them; matching has already set the final state
+    for (index, _), order in zip(new, placed):
+        results[index] = order_read(order)
+
+    db.commit()
+
+    for result in results:
+        RECENT_ORDERS.put(result)
+    return {"orders": results, "cancelled": cancelled}
+
+
+@transactional
+def expire_orders(db: Session, limit: int) -> list[int]:
+    """
+    Cancel up to `limit` good-till-time orders past their expiry, and commit.
+
+    The due orders are read off the front of the expiry index; their books
+    are locked in good id order, then the orders themselves, re-checked
+    under the locks (a match or another sweeper may have got there first).
+    Returns the cancelled ids; a full batch means more may be due.
+    """
+    now = datetime.utcnow()
+    due = db.execute(
+        select(MarketOrder.id, MarketOrder.good_id)
+        .where(
+            MarketOrder.status == "open",
+            MarketOrder.expires_at.is_not(None),
+            MarketOrder.expires_at <= now,
+        )
+        .order_by(MarketOrder.expires_at)
+        .limit(limit)
+    ).all()
+    if not due:
+        return []
+
+    _lock_books(db, [good_id for _, good_id in due])
+    locked = lock_rows(db, {MarketOrder: [order_id for order_id, _ in due]})[MarketOrder]
+    expired = [order for order in locked.values() if order.status == "open"]
+
+    _cancel(db, expired, "expired")
+    order_ids = [order.id for order in expired]  # expired by the commit
+    db.commit()
+    return order_ids
+
+
+def get_order(db: Session, order_id: int) -> MarketOrder:
+    order = db.query(MarketOrder).get(order_id)
+
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+
+    return order
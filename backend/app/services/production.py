@@ -4,33 +4,36 @@ from sqlalchemy.orm import Session
 
 from app.models.inventory import Inventory
 from app.models.production_job import ProductionJob
+from app.services.transactions import lock_inventories, transactional
 
 
+@transactional
 def complete_finished_jobs(db: Session):
     now = datetime.utcnow()
 
+    # Claimed under row locks so concurrent callers never complete a job
+    # twice; jobs another caller is completing are skipped, not waited for
     jobs = (
         db.query(ProductionJob)
         .filter(
             ProductionJob.status == "running",
             ProductionJob.finishes_at <= now,
         )
+        .order_by(ProductionJob.id)
+        .with_for_update(skip_locked=True)
         .all()
     )
 
+    # Every output row locked up front, in id order
+    inventories = lock_inventories(db, {(job.company_id, job.output_good_id) for job in jobs})
+
     for job in jobs:
         # add output
-        inventory = (
-            db.query(Inventory)
-            .filter(
-                Inventory.company_id == job.company_id,
-                Inventory.good_id == job.output_good_id,
-            )
-            .first()
-        )
+        key = (job.company_id, job.output_good_id)
+        inventory = inventories.get(key)
 
         if not inventory:
-            inventory = Inventory(
+            inventory = inventories[key] = Inventory(
                 company_id=job.company_id,
                 good_id=job.output_good_id,
                 quantity=0,
@@ -0,0 +1,235 @@
+import threading
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.good import Good
+from app.models.market_order import MarketOrder
+from app.models.market_trade import MarketTrade
+
+# Session.info key holding quote changes not yet committed
+PENDING_KEY = "pending_quote_updates"
+
+VOLUME_WINDOW = timedelta(hours=24)
+
+# A load that raced a commit is served, but reloaded after this long
+RACED_LOAD_SECONDS = 1.0
+
+
+def last_prices_query():
+    """
+    Last trade price of every good (NULL without trades).
+
+    One backward probe of ix_market_trades_good_created per good, instead of
+    ranking every trade; a correlated LIMIT 1 rather than LATERAL or
+    DISTINCT ON so SQLite runs it too.
+    """
+    last_price = (
+        select(MarketTrade.price_per_unit)
+        .where(MarketTrade.good_id == Good.id)
+        .order_by(MarketTrade.created_at.desc(), MarketTrade.id.desc())
+        .limit(1)
+        .correlate(Good)
+        .scalar_subquery()
+    )
+    return select(Good.id, last_price)
+
+
+class GoodQuote:
+    """Open quantity per price level on each side, plus last trade and volume."""
+
+    __slots__ = ("bids", "asks", "best_bid", "best_ask", "last_price", "volume_24h")
+
+    def __init__(self):
+        self.bids: dict[int, int] = {}
+        self.asks: dict[int, int] = {}
+        self.best_bid: int | None = None
+        self.best_ask: int | None = None
+        self.last_price: int | None = None
+        self.volume_24h = 0
+
+    def change_level(self, side: str, price: int, delta: int) -> None:
+        levels = self.bids if side == "buy" else self.asks
+        quantity = levels.get(price, 0) + delta
+
+        if quantity > 0:
+            levels[price] = quantity
+        else:
+            levels.pop(price, None)
+
+        # Rescan the levels only when the best one emptied
+        if side == "buy":
+            if quantity > 0 and (self.best_bid is None or price > self.best_bid):
+                self.best_bid = price
+            elif quantity <= 0 and price == self.best_bid:
+                self.best_bid = max(self.bids) if self.bids else None
+        else:
+            if quantity > 0 and (self.best_ask is None or price < self.best_ask):
+                self.best_ask = price
+            elif quantity <= 0 and price == self.best_ask:
+                self.best_ask = min(self.asks) if self.asks else None
+
+    def as_dict(self, good_id: int) -> dict:
+        spread = (
+            self.best_ask - self.best_bid
+            if self.best_bid is not None and self.best_ask is not None
+            else None
+        )
+        return {
+            "good_id": good_id,
+            "last_price": self.last_price,
+            "best_bid": self.best_bid,
+            "best_ask": self.best_ask,
+            "spread": spread,
+            "volume_24h": self.volume_24h,
+        }
+
+
+class QuoteBook:
+    """
+    Resident best bid / best ask / last price / 24h volume for every good.
+
+    The matching path records level and trade changes on its session;
+    they are applied here only once that session commits (and dropped on
+    rollback). A full reload every `ttl_seconds` picks up writes from other
+    processes and lets old trades fall out of the 24h volume.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self._quotes: dict[int, GoodQuote] | None = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        # Held by the one reader reloading stale quotes; the others serve the old ones
+        self._reload_lock = threading.Lock()
+        # Called with every batch of committed updates (matching workers forward them)
+        self.subscribers: list[Callable[[list[tuple]], None]] = []
+
+    # -- recording (matching path, inside the transaction) -------------------
+
+    def record_level(self, db: Session, order: MarketOrder, delta: int) -> None:
+        """Open quantity of `order`'s price level changed by `delta`."""
+        if delta:
+            db.info.setdefault(PENDING_KEY, []).append(
+                ("level", order.good_id, order.order_type, order.price_per_unit, delta)
+            )
+
+    def record_trade(self, db: Session, trade: MarketTrade) -> None:
+        db.info.setdefault(PENDING_KEY, []).append(
+            ("trade", trade.good_id, None, trade.price_per_unit, trade.quantity)
+        )
+
+    def apply(self, updates: list[tuple]) -> None:
+        for subscriber in self.subscribers:
+            subscriber(updates)
+
+        with self._lock:
+            self.version += 1
+            if self._quotes is None:
+                return  # next read loads everything from the database
+
+            for kind, good_id, side, price, quantity in updates:
+                quote = self._quotes.get(good_id)
+                if quote is None:
+                    quote = self._quotes[good_id] = GoodQuote()
+
+                if kind == "level":
+                    quote.change_level(side, price, quantity)
+                else:
+                    quote.last_price = price
+                    quote.volume_24h += quantity
+
+    # -- reading -------------------------------------------------------------
+
+    def _fresh(self) -> bool:
+        return (
+            self._quotes is not None
+            and time.monotonic() - self._loaded_at < self.ttl_seconds
+        )
+
+    async def _load(self, db: AsyncSession) -> None:
+        with self._lock:
+            version = self.version
+
+        quotes: dict[int, GoodQuote] = {}
+
+        def quote(good_id: int) -> GoodQuote:
+            if good_id not in quotes:
+                quotes[good_id] = GoodQuote()
+            return quotes[good_id]
+
+        levels = await db.execute(
+            select(
+                MarketOrder.good_id,
+                MarketOrder.order_type,
+                MarketOrder.price_per_unit,
+                func.sum(MarketOrder.quantity),
+            )
+            .where(MarketOrder.status == "open", MarketOrder.quantity > 0)
+            .group_by(MarketOrder.good_id, MarketOrder.order_type, MarketOrder.price_per_unit)
+        )
+        for good_id, side, price, quantity in levels:
+            quote(good_id).change_level(side, price, quantity)
+
+        for good_id, price in await db.execute(last_prices_query()):
+            if price is not None:
+                quote(good_id).last_price = price
+
+        volumes = await db.execute(
+            select(MarketTrade.good_id, func.sum(MarketTrade.quantity))
+            .where(MarketTrade.created_at >= datetime.utcnow() - VOLUME_WINDOW)
+            .group_by(MarketTrade.good_id)
+        )
+        for good_id, volume in volumes:
+            quote(good_id).volume_24h = volume
+
+        with self._lock:
+            self._quotes = quotes
+            self._loaded_at = time.monotonic()
+            if version != self.version:
+                # A commit landed mid-load and may be missing: serve this, reload soon
+                self._loaded_at -= max(self.ttl_seconds - RACED_LOAD_SECONDS, 0.0)
+
+    async def quotes(self, db: AsyncSession, good_ids: list[int] | None = None) -> list[dict]:
+        """Quotes for `good_ids` (every good with activity if None), in request order."""
+        if self._quotes is None:
+            await self._load(db)
+        elif not self._fresh() and self._reload_lock.acquire(blocking=False):
+            try:
+                if not self._fresh():
+                    await self._load(db)
+            finally:
+                self._reload_lock.release()
+
+        with self._lock:
+            quotes = self._quotes or {}
+            if good_ids is None:
+                good_ids = sorted(quotes)
+            return [quotes.get(good_id, GoodQuote()).as_dict(good_id) for good_id in good_ids]
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.version += 1
+            self._quotes = None
+
+
+QUOTE_BOOK = QuoteBook(settings.QUOTE_CACHE_TTL_SECONDS)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending_quotes(session: Session) -> None:
+    updates = session.info.pop(PENDING_KEY, None)
+    if updates:
+        QUOTE_BOOK.apply(updates)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_quotes(session: Session, previous_transaction) -> None:
+    if previous_transaction.parent is None:
+        session.info.pop(PENDING_KEY, None)
@@ -0,0 +1,90 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.building_blueprint import BuildingBlueprint
+from app.models.good import Good
+from app.models.production_recipe import ProductionRecipe
+
+
+class ReferenceCatalog:
+    """
+    Versioned read-through cache for a small, rarely changing table.
+
+    Rows are held as read-only snapshots (plain attribute bags, not ORM
+    instances) so they can be shared across sessions and threads. Writers
+    call invalidate() after committing; the TTL bounds staleness for writes
+    made by other processes (seed scripts, other workers).
+    """
+
+    def __init__(self, model, ttl_seconds: float):
+        self.model = model
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self._columns: list[str] | None = None
+        # (rows, rows by id, loaded at), swapped as a whole so readers never see it half-reset
+        self._state: tuple[tuple[SimpleNamespace, ...], dict[int, SimpleNamespace], float] | None = None
+        self._indexes: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def _snapshot(self, obj) -> SimpleNamespace:
+        if self._columns is None:
+            # Resolved lazily; inspecting at import would configure mappers too early
+            self._columns = [attr.key for attr in inspect(self.model).column_attrs]
+        return SimpleNamespace(**{key: getattr(obj, key) for key in self._columns})
+
+    def _current(self, db: Session) -> tuple[tuple[SimpleNamespace, ...], dict[int, SimpleNamespace], float]:
+        state = self._state
+        if state is not None and time.monotonic() - state[2] < self.ttl_seconds:
+            return state
+        return self._load(db)
+
+    def _load(self, db: Session) -> tuple[tuple[SimpleNamespace, ...], dict[int, SimpleNamespace], float]:
+        with self._lock:
+            version = self.version
+
+        rows = tuple(
+            self._snapshot(obj)
+            for obj in db.scalars(select(self.model).order_by(self.model.id))
+        )
+        state = (rows, {row.id: row for row in rows}, time.monotonic())
+
+        with self._lock:
+            # A writer invalidated the catalog mid-load: answer this caller
+            # from what it read, but don't cache a possibly stale result
+            if version == self.version:
+                self._state = state
+                self._indexes = {}
+        return state
+
+    def all(self, db: Session) -> tuple[SimpleNamespace, ...]:
+        return self._current(db)[0]
+
+    def get(self, db: Session, row_id: int) -> SimpleNamespace | None:
+        return self._current(db)[1].get(row_id)
+
+    def index(self, db: Session, key: str) -> dict:
+        """Lookup table from a unique column (e.g. Good.name) to its row."""
+        state = self._current(db)
+        index = self._indexes.get(key) if state is self._state else None
+        if index is None:
+            index = {getattr(row, key): row for row in state[0]}
+            with self._lock:
+                if state is self._state:
+                    self._indexes[key] = index
+        return index
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.version += 1
+            self._state = None
+            self._indexes = {}
+
+
+GOODS = ReferenceCatalog(Good, settings.REFERENCE_CACHE_TTL_SECONDS)
+BUILDING_BLUEPRINTS = ReferenceCatalog(BuildingBlueprint, settings.REFERENCE_CACHE_TTL_SECONDS)
+PRODUCTION_RECIPES = ReferenceCatalog(ProductionRecipe, settings.REFERENCE_CACHE_TTL_SECONDS)
@@ -0,0 +1,140 @@
+"""
+Aggregated settlement of market fills.
+
+Matching adds each fill's cash and goods movements to a Settlement
+instead of updating the companies and inventories rows fill by fill.
+apply() then writes them all at once, at the end of the match (or of a
+whole batch or auction):
+
+- every touched inventories row, then every touched companies row, is
+  locked with one SELECT ... FOR NO KEY UPDATE in ascending id order,
+  the canonical lock order of app/services/transactions.py, so
+  concurrent settlements cannot deadlock on each other (NO KEY: the
+  key-share locks that inserting orders and trades take on their
+  companies must not block it);
+- each row gets a single UPDATE adding its net delta (sent as one
+  executemany), so a busy trader's row is locked once per match, from
+  the end of matching to the commit, however many fills it took part in.
+
+Cash checks during matching use an unlocked read plus the deltas so far;
+apply() repeats them under the lock and raises a RetryableConflict if a
+concurrent settlement spent the cash meanwhile (the match is retried).
+"""
+from collections import defaultdict
+
+from sqlalchemy import bindparam, insert, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.models.company import Company
+from app.models.inventory import Inventory
+from app.services.transactions import RetryableConflict
+
+
+class Settlement:
+    """Net cash per company and goods per (company, good) of a set of fills."""
+
+    def __init__(self):
+        self.cash: dict[int, int] = defaultdict(int)
+        # (company_id, good_id) -> [quantity delta, reserved delta]
+        self.goods: dict[tuple[int, int], list[int]] = {}
+        self._cash_before: dict[int, int] = {}
+
+    def available_cash(self, db: Session, company_id: int) -> int:
+        """Company cash as of its first use here, plus this settlement's changes."""
+        if company_id not in self._cash_before:
+            self._cash_before[company_id] = db.scalar(
+                select(Company.cash).where(Company.id == company_id)
+            ) or 0
+        return self._cash_before[company_id] + self.cash.get(company_id, 0)
+
+    def _holding(self, company_id: int, good_id: int) -> list[int]:
+        key = (company_id, good_id)
+        if key not in self.goods:
+            self.goods[key] = [0, 0]
+        return self.goods[key]
+
+    def transfer(self, buyer_id: int, seller_id: int, good_id: int, quantity: int, total: int) -> None:
+        """Buyer pays `total` for `quantity` units the seller had reserved."""
+        self.cash[buyer_id] -= total
+        self.cash[seller_id] += total
+        seller = self._holding(seller_id, good_id)
+        seller[0] -= quantity
+        seller[1] -= quantity
+        self._holding(buyer_id, good_id)[0] += quantity
+
+    def apply(self, db: Session) -> None:
+        """Lock and update every touched row once (no commit)."""
+        cash = {company_id: delta for company_id, delta in sorted(self.cash.items()) if delta}
+        goods = {key: delta for key, delta in sorted(self.goods.items()) if delta[0] or delta[1]}
+        self.cash.clear()
+        self.goods.clear()
+        self._cash_before.clear()
+
+        if goods:
+            self._apply_goods(db, goods)
+        if cash:
+            self._apply_cash(db, cash)
+
+    def _apply_cash(self, db: Session, cash: dict[int, int]) -> None:
+        locked = dict(db.execute(
+            select(Company.id, Company.cash)
+            .where(Company.id.in_(list(cash)))
+            .order_by(Company.id)
+            .with_for_update(key_share=True)
+        ).all())
+        if any(locked.get(company_id, 0) + delta < 0 for company_id, delta in cash.items() if delta < 0):
+            raise RetryableConflict("Cash changed during matching, retry")
+
+        companies = Company.__table__
+        db.execute(
+            update(companies)
+            .where(companies.c.id == bindparam("b_company_id"))
+            .values(cash=companies.c.cash + bindparam("b_delta")),
+            [{"b_company_id": company_id, "b_delta": delta} for company_id, delta in cash.items()],
+        )
+        _expire(db, Company, cash, ["cash"])
+
+    def _apply_goods(self, db: Session, goods: dict[tuple[int, int], list[int]]) -> None:
+        existing = {
+            (company_id, good_id): inventory_id
+            for inventory_id, company_id, good_id in db.execute(
+                select(Inventory.id, Inventory.company_id, Inventory.good_id)
+                .where(tuple_(Inventory.company_id, Inventory.good_id).in_(list(goods)))
+                .order_by(Inventory.id)
+                .with_for_update(key_share=True)
+            )
+        }
+
+        inventories = Inventory.__table__
+        rows = [
+            {"b_id": inventory_id, "b_qty": goods[key][0], "b_reserved": goods[key][1]}
+            for key, inventory_id in existing.items()
+        ]
+        if rows:
+            db.execute(
+                update(inventories)
+                .where(inventories.c.id == bindparam("b_id"))
+                .values(
+                    quantity=inventories.c.quantity + bindparam("b_qty"),
+                    reserved=inventories.c.reserved + bindparam("b_reserved"),
+                ),
+                rows,
+            )
+            _expire(db, Inventory, existing.values(), ["quantity", "reserved"])
+
+        # Only buyers can be missing a row (sellers reserved from theirs)
+        missing = [
+            {"company_id": company_id, "good_id": good_id, "quantity": delta[0], "reserved": 0}
+            for (company_id, good_id), delta in goods.items()
+            if (company_id, good_id) not in existing
+        ]
+        if missing:
+            db.execute(insert(Inventory), missing)
+
+
+def _expire(db: Session, model, ids, attributes: list[str]) -> None:
+    """Drop stale values of rows updated behind the ORM's back, if loaded in `db`."""
+    for row_id in ids:
+        obj = db.identity_map.get(Session.identity_key(model, row_id))
+        if obj is not None:
+            db.expire(obj, attributes)
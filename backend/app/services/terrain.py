@@ -0,0 +1,901 @@
+"""
+Server-side port of the Godot plot terrain pipeline.
+
+Mirrors temperate_map_generator.gd (archetype macro shapes, FBM blend, core
+flattening, slope limiting, edge mountains) and the slope-to-buildability
+evaluation in hterrain_plot_integrator.gd, vectorised with NumPy.
+
+Noise is a float32 port of FastNoiseLite (OpenSimplex2, FBM) and random draws
+follow Godot's RandomNumberGenerator (pcg32), so archetype selection and river
+carving consume the same sequence as the client. The rest runs in float64 like
+GDScript. tests/test_terrain.py compares against heightmaps exported from the
+client (godot-client/scripts/export_terrain_fixtures.gd); placement only enforces
+terrain when TERRAIN_ENFORCE_PLACEMENT is set.
+"""
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+from app.config import settings
+
+# Godot generator / integrator parameters
+PLOT_RESOLUTION = 16           # temperate_map_generator GRID_RESOLUTION (plot size index 1)
+TERRAIN_SIZE = 1025            # HTerrain resolution
+VERTICAL_SCALE = 200.0
+SLOPE_WORLD_SIZE = 512.0
+SLOPE_LIMIT_PASSES = 4
+GENERATOR_SLOPE_MAX_DEG = 12.0
+SMOOTHING_ITERATIONS = 2
+NOISE_BASE_FREQUENCY = 0.01    # FastNoiseLite default frequency
+NOISE_FRACTAL_OCTAVES = 5      # FastNoiseLite default fractal octaves
+
+# Buildability thresholds (degrees), as in hterrain_plot_integrator.gd
+BUILDABLE_SLOPE_MAX = 10.0
+CONDITIONAL_SLOPE_MAX = 18.0
+
+# Bump when the generation algorithm changes so stale cache files are ignored
+TERRAIN_VERSION = 2
+
+ARCHETYPES = {
+    "Flat Plains": {
+        "buildable_ratio": 0.80,
+        "sea_level": 0.35,
+        "height_power": 1.2,
+        "base_roughness": 0.3,
+        "noise_scale": 1.0,
+        "octaves": 4,
+        "frequency": 0.04,
+        "macro_shape": "central_valley",
+        "valley_radius": 0.35,
+        "rim_height": 0.65,
+        "height_pattern": [
+            [0.45, 0.45, 0.45, 0.45],
+            [0.45, 0.45, 0.45, 0.45],
+            [0.45, 0.45, 0.45, 0.45],
+            [0.45, 0.45, 0.45, 0.45],
+        ],
+    },
+    "Coastal Shelf": {
+        "buildable_ratio": 0.65,
+        "sea_level": 0.25,
+        "height_power": 1.0,
+        "base_roughness": 0.15,
+        "noise_scale": 0.25,
+        "octaves": 3,
+        "frequency": 0.02,
+        "has_river": True,
+        "river_width": 2,
+        "river_depth": 0.4,
+        "macro_shape": "one_sided_coast",
+        "height_pattern": [
+            [0.22, 0.26, 0.32, 0.50],
+            [0.22, 0.26, 0.34, 0.52],
+            [0.22, 0.26, 0.32, 0.50],
+            [0.22, 0.26, 0.34, 0.48],
+        ],
+    },
+    "Gentle Hills": {
+        "buildable_ratio": 0.70,
+        "sea_level": 0.30,
+        "height_power": 1.4,
+        "base_roughness": 0.6,
+        "noise_scale": 1.2,
+        "octaves": 6,
+        "frequency": 0.045,
+        "height_pattern": [
+            [0.45, 0.50, 0.55, 0.50],
+            [0.50, 0.55, 0.65, 0.55],
+            [0.55, 0.65, 0.75, 0.65],
+            [0.50, 0.55, 0.65, 0.55],
+        ],
+    },
+    "River Basin": {
+        "buildable_ratio": 0.60,
+        "sea_level": 0.38,
+        "height_power": 1.3,
+        "base_roughness": 0.4,
+        "noise_scale": 0.9,
+        "octaves": 5,
+        "frequency": 0.05,
+        "has_river": True,
+        "river_width": 3,
+        "river_depth": 0.45,
+        "macro_shape": "gentle_bowl",
+        "bowl_gradient": 0.25,
+        "height_pattern": [
+            [0.50, 0.48, 0.45, 0.48],
+            [0.48, 0.45, 0.35, 0.45],
+            [0.45, 0.35, 0.25, 0.35],
+            [0.48, 0.45, 0.35, 0.45],
+        ],
+    },
+    "Forest Edge": {
+        "buildable_ratio": 0.65,
+        "sea_level": 0.32,
+        "height_power": 1.6,
+        "base_roughness": 0.8,
+        "noise_scale": 1.3,
+        "octaves": 6,
+        "frequency": 0.055,
+        "macro_shape": "forested_ridge",
+        "ridge_height": 0.70,
+        "height_pattern": [
+            [0.70, 0.75, 0.80, 0.75],
+            [0.75, 0.65, 0.60, 0.70],
+            [0.80, 0.60, 0.65, 0.75],
+            [0.75, 0.70, 0.75, 0.80],
+        ],
+    },
+    "Agricultural Plateau": {
+        "buildable_ratio": 0.75,
+        "sea_level": 0.35,
+        "height_power": 1.1,
+        "base_roughness": 0.35,
+        "noise_scale": 0.7,
+        "octaves": 4,
+        "frequency": 0.03,
+        "macro_shape": "stepped_plateau",
+        "plateau_height": 0.55,
+        "plateau_tilt": 0.08,
+        "height_pattern": [
+            [0.65, 0.65, 0.65, 0.65],
+            [0.65, 0.55, 0.60, 0.65],
+            [0.65, 0.60, 0.70, 0.65],
+            [0.65, 0.65, 0.65, 0.65],
+        ],
+    },
+}
+
+
+# ============================================================
+# RANDOM NUMBERS
+# ============================================================
+_MASK32 = 0xFFFFFFFF
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+_PCG_MULTIPLIER = 6364136223846793005
+_PCG_DEFAULT_INC = 1442695040888963407   # Godot RandomPCG default stream
+
+
+def _int32(value: int) -> int:
+    """Wrap to a C int, as Godot does when assigning FastNoiseLite.seed."""
+    value &= _MASK32
+    return value - (1 << 32) if value & 0x80000000 else value
+
+
+class GodotRandom:
+    """Port of Godot's RandomNumberGenerator (pcg32 on the default stream)."""
+
+    def __init__(self, seed: int, stream: int = _PCG_DEFAULT_INC):
+        self.inc = ((stream << 1) | 1) & _MASK64
+        self.state = 0
+        self.next_u32()
+        self.state = (self.state + (seed & _MASK64)) & _MASK64
+        self.next_u32()
+
+    def next_u32(self) -> int:
+        old = self.state
+        self.state = (old * _PCG_MULTIPLIER + self.inc) & _MASK64
+        xorshifted = (((old >> 18) ^ old) >> 27) & _MASK32
+        rot = old >> 59
+        return ((xorshifted >> rot) | (xorshifted << ((-rot) & 31))) & _MASK32
+
+    def _bounded(self, bound: int) -> int:
+        threshold = ((1 << 32) - bound) % bound
+        while True:
+            value = self.next_u32()
+            if value >= threshold:
+                return value % bound
+
+    def randi_range(self, low: int, high: int) -> int:
+        if low == high:
+            return low
+        return self._bounded(abs(high - low) + 1) + min(low, high)
+
+    def randf(self) -> np.float32:
+        exponent_source = self.next_u32()
+        if exponent_source == 0:
+            return np.float32(0.0)
+        leading_zeros = 32 - exponent_source.bit_length()
+        significand = np.float32(self.next_u32() | 0x80000001)
+        return np.ldexp(significand, -32 - leading_zeros).astype(np.float32)
+
+    def randf_range(self, low: float, high: float) -> np.float32:
+        low = np.float32(low)
+        return self.randf() * (np.float32(high) - low) + low
+
+
+# ============================================================
+# NOISE
+# ============================================================
+_PRIME_X = np.int32(501125321)
+_PRIME_Y = np.int32(1136930381)
+_HASH_MULTIPLIER = np.int32(0x27D4EB2D)
+_SQRT3 = np.float32(1.7320508075688772)
+_F2 = np.float32(0.5) * (_SQRT3 - np.float32(1))
+_G2 = (np.float32(3) - _SQRT3) / np.float32(6)
+_SIMPLEX_C_T = np.float32(2) * (np.float32(1) - np.float32(2) * _G2) * (np.float32(1) / _G2 - np.float32(2))
+_SIMPLEX_C_A = np.float32(-2) * (np.float32(1) - np.float32(2) * _G2) * (np.float32(1) - np.float32(2) * _G2)
+_SIMPLEX_SCALE = np.float32(99.83685446303647)
+
+# FastNoiseLite Gradients2D: 24 directions 15 degrees apart, repeated five
+# times, then 8 diagonals; (x, y) pairs indexed by an even hash
+_GRADIENT_ANGLES = np.concatenate([
+    np.tile(np.radians(82.5 - 15.0 * np.arange(24)), 5),
+    np.radians([67.5, 22.5, -22.5, -67.5, -112.5, -157.5, 157.5, 112.5]),
+])
+_GRADIENTS_2D = np.stack(
+    [np.cos(_GRADIENT_ANGLES), np.sin(_GRADIENT_ANGLES)], axis=-1
+).astype(np.float32).ravel()
+
+
+def _grad_coord(seed: np.int32, x_primed, y_primed, xd, yd):
+    hash_ = (seed ^ x_primed ^ y_primed) * _HASH_MULTIPLIER
+    hash_ = (hash_ ^ (hash_ >> 15)) & 254
+    return xd * _GRADIENTS_2D[hash_] + yd * _GRADIENTS_2D[hash_ | 1]
+
+
+class FastNoiseLite:
+    """
+    Port of Godot's FastNoiseLite as the generator configures it: TYPE_SIMPLEX
+    (OpenSimplex2) with FBM fractal, evaluated in float32 like the C++ library.
+    """
+
+    def __init__(
+        self,
+        seed: int,
+        frequency: float = NOISE_BASE_FREQUENCY,
+        octaves: int = NOISE_FRACTAL_OCTAVES,
+        lacunarity: float = 2.0,
+        gain: float = 0.5,
+    ):
+        self.seed = _int32(seed)
+        self.frequency = np.float32(frequency)
+        self.octaves = octaves
+        self.lacunarity = np.float32(lacunarity)
+        self.gain = np.float32(gain)
+
+        amplitude = abs(self.gain)
+        amp_fractal = np.float32(1.0)
+        for _ in range(1, octaves):
+            amp_fractal += amplitude
+            amplitude *= self.gain
+        self.fractal_bounding = np.float32(1.0) / amp_fractal
+
+    @staticmethod
+    def _simplex(seed: np.int32, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        # FastFloor truncates toward zero then steps down for negatives
+        i = np.where(x >= 0, x.astype(np.int32), x.astype(np.int32) - 1).astype(np.int32)
+        j = np.where(y >= 0, y.astype(np.int32), y.astype(np.int32) - 1).astype(np.int32)
+        xi = x - i.astype(np.float32)
+        yi = y - j.astype(np.float32)
+
+        t = (xi + yi) * _G2
+        x0 = xi - t
+        y0 = yi - t
+        i = i * _PRIME_X
+        j = j * _PRIME_Y
+
+        a = np.float32(0.5) - x0 * x0 - y0 * y0
+        n0 = np.where(a > 0, (a * a) * (a * a) * _grad_coord(seed, i, j, x0, y0), np.float32(0))
+
+        c = _SIMPLEX_C_T * t + (_SIMPLEX_C_A + a)
+        x2 = x0 + (np.float32(2) * _G2 - np.float32(1))
+        y2 = y0 + (np.float32(2) * _G2 - np.float32(1))
+        n2 = np.where(
+            c > 0,
+            (c * c) * (c * c) * _grad_coord(seed, i + _PRIME_X, j + _PRIME_Y, x2, y2),
+            np.float32(0),
+        )
+
+        upper = y0 > x0
+        x1 = np.where(upper, x0 + _G2, x0 + (_G2 - np.float32(1)))
+        y1 = np.where(upper, y0 + (_G2 - np.float32(1)), y0 + _G2)
+        b = np.float32(0.5) - x1 * x1 - y1 * y1
+        n1 = np.where(
+            b > 0,
+            (b * b) * (b * b) * _grad_coord(
+                seed, np.where(upper, i, i + _PRIME_X), np.where(upper, j + _PRIME_Y, j), x1, y1
+            ),
+            np.float32(0),
+        )
+
+        return (n0 + n1 + n2) * _SIMPLEX_SCALE
+
+    def get_noise_2d(self, x, y) -> np.ndarray:
+        """FastNoiseLite.get_noise_2d; inputs are narrowed to real_t (float32)."""
+        with np.errstate(over="ignore"):
+            x = np.asarray(x, dtype=np.float32) * self.frequency
+            y = np.asarray(y, dtype=np.float32) * self.frequency
+            x, y = np.broadcast_arrays(x, y)
+            t = (x + y) * _F2
+            x = x + t
+            y = y + t
+
+            seed = self.seed
+            total = np.zeros(x.shape, dtype=np.float32)
+            amplitude = self.fractal_bounding
+            for _ in range(self.octaves):
+                total += self._simplex(np.int32(seed), x, y) * amplitude
+                seed = _int32(seed + 1)
+                x = x * self.lacunarity
+                y = y * self.lacunarity
+                amplitude *= self.gain
+
+        return total.astype(np.float64)
+
+    def fbm(self, x: np.ndarray, z: np.ndarray, frequency: float, octaves: int) -> np.ndarray:
+        """Port of temperate_map_generator._fbm (manual octaves on top of get_noise_2d)."""
+        amplitude = 1.0
+        max_value = 0.0
+        value = np.zeros(np.broadcast(x, z).shape)
+        freq = frequency
+
+        for _ in range(octaves):
+            value += self.get_noise_2d(x * freq, z * freq) * amplitude
+            max_value += amplitude
+            amplitude *= 0.5
+            freq *= 2.0
+
+        return value / max_value if max_value > 0.0 else value
+
+
+# ============================================================
+# HEIGHTMAP
+# ============================================================
+def _smoothstep(edge0: float, edge1: float, x: np.ndarray) -> np.ndarray:
+    t = np.clip((x - edge0) / (edge1 - edge0), 0.0, 1.0)
+    return t * t * (3.0 - 2.0 * t)
+
+
+def _lerp(a, b, t):
+    return a + (b - a) * t
+
+
+def _box_mean(values: np.ndarray, radius: int = 1) -> np.ndarray:
+    """Box average that only counts in-bounds neighbours, like the GDScript loops."""
+    padded = np.pad(values, radius)
+    ones = np.pad(np.ones_like(values), radius)
+    total = np.zeros_like(values)
+    count = np.zeros_like(values)
+    h, w = values.shape
+
+    for dz in range(2 * radius + 1):
+        for dx in range(2 * radius + 1):
+            total += padded[dz:dz + h, dx:dx + w]
+            count += ones[dz:dz + h, dx:dx + w]
+
+    return total / count
+
+
+def _macro_height(archetype: str, x_n: np.ndarray, z_n: np.ndarray) -> np.ndarray:
+    data = ARCHETYPES[archetype]
+    sea_level = data["sea_level"]
+    shape = data.get("macro_shape", "none")
+
+    if shape == "central_valley":
+        dist = np.sqrt((x_n - 0.5) ** 2 + (z_n - 0.5) ** 2)
+        valley_amount = _smoothstep(data["valley_radius"], 0.0, dist)
+        return _lerp(sea_level + 0.05, data["rim_height"], valley_amount)
+
+    if shape == "one_sided_coast":
+        return np.select(
+            [x_n < 0.25, x_n < 0.40, x_n < 0.75],
+            [
+                _lerp(sea_level - 0.05, sea_level - 0.01, x_n / 0.25),
+                _lerp(sea_level + 0.01, sea_level + 0.03, (x_n - 0.25) / 0.15),
+                _lerp(sea_level + 0.03, sea_level + 0.15, (x_n - 0.40) / 0.35),
+            ],
+            _lerp(sea_level + 0.15, sea_level + 0.45, (x_n - 0.75) / 0.25),
+        )
+
+    if shape == "gentle_bowl":
+        slope = (x_n + z_n) * 0.5
+        height = (sea_level + 0.25) - slope * data["bowl_gradient"]
+        return np.clip(height, sea_level * 0.85, sea_level + 0.35)
+
+    if shape == "forested_ridge":
+        ridge_amount = _smoothstep(0.4, 0.0, z_n)
+        return _lerp(sea_level + 0.15, data["ridge_height"], ridge_amount)
+
+    if shape == "stepped_plateau":
+        height = data["plateau_height"] + (x_n - 0.5) * data["plateau_tilt"]
+        terrace_level = np.floor(x_n * 3.0) / 3.0
+        height = _lerp(height, height + (terrace_level - x_n + 0.166) * 0.05, 0.3)
+        return np.clip(height, sea_level + 0.1, 0.75)
+
+    return np.full_like(x_n, sea_level + 0.15)
+
+
+def _coast_mask(archetype: str, noise_seed: int, size: int) -> np.ndarray:
+    z, x = np.mgrid[0:size, 0:size].astype(float)
+    nx = x / size
+    nz = z / size
+
+    if archetype == "Coastal Shelf":
+        coast_noise = FastNoiseLite(noise_seed + 1, frequency=0.06)
+        perturb = coast_noise.get_noise_2d(np.zeros_like(z), z)
+        perturb_amount = ((perturb * 0.5 + 0.5) - 0.5) * 0.15
+        threshold = 0.25 + perturb_amount
+        mask = _smoothstep(threshold - 0.1, threshold + 0.1, nx)
+        return _box_mean(mask, 1)
+
+    dist = np.sqrt((nx - 0.5) ** 2 + (nz - 0.5) ** 2)
+    return _smoothstep(0.55, 0.45, dist)
+
+
+def _core_influence(archetype: str, size: int) -> np.ndarray:
+    buildable_ratio = ARCHETYPES[archetype]["buildable_ratio"]
+    center = size * 0.5
+    core_radius = buildable_ratio * 0.45 * size
+    transition_width = size * 0.15
+
+    z, x = np.mgrid[0:size, 0:size].astype(float)
+    dist = np.sqrt((x - center) ** 2 + (z - center) ** 2)
+    falloff = 1.0 - _smoothstep(0.0, 1.0, (dist - core_radius) / transition_width)
+
+    return np.where(
+        dist < core_radius,
+        1.0,
+        np.where(dist < core_radius + transition_width, falloff, 0.0),
+    )
+
+
+def _generator_slope_deg(height_map: np.ndarray) -> np.ndarray:
+    """Port of _compute_slope_deg: interior central differences, zero on borders."""
+    size = height_map.shape[0]
+    grid_spacing = SLOPE_WORLD_SIZE / (size - 1)
+    scaled = height_map * VERTICAL_SCALE
+    slope = np.zeros_like(height_map)
+
+    dx = (scaled[1:-1, 2:] - scaled[1:-1, :-2]) * 0.5
+    dz = (scaled[2:, 1:-1] - scaled[:-2, 1:-1]) * 0.5
+    slope[1:-1, 1:-1] = np.degrees(np.arctan(np.sqrt(dx * dx + dz * dz) / grid_spacing))
+    return slope
+
+
+def _flatten_buildable_core(height_map: np.ndarray, archetype: str) -> np.ndarray:
+    influence = _core_influence(archetype, height_map.shape[0])
+    smoothed = _lerp(height_map, _box_mean(height_map, 1), influence * 0.75)
+    return np.where(influence > 0.05, smoothed, height_map)
+
+
+def _limit_buildable_slopes(height_map: np.ndarray, archetype: str) -> np.ndarray:
+    if height_map.shape[0] <= 1:
+        return height_map
+
+    influence = _core_influence(archetype, height_map.shape[0])
+    processed = height_map
+
+    for _ in range(SLOPE_LIMIT_PASSES):
+        slope = _generator_slope_deg(processed)
+        excess = np.clip((slope - GENERATOR_SLOPE_MAX_DEG) / GENERATOR_SLOPE_MAX_DEG, 0.0, 1.0)
+        strength = np.minimum(0.75, 0.25 + excess * 0.5) * influence
+        smoothed = _lerp(processed, _box_mean(processed, 1), strength)
+        apply = (influence > 0.05) & (slope > GENERATOR_SLOPE_MAX_DEG)
+        processed = np.where(apply, smoothed, processed)
+
+    return processed
+
+
+def _force_edge_mountains(height_map: np.ndarray, archetype: str) -> np.ndarray:
+    if archetype == "Coastal Shelf":
+        return height_map
+
+    size = height_map.shape[0]
+    sea_level = ARCHETYPES[archetype]["sea_level"]
+    edge_depth = size * 0.18
+    mountain_min_height = sea_level + 0.25
+
+    z, x = np.mgrid[0:size, 0:size]
+    dist_to_edge = np.minimum(
+        np.minimum(x, size - 1 - x), np.minimum(z, size - 1 - z)
+    ).astype(float)
+    influence = np.where(dist_to_edge < edge_depth, 1.0 - (dist_to_edge / edge_depth) ** 2.5, 0.0)
+
+    boosted = height_map + 0.35 * influence
+    boosted = np.maximum(boosted, mountain_min_height * influence)
+    boosted = np.clip(boosted, 0.0, 1.0)
+    return np.where(influence > 0.05, boosted, height_map)
+
+
+# ============================================================
+# RIVERS
+# ============================================================
+RIVER_MAX_STEPS = 250
+RIVER_MIN_STEPS = 15
+RIVER_STEP_SIZE = np.float32(0.6)
+RIVER_CANDIDATE_ANGLES = (-np.pi * 0.25, np.pi * 0.25, -np.pi * 0.125, np.pi * 0.125)
+WATER_LEVEL_NORM = 0.25
+
+
+def _vec2(x, y) -> np.ndarray:
+    """Godot Vector2 (real_t is float32)."""
+    return np.array([x, y], dtype=np.float32)
+
+
+def _distance(a: np.ndarray, b: np.ndarray) -> np.float32:
+    d = a - b
+    return np.sqrt(d[0] * d[0] + d[1] * d[1])
+
+
+def _normalized(v: np.ndarray) -> np.ndarray:
+    length = v[0] * v[0] + v[1] * v[1]
+    return v / np.sqrt(length) if length != 0 else v
+
+
+def _edge_point(edge: int, inset: int, rng: GodotRandom, size: int) -> np.ndarray:
+    """Point `inset` tiles in from an edge (0 top, 1 right, 2 bottom, 3 left)."""
+    along = rng.randf_range(2.0, float(size - 2))
+    if edge == 0:
+        return _vec2(along, inset)
+    if edge == 1:
+        return _vec2(size - 1 - inset, along)
+    if edge == 2:
+        return _vec2(along, size - 1 - inset)
+    return _vec2(inset, along)
+
+
+def _river_path(
+    start_edge: int, end_edge: int, height_map: np.ndarray, coast: np.ndarray, rng: GodotRandom
+) -> list[tuple[int, int]]:
+    """Port of _generate_river_path: greedy downhill walk toward the far edge, as tiles."""
+    size = height_map.shape[0]
+    limit = float(size - 1)
+    current = _edge_point(start_edge, 1, rng, size)
+    end = _edge_point(end_edge, 0, rng, size)
+    path = []
+
+    for step in range(RIVER_MAX_STEPS):
+        cx, cz = int(current[0]), int(current[1])
+        path.append((cx, cz))
+
+        if step >= RIVER_MIN_STEPS and (coast[cz, cx] < 0.5 or _distance(current, end) < 1.0):
+            break
+
+        goal_dir = _normalized(end - current)
+        goal_angle = np.arctan2(float(goal_dir[1]), float(goal_dir[0]))
+        candidates = [goal_dir] + [
+            _vec2(np.cos(goal_angle + offset), np.sin(goal_angle + offset))
+            for offset in RIVER_CANDIDATE_ANGLES
+        ]
+
+        best_dir = goal_dir
+        best_score = 999999.0
+        to_goal = float(_distance(current, end))
+        for candidate in candidates:
+            next_pos = np.clip(current + candidate * RIVER_STEP_SIZE, 0.0, limit)
+            penalty = to_goal - float(_distance(next_pos, end))
+            score = height_map[int(next_pos[1]), int(next_pos[0])] - penalty * 0.2
+            if score < best_score:
+                best_score = score
+                best_dir = candidate
+
+        current = np.clip(current + best_dir * RIVER_STEP_SIZE, 0.0, limit)
+
+    return path
+
+
+def _smooth_local(rows: list[list[float]], cx: int, cz: int, radius: int) -> None:
+    """In-place 3x3 average around a tile; later cells see earlier updates, as in GDScript."""
+    size = len(rows)
+    for z in range(max(0, cz - radius), min(size, cz + radius + 1)):
+        for x in range(max(0, cx - radius), min(size, cx + radius + 1)):
+            total = 0.0
+            count = 0
+            for nz in range(max(0, z - 1), min(size, z + 2)):
+                row = rows[nz]
+                for nx in range(max(0, x - 1), min(size, x + 2)):
+                    total += row[nx]
+                    count += 1
+            rows[z][x] = total / count
+
+
+def _carve_river(height_map: np.ndarray, archetype: str, coast: np.ndarray, rng: GodotRandom) -> np.ndarray:
+    """Port of _carve_river: Gaussian valley along the path, then local smoothing."""
+    data = ARCHETYPES[archetype]
+    river_width = data["river_width"]
+    is_river_basin = archetype == "River Basin"
+    carve_multiplier = 1.5 if is_river_basin else 1.0
+    width_multiplier = 1.5 if is_river_basin else 1.2
+
+    if is_river_basin:
+        start_edge = rng.randi_range(0, 3)
+        end_edge = (start_edge + 2) % 4
+    elif archetype == "Coastal Shelf":
+        end_edge = 3
+        start_edge = rng.randi_range(0, 2)
+    else:
+        start_edge = rng.randi_range(0, 3)
+        end_edge = (start_edge + rng.randi_range(1, 3)) % 4
+
+    path = _river_path(start_edge, end_edge, height_map, coast, rng)
+    if len(path) < 5:
+        return height_map
+
+    size = height_map.shape[0]
+    radius = int(float(river_width) * width_multiplier)
+    sigma = float(river_width) * 0.6
+    offsets = np.arange(-radius, radius + 1)
+    dist_sq = (offsets[:, None] ** 2 + offsets[None, :] ** 2).astype(float)
+    carve = data["river_depth"] * np.exp(-dist_sq / (2.0 * sigma * sigma)) * carve_multiplier
+    max_depth = WATER_LEVEL_NORM * (0.75 if is_river_basin else 0.90)
+
+    carved = height_map.copy()
+    for cx, cz in path:
+        if coast[cz, cx] < 0.5:
+            break
+        z0, z1 = max(0, cz - radius), min(size, cz + radius + 1)
+        x0, x1 = max(0, cx - radius), min(size, cx + radius + 1)
+        kernel = carve[z0 - cz + radius:z1 - cz + radius, x0 - cx + radius:x1 - cx + radius]
+        window = np.minimum(carved[z0:z1, x0:x1] - kernel, max_depth)
+        carved[z0:z1, x0:x1] = np.maximum(window, WATER_LEVEL_NORM * 0.50)
+
+    rows = carved.tolist()
+    for _ in range(2):
+        for cx, cz in path:
+            _smooth_local(rows, cx, cz, river_width + 2)
+
+    return np.asarray(rows)
+
+
+def select_archetype(rng: GodotRandom) -> str:
+    names = list(ARCHETYPES)
+    return names[rng.randi_range(0, len(names) - 1)]
+
+
+def generate_height_map(seed: int, resolution: int = PLOT_RESOLUTION) -> tuple[str, np.ndarray]:
+    """Generate the normalised plot heightmap ([z][x] in 0..1) for a seed."""
+    rng = GodotRandom(seed)
+    archetype = select_archetype(rng)
+    data = ARCHETYPES[archetype]
+    sea_level = data["sea_level"]
+    base_roughness = data["base_roughness"]
+    noise = FastNoiseLite(seed)
+
+    z, x = np.mgrid[0:resolution, 0:resolution].astype(float)
+    denom = float(resolution - 1) if resolution > 1 else 1.0
+    x_n = x / denom
+    z_n = z / denom
+
+    coast = _coast_mask(archetype, seed, resolution)
+    macro = _macro_height(archetype, x_n, z_n)
+
+    fbm_norm = noise.fbm(x, z, data["frequency"], data["octaves"]) * 0.5 + 0.5
+    pattern = np.asarray(data["height_pattern"])
+    pattern_height = pattern[z.astype(int) % pattern.shape[0], x.astype(int) % pattern.shape[1]]
+    pattern_height = _lerp(pattern_height, fbm_norm, 0.3)
+
+    detail_norm = noise.fbm(x, z, data["frequency"] * 4.0, 2) * 0.5 + 0.5
+    pattern_height = _lerp(pattern_height, detail_norm, 0.08 * base_roughness)
+
+    height = _lerp(macro, pattern_height, base_roughness * data["noise_scale"])
+
+    if archetype == "Forest Edge":
+        ridge_amount = _smoothstep(0.4, 0.0, z_n)
+        height = _lerp(height, height + (fbm_norm - 0.5) * 0.15, ridge_amount)
+
+    height = np.power(np.maximum(height, 0.0), data["height_power"])
+    height = _lerp(sea_level, height, coast)
+    height = np.clip(height, 0.0, 1.0)
+    height = np.where(coast > 0.1, np.maximum(height, sea_level * 0.98), height)
+    height = np.where(coast < 0.05, sea_level * 0.95, height)
+
+    height = _flatten_buildable_core(height, archetype)
+    height = _limit_buildable_slopes(height, archetype)
+    height = _force_edge_mountains(height, archetype)
+
+    if data.get("has_river"):
+        height = _carve_river(height, archetype, coast, rng)
+
+    return archetype, height
+
+
+# ============================================================
+# BUILDABILITY
+# ============================================================
+def _upscale(height_map: np.ndarray, target_size: int) -> np.ndarray:
+    """Bilinear upscale matching _upscale_heightmap."""
+    src = height_map.shape[0]
+    coords = np.arange(target_size) / (target_size - 1) * (src - 1)
+    i0 = np.clip(np.floor(coords).astype(int), 0, src - 1)
+    i1 = np.clip(np.ceil(coords).astype(int), 0, src - 1)
+    f = coords - np.floor(coords)
+
+    rows = height_map[i0][:, i0] + (height_map[i0][:, i1] - height_map[i0][:, i0]) * f
+    rows_next = height_map[i1][:, i0] + (height_map[i1][:, i1] - height_map[i1][:, i0]) * f
+    return rows + (rows_next - rows) * f[:, None]
+
+
+def compute_slope_map(height_map: np.ndarray) -> np.ndarray:
+    """Port of _compute_slope_map: clamped central differences in world space."""
+    size = height_map.shape[0]
+    sample_distance = TERRAIN_SIZE / (size - 1) if size > 1 else 1.0
+    scaled = height_map * VERTICAL_SCALE
+
+    idx = np.arange(size)
+    prev = np.maximum(idx - 1, 0)
+    nxt = np.minimum(idx + 1, size - 1)
+    dist = (sample_distance * (nxt - prev)).astype(float)
+    dist[dist == 0] = np.inf
+
+    gradient_x = (scaled[:, nxt] - scaled[:, prev]) / dist[None, :]
+    gradient_z = (scaled[nxt, :] - scaled[prev, :]) / dist[:, None]
+    return np.degrees(np.arctan(np.sqrt(gradient_x ** 2 + gradient_z ** 2)))
+
+
+def _max_pool(slope_map: np.ndarray, grid_width: int, grid_height: int) -> np.ndarray:
+    """Conservative per-tile max slope, as in _sample_slopes_at_gameplay_grid."""
+    rows, cols = slope_map.shape
+    z_starts = (np.arange(grid_height) * (rows / grid_height)).astype(int)
+    x_starts = (np.arange(grid_width) * (cols / grid_width)).astype(int)
+    pooled = np.maximum.reduceat(slope_map, z_starts, axis=0)
+    return np.maximum.reduceat(pooled, x_starts, axis=1)
+
+
+def compute_tile_slopes(seed: int, grid_width: int, grid_height: int) -> np.ndarray:
+    """Max slope in degrees per location tile, shape (grid_height, grid_width)."""
+    _, height_map = generate_height_map(seed)
+    terrain = _upscale(height_map, TERRAIN_SIZE)
+
+    for _ in range(SMOOTHING_ITERATIONS):
+        terrain = _box_mean(terrain, 1)
+
+    return _max_pool(compute_slope_map(terrain), grid_width, grid_height)
+
+
+# ============================================================
+# BITMAP CACHE
+# ============================================================
+class BuildabilityMap:
+    """
+    Read-only view over a cached buildability bitmap.
+
+    The file holds two bit planes packed row-major with np.packbits:
+    fully buildable (slope <= BUILDABLE_SLOPE_MAX) followed by conditionally
+    buildable (slope <= CONDITIONAL_SLOPE_MAX).
+    """
+
+    def __init__(self, data: np.ndarray, grid_width: int, grid_height: int):
+        self.data = data
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.plane_bytes = plane_size(grid_width, grid_height)
+
+    def _bit(self, plane: int, x: int, y: int) -> bool:
+        if x < 0 or y < 0 or x >= self.grid_width or y >= self.grid_height:
+            return False
+        index = y * self.grid_width + x
+        byte = self.data[plane * self.plane_bytes + (index >> 3)]
+        return bool((byte >> (7 - (index & 7))) & 1)
+
+    def is_buildable(self, x: int, y: int) -> bool:
+        return self._bit(0, x, y)
+
+    def is_conditionally_buildable(self, x: int, y: int) -> bool:
+        return self._bit(1, x, y)
+
+    def footprint_buildable(self, x: int, y: int, width: int, height: int) -> bool:
+        """True when every tile of the footprint is fully buildable."""
+        if x < 0 or y < 0 or x + width > self.grid_width or y + height > self.grid_height:
+            return False
+
+        rows = np.arange(y, y + height)[:, None] * self.grid_width
+        index = (rows + np.arange(x, x + width)[None, :]).ravel()
+        bits = (self.data[index >> 3] >> (7 - (index & 7))) & 1
+        return bool(bits.all())
+
+    def plane(self, plane: int) -> bytes:
+        start = plane * self.plane_bytes
+        return bytes(self.data[start:start + self.plane_bytes])
+
+
+def plane_size(grid_width: int, grid_height: int) -> int:
+    return (grid_width * grid_height + 7) // 8
+
+
+def build_bitmap(seed: int, grid_width: int, grid_height: int) -> np.ndarray:
+    slopes = compute_tile_slopes(seed, grid_width, grid_height)
+    buildable = np.packbits((slopes <= BUILDABLE_SLOPE_MAX).ravel())
+    conditional = np.packbits((slopes <= CONDITIONAL_SLOPE_MAX).ravel())
+    return np.concatenate([buildable, conditional])
+
+
+class BuildabilityCache:
+    """
+    Memory-mapped on-disk cache of buildability bitmaps keyed by seed and grid size.
+
+    Bitmaps are generated once, written atomically to TERRAIN_CACHE_DIR and
+    then mapped read-only, so every worker process shares the page cache and
+    tile lookups never regenerate terrain. Generation (a few hundred ms) runs
+    on a background thread: fetch() returns a future and peek() answers None
+    on a miss, so request handlers never generate inline.
+    """
+
+    def __init__(self, directory: str, max_open: int = 256):
+        self.directory = os.path.abspath(directory)
+        self.max_open = max_open
+        self._open: OrderedDict[tuple[int, int, int], BuildabilityMap] = OrderedDict()
+        self._pending: dict[tuple[int, int, int], Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="terrain")
+
+    def _path(self, seed: int, grid_width: int, grid_height: int) -> str:
+        name = f"v{TERRAIN_VERSION}_{seed}_{grid_width}x{grid_height}.bitmap"
+        return os.path.join(self.directory, name)
+
+    def _cached(self, key: tuple[int, int, int]) -> BuildabilityMap | None:
+        """The open or on-disk bitmap for a key, without generating."""
+        with self._lock:
+            cached = self._open.get(key)
+            if cached is not None:
+                self._open.move_to_end(key)
+                return cached
+
+        path = self._path(*key)
+        expected = 2 * plane_size(key[1], key[2])
+        if not os.path.exists(path) or os.path.getsize(path) != expected:
+            return None
+
+        bitmap = BuildabilityMap(
+            np.memmap(path, dtype=np.uint8, mode="r", shape=(expected,)),
+            key[1],
+            key[2],
+        )
+
+        with self._lock:
+            self._open[key] = bitmap
+            while len(self._open) > self.max_open:
+                self._open.popitem(last=False)
+
+        return bitmap
+
+    def get(self, seed: int, grid_width: int, grid_height: int) -> BuildabilityMap:
+        """Blocking lookup that generates on a miss; for scripts and the background thread."""
+        key = (seed, grid_width, grid_height)
+        bitmap = self._cached(key)
+        if bitmap is not None:
+            return bitmap
+
+        path = self._path(*key)
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        build_bitmap(*key).tofile(tmp_path)
+        os.replace(tmp_path, path)
+        return self._cached(key)
+
+    def fetch(self, location) -> Future:
+        """Future of a location's bitmap; a miss is generated in the background, once."""
+        key = (location.tilemap_seed, location.grid_width, location.grid_height)
+        bitmap = self._cached(key)
+        if bitmap is not None:
+            future = Future()
+            future.set_result(bitmap)
+            return future
+
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            future = self._executor.submit(self.get, *key)
+            self._pending[key] = future
+
+        future.add_done_callback(lambda _: self._forget(key))
+        return future
+
+    def _forget(self, key: tuple[int, int, int]) -> None:
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def peek(self, location) -> BuildabilityMap | None:
+        """A location's bitmap if already generated; otherwise start generating it and return None."""
+        key = (location.tilemap_seed, location.grid_width, location.grid_height)
+        bitmap = self._cached(key)
+        if bitmap is None:
+            self.fetch(location)
+        return bitmap
+
+
+BUILDABILITY_CACHE = BuildabilityCache(settings.TERRAIN_CACHE_DIR)
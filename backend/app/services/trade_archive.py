@@ -0,0 +1,141 @@
+"""
+Columnar archive of old market trades.
+
+Each expired daily partition of market_trades becomes one Parquet file
+(zstd, sorted by good and time) in a Hive-style layout:
+
+    TRADE_ARCHIVE_DIR/date=2026-01-31/market_trades.parquet
+
+Any Parquet reader (pyarrow, DuckDB, pandas, Spark) can query the
+directory; read_archived_trades is the in-repo reader. pyarrow is an
+optional dependency: without it nothing is archived or dropped.
+"""
+import os
+from datetime import date, datetime
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.config import settings
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+ARCHIVE_FILE = "market_trades.parquet"
+
+# Rows fetched and written per Parquet row group
+BATCH_ROWS = 100_000
+
+COLUMNS = (
+    "id", "good_id", "buyer_company_id", "seller_company_id",
+    "quantity", "price_per_unit", "created_at",
+)
+
+
+def available() -> bool:
+    return pa is not None
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise RuntimeError("pyarrow is required for the trade archive (pip install pyarrow)")
+
+
+def _schema() -> "pa.Schema":
+    return pa.schema([
+        ("id", pa.int64()),
+        ("good_id", pa.int32()),
+        ("buyer_company_id", pa.int32()),
+        ("seller_company_id", pa.int32()),
+        ("quantity", pa.int64()),
+        ("price_per_unit", pa.int64()),
+        ("created_at", pa.timestamp("us")),
+    ])
+
+
+def partition_path(archive_dir: Path, day: date) -> Path:
+    return archive_dir / f"date={day.isoformat()}" / ARCHIVE_FILE
+
+
+def export_partition(conn: Connection, table: str, day: date, archive_dir: Path) -> int:
+    """
+    Write every row of `table` to the day's Parquet file and return the count.
+
+    Written to a temporary file and renamed, so readers never see a partial
+    file; raises if the file's row count differs from the table's.
+    """
+    _require_pyarrow()
+    schema = _schema()
+    path = partition_path(archive_dir, day)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Dot prefix: dataset discovery ignores it while it is being written
+    tmp_path = path.parent / f".{ARCHIVE_FILE}.tmp"
+
+    result = conn.execute(
+        text(f"SELECT {', '.join(COLUMNS)} FROM {table} ORDER BY good_id, created_at, id"),
+        execution_options={"stream_results": True, "yield_per": BATCH_ROWS},
+    )
+
+    written = 0
+    with pq.ParquetWriter(tmp_path, schema, compression="zstd") as writer:
+        for rows in result.partitions():
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            written += len(rows)
+
+    expected = conn.scalar(text(f"SELECT count(*) FROM {table}"))
+    archived = pq.ParquetFile(tmp_path).metadata.num_rows
+    if not written == archived == expected:
+        tmp_path.unlink()
+        raise RuntimeError(
+            f"Archive of {table} incomplete: {archived} rows written, {expected} in table"
+        )
+
+    os.replace(tmp_path, path)
+    return archived
+
+
+def read_archived_trades(
+    start: datetime | None = None,
+    end: datetime | None = None,
+    good_id: int | None = None,
+    archive_dir: str | Path | None = None,
+) -> "pa.Table":
+    """
+    Archived trades with start <= created_at < end, optionally for one good.
+
+    Day directories outside the range are skipped without being opened,
+    and row-group statistics prune the rest.
+    """
+    _require_pyarrow()
+    archive_dir = Path(archive_dir or settings.TRADE_ARCHIVE_DIR)
+    if not archive_dir.exists():
+        return _schema().empty_table()
+
+    dataset = ds.dataset(
+        archive_dir,
+        format="parquet",
+        partitioning=ds.partitioning(pa.schema([("date", pa.date32())]), flavor="hive"),
+    )
+
+    condition = None
+
+    def both(expr):
+        return expr if condition is None else condition & expr
+
+    if start is not None:
+        condition = both((ds.field("date") >= start.date()) & (ds.field("created_at") >= start))
+    if end is not None:
+        condition = both((ds.field("date") <= end.date()) & (ds.field("created_at") < end))
+    if good_id is not None:
+        condition = both(ds.field("good_id") == good_id)
+
+    return dataset.to_table(columns=list(COLUMNS), filter=condition)
@@ -0,0 +1,141 @@
+import logging
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+
+from app.config import settings
+from app.services import trade_archive
+
+logger = logging.getLogger("app.trades")
+
+PARENT_TABLE = "market_trades"
+PARTITION_PREFIX = "market_trades_p"
+DEFAULT_PARTITION = "market_trades_default"
+
+# Only one API worker runs partition maintenance at a time
+MAINTENANCE_LOCK_ID = 4_120_041
+
+
+def partition_name(day: date) -> str:
+    return f"{PARTITION_PREFIX}{day:%Y%m%d}"
+
+
+def partition_day(name: str) -> date | None:
+    """Inverse of partition_name; None for the default or foreign partitions."""
+    if not name.startswith(PARTITION_PREFIX):
+        return None
+    try:
+        return datetime.strptime(name[len(PARTITION_PREFIX):], "%Y%m%d").date()
+    except ValueError:
+        return None
+
+
+def is_partitioned(conn: Connection) -> bool:
+    """True on Postgres once the partitioning migration has run."""
+    if conn.dialect.name != "postgresql":
+        return False
+    return conn.scalar(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+        "WHERE partrelid = to_regclass(:table))"
+    ), {"table": PARENT_TABLE})
+
+
+def list_partitions(conn: Connection) -> dict[date, str]:
+    """Daily partitions currently attached, by day."""
+    names = conn.scalars(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:table)"
+    ), {"table": PARENT_TABLE})
+
+    partitions = {}
+    for name in names:
+        day = partition_day(name)
+        if day is not None:
+            partitions[day] = name
+    return partitions
+
+
+def ensure_partitions(conn: Connection, start: date, days: int) -> list[str]:
+    """Create the daily partitions for [start, start + days) that are missing."""
+    existing = list_partitions(conn)
+    created = []
+
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        if day in existing:
+            continue
+
+        name = partition_name(day)
+        try:
+            with conn.begin_nested():
+                conn.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+                    f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+                ))
+        except DBAPIError as exc:
+            # Usually rows for that day already landed in the default partition
+            logger.warning("Could not create trade partition %s: %s", name, exc.orig)
+            continue
+        created.append(name)
+
+    return created
+
+
+def archive_partition(conn: Connection, day: date, name: str, archive_dir: Path) -> int:
+    """
+    Export one partition to Parquet, then detach and drop it.
+
+    The partition is only dropped after the file is written and its row
+    count matches the table, so a failed export never loses trades.
+    """
+    rows = trade_archive.export_partition(conn, name, day, archive_dir)
+
+    conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+    conn.execute(text(f"DROP TABLE {name}"))
+    return rows
+
+
+def maintain_trade_partitions(engine: Engine, today: date | None = None) -> dict:
+    """
+    Scheduler job: create upcoming partitions and archive expired ones.
+
+    No-op unless market_trades is partitioned (Postgres after migration).
+    """
+    today = today or datetime.utcnow().date()
+    cutoff = today - timedelta(days=settings.TRADE_RETENTION_DAYS)
+    archive_dir = Path(settings.TRADE_ARCHIVE_DIR)
+    stats = {"created": [], "archived": {}}
+
+    with engine.connect() as conn:
+        # Session-level lock: held across the transactions below
+        locked = is_partitioned(conn) and conn.scalar(
+            text("SELECT pg_try_advisory_lock(:id)"), {"id": MAINTENANCE_LOCK_ID}
+        )
+        conn.commit()
+        if not locked:
+            return stats  # not partitioned, or another worker is on it
+
+        try:
+            with conn.begin():
+                stats["created"] = ensure_partitions(conn, today, settings.TRADE_PARTITION_DAYS_AHEAD + 1)
+                partitions = list_partitions(conn)
+
+            if not trade_archive.available():
+                logger.warning("pyarrow is not installed; keeping expired trade partitions")
+                return stats
+
+            for day, name in sorted(partitions.items()):
+                if day >= cutoff:
+                    break
+                with conn.begin():
+                    stats["archived"][name] = archive_partition(conn, day, name, archive_dir)
+                logger.info("Archived %s (%d trades)", name, stats["archived"][name])
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MAINTENANCE_LOCK_ID})
+            conn.commit()
+
+    return stats
@@ -0,0 +1,163 @@
+"""
+Row-lock ordering and retries for write transactions.
+
+Two transactions that lock the same rows in opposite orders deadlock, and
+Postgres aborts one of them; at REPEATABLE READ or above a write can also
+fail with a serialization error. Write paths avoid the first and absorb
+whatever is left:
+
+- Row locks are taken in one canonical order: book locks (advisory, by
+  good id) first, then tables in LOCK_ORDER, ids ascending within a
+  table. lock_rows() and lock_inventories() lock up front in that order;
+  the settlement, which locks late, follows it too. Companies come last:
+  every fill touches them, so they are held for the shortest time.
+- @transactional reruns a whole unit of work, after a rollback, when it
+  fails with a deadlock or serialization error or a RetryableConflict,
+  sleeping a jittered exponential backoff in between. After
+  TRANSACTION_MAX_ATTEMPTS a database failure answers 503.
+
+Runs, retries and give-ups per operation are counted in
+TRANSACTION_METRICS (GET /metrics/).
+"""
+import functools
+import random
+import time
+from collections.abc import Iterable
+
+from fastapi import HTTPException
+from sqlalchemy import select, tuple_
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.metrics import TransactionMetrics
+from app.models.inventory import Inventory
+
+# Tables in the order their rows are locked
+LOCK_ORDER = (
+    "locations",
+    "resource_deposits",
+    "production_jobs",
+    "market_orders",
+    "inventories",
+    "companies",
+)
+
+# Postgres SQLSTATEs worth retrying, by metrics reason
+RETRYABLE_SQLSTATES = {
+    "40P01": "deadlock",
+    "40001": "serialization",
+}
+
+# Session.info flag: a transactional call is already retrying on this session
+ACTIVE_KEY = "transactional"
+
+TRANSACTION_METRICS = TransactionMetrics()
+
+
+class RetryableConflict(HTTPException):
+    """A 409 that a fresh attempt is expected to resolve; retried like a deadlock."""
+
+    def __init__(self, detail: str):
+        super().__init__(status_code=409, detail=detail)
+
+
+def lock_rank(model) -> int:
+    return LOCK_ORDER.index(model.__tablename__)
+
+
+def lock_rows(db: Session, rows: dict[type, Iterable[int]]) -> dict[type, dict[int, object]]:
+    """
+    Lock rows of several tables by id in canonical order and return them.
+
+    FOR NO KEY UPDATE: keys never change, so inserts referencing the rows
+    (orders, trades, buildings) aren't blocked. Loaded objects are
+    refreshed with the values seen under the lock.
+    """
+    locked = {}
+    for model in sorted(rows, key=lock_rank):
+        ids = sorted(set(rows[model]))
+        locked[model] = {
+            obj.id: obj
+            for obj in db.scalars(
+                select(model)
+                .where(model.id.in_(ids))
+                .order_by(model.id)
+                .with_for_update(key_share=True)
+                .execution_options(populate_existing=True)
+            )
+        } if ids else {}
+    return locked
+
+
+def lock_inventories(db: Session, keys: Iterable[tuple[int, int]]) -> dict[tuple[int, int], Inventory]:
+    """Lock the existing inventories of (company_id, good_id) pairs, in id order."""
+    keys = sorted(set(keys))
+    if not keys:
+        return {}
+    return {
+        (inventory.company_id, inventory.good_id): inventory
+        for inventory in db.scalars(
+            select(Inventory)
+            .where(tuple_(Inventory.company_id, Inventory.good_id).in_(keys))
+            .order_by(Inventory.id)
+            .with_for_update(key_share=True)
+            .execution_options(populate_existing=True)
+        )
+    }
+
+
+def _retry_reason(exc: Exception) -> str | None:
+    if isinstance(exc, RetryableConflict):
+        return "conflict"
+    if isinstance(exc, DBAPIError):
+        # psycopg2 names it pgcode, asyncpg sqlstate
+        code = getattr(exc.orig, "pgcode", None) or getattr(exc.orig, "sqlstate", None)
+        return RETRYABLE_SQLSTATES.get(code)
+    return None
+
+
+def _backoff_seconds(attempt: int) -> float:
+    """Full jitter: contenders that failed together retry at different times."""
+    ceiling = min(settings.TRANSACTION_RETRY_MAX_MS, settings.TRANSACTION_RETRY_BASE_MS * 2 ** attempt)
+    return random.uniform(0, ceiling) / 1000
+
+
+def transactional(fn):
+    """
+    Retry `fn(db, ...)` (or `fn(..., db=...)`) on deadlocks and serialization failures.
+
+    `fn` must be a whole unit of work: everything it did is rolled back
+    before it runs again. Nested calls on the same session run once,
+    inside the outer call's retries.
+    """
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        db = kwargs["db"] if "db" in kwargs else args[0]
+        if db.info.get(ACTIVE_KEY):
+            return fn(*args, **kwargs)
+
+        operation = fn.__qualname__
+        TRANSACTION_METRICS.record(operation, "transactions")
+        db.info[ACTIVE_KEY] = True
+        try:
+            for attempt in range(1, settings.TRANSACTION_MAX_ATTEMPTS + 1):
+                try:
+                    return fn(*args, **kwargs)
+                except Exception as exc:
+                    reason = _retry_reason(exc)
+                    if reason is None:
+                        raise
+                    db.rollback()
+                    if attempt == settings.TRANSACTION_MAX_ATTEMPTS:
+                        TRANSACTION_METRICS.record(operation, "exhausted")
+                        if isinstance(exc, HTTPException):
+                            raise
+                        raise HTTPException(status_code=503, detail="Database contention, retry") from exc
+                    TRANSACTION_METRICS.record(operation, f"retry:{reason}")
+                    time.sleep(_backoff_seconds(attempt))
+        finally:
+            db.info.pop(ACTIVE_KEY, None)
+
+    return wrapper
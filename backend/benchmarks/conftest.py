@@ -0,0 +1,46 @@
+"""
+Microbenchmarks for the matching, tick, seeding and placement hot paths.
+
+    pip install -r requirements-dev.txt
+    pytest benchmarks --benchmark-autosave          # store a run in .benchmarks/
+    pytest benchmarks --benchmark-compare           # compare against the last stored run
+    BENCH_FULL=1 pytest benchmarks ...              # include the largest sizes
+
+Each benchmark gets a fresh in-memory SQLite database, so results measure
+Python/ORM cost rather than network or disk.
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("TERRAIN_CACHE_DIR", "/tmp/economy-bench-terrain")
+os.environ.setdefault("JOURNAL_DIR", "/tmp/economy-bench-journal")
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401  (registers every model)
+from app.db import Base
+
+# The largest sizes take minutes per benchmark; opt in with BENCH_FULL=1
+FULL = os.environ.get("BENCH_FULL") == "1"
+
+
+def sizes(default: list[int], full: list[int]) -> list[int]:
+    return default + full if FULL else default
+
+
+@pytest.fixture
+def db() -> Session:
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        yield session
+
+    engine.dispose()
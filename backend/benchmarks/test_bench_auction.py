@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, insert
+
+from app.models.company import Company
+from app.models.good import Good
+from app.models.inventory import Inventory
+from app.models.market_order import MarketOrder
+from app.services.auction import clear_auction
+from benchmarks.conftest import sizes
+
+AUCTION_SIZES = sizes([10, 100, 1_000, 10_000], [100_000])
+
+COMPANIES = 50
+
+
+def seed_companies(db) -> None:
+    """Companies that both buy and sell, each holding plenty of the good."""
+    db.add(Good(name="Iron Ore", primary_category="raw", rarity="common", market_mode="auction"))
+    db.add_all([Company(name=f"Company {c}", cash=10**15) for c in range(COMPANIES)])
+    db.flush()
+    db.add_all([
+        Inventory(company_id=c + 1, good_id=1, quantity=10**9, reserved=10**9)
+        for c in range(COMPANIES)
+    ])
+    db.commit()
+
+
+def seed_book(db, orders: int) -> None:
+    """`orders` buys and as many sells with overlapping limit prices."""
+    db.execute(delete(MarketOrder))
+    start = datetime(2025, 1, 1)
+    db.execute(insert(MarketOrder), [
+        {
+            "company_id": 1 + i % COMPANIES,
+            "good_id": 1,
+            "order_type": "buy" if i % 2 else "sell",
+            "quantity": 1 + i % 7,
+            "price_per_unit": 100 + i % 50 if i % 2 else 90 + i % 50,
+            "status": "open",
+            "created_at": start + timedelta(milliseconds=i),
+        }
+        for i in range(orders * 2)
+    ])
+    db.commit()
+
+
+@pytest.mark.parametrize("orders", AUCTION_SIZES)
+def test_clear_auction(benchmark, db, orders):
+    """One call auction over a crossed book of `orders` orders per side."""
+    seed_companies(db)
+
+    def fresh_book():
+        seed_book(db, orders)
+        return (db, 1), {}
+
+    result = benchmark.pedantic(clear_auction, setup=fresh_book, rounds=5)
+    assert result["volume"] > 0
@@ -0,0 +1,95 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import insert
+
+from app.models.building import Building
+from app.models.building_blueprint import BuildingBlueprint
+from app.models.company import Company
+from app.models.location import Location
+from app.models.planet import Planet
+from app.models.region import Region
+from app.models.star_system import StarSystem
+from app.models.universe import Universe
+from app.routers.buildings import BuildingPlacementRequest, has_collision
+from app.services.occupancy import OccupancyCache, OccupancyGrid
+
+GRID_SIZE = 256
+DENSITIES = [0.0, 0.25, 0.5, 0.9]
+PLACEMENT_CHECKS = 1_000
+BLUEPRINT = SimpleNamespace(grid_width=3, grid_height=2)
+
+
+def placements(count: int) -> list[BuildingPlacementRequest]:
+    rng = random.Random(0)
+    return [
+        BuildingPlacementRequest(
+            blueprint_id=1,
+            grid_x=rng.randrange(GRID_SIZE - 3),
+            grid_y=rng.randrange(GRID_SIZE - 3),
+            rotation=rng.choice((0, 90, 180, 270)),
+        )
+        for _ in range(count)
+    ]
+
+
+def occupied_tiles(density: float) -> list[tuple[int, int]]:
+    """Top-left corners of 2x2 buildings covering about `density` of the grid."""
+    rng = random.Random(1)
+    slots = [(x, y) for x in range(0, GRID_SIZE, 2) for y in range(0, GRID_SIZE, 2)]
+    return rng.sample(slots, int(len(slots) * density))
+
+
+@pytest.mark.parametrize("density", DENSITIES)
+def test_has_collision(benchmark, density):
+    """1,000 collision checks against a grid at the given building density."""
+    grid = OccupancyGrid(GRID_SIZE, GRID_SIZE)
+    for x, y in occupied_tiles(density):
+        grid.mark(x, y, 2, 2)
+
+    checks = placements(PLACEMENT_CHECKS)
+
+    def check_all():
+        return sum(has_collision(p, BLUEPRINT, grid) for p in checks)
+
+    benchmark(check_all)
+
+
+@pytest.mark.parametrize("density", DENSITIES)
+def test_occupancy_rebuild(benchmark, db, density):
+    """Cold occupancy lookup: one query plus marking every footprint."""
+    db.add(Universe(name="Bench Universe"))
+    db.flush()
+    db.add(Region(name="Region", universe_id=1, x=0, y=0, z=0))
+    db.flush()
+    db.add(StarSystem(name="System", region_id=1, x=0, y=0, z=0))
+    db.flush()
+    db.add(Planet(name="Planet", star_system_id=1, biome="Temperate", radius=1000, total_resources=0))
+    db.add(Company(name="Owner", cash=0))
+    db.flush()
+
+    location = Location(
+        name="Plot", planet_id=1, x=0, y=0, biome="Temperate",
+        grid_width=GRID_SIZE, grid_height=GRID_SIZE, claimed_by_company_id=1,
+    )
+    db.add(location)
+    db.add(BuildingBlueprint(
+        name="Depot", role="Storage", category="Storage",
+        construction_cost={}, grid_width=2, grid_height=2,
+    ))
+    db.flush()
+
+    tiles = occupied_tiles(density)
+    if tiles:
+        db.execute(insert(Building), [
+            {
+                "blueprint_id": 1, "name": "Depot", "owner_company_id": 1,
+                "location_id": location.id, "grid_x": x, "grid_y": y,
+                "rotation": 0, "status": "active",
+            }
+            for x, y in tiles
+        ])
+    db.commit()
+
+    benchmark(lambda: OccupancyCache().get(db, location))
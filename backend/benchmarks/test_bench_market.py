@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, update
+
+from app.models.company import Company
+from app.models.good import Good
+from app.models.inventory import Inventory
+from app.models.market_order import MarketOrder
+from app.services.market import try_execute_order
+from app.services.orders import expire_orders, place_orders
+from benchmarks.conftest import sizes
+
+BOOK_DEPTHS = sizes([10, 100, 1_000, 10_000], [100_000])
+BATCH_SIZES = sizes([10, 100, 500], [])
+EXPIRY_BATCHES = sizes([100, 1_000], [10_000])
+
+
+def seed_book(db, depth: int) -> None:
+    """One buyer with deep pockets and `depth` resting sell orders."""
+    db.add_all([
+        Company(name="Buyer", cash=10**15),
+        Company(name="Seller", cash=0),
+        Good(name="Iron Ore", primary_category="raw", rarity="common"),
+    ])
+    db.flush()
+
+    db.add(Inventory(company_id=2, good_id=1, quantity=depth * 10, reserved=depth * 10))
+
+    start = datetime(2025, 1, 1)
+    db.execute(insert(MarketOrder), [
+        {
+            "company_id": 2,
+            "good_id": 1,
+            "order_type": "sell",
+            "quantity": 10,
+            "price_per_unit": 100 + i % 50,
+            "status": "open",
+            "created_at": start + timedelta(milliseconds=i),
+        }
+        for i in range(depth)
+    ])
+    db.commit()
+
+
+@pytest.mark.parametrize("depth", BOOK_DEPTHS)
+def test_try_execute_order(benchmark, db, depth):
+    """A marketable 1-unit buy against a book where every ask crosses."""
+    seed_book(db, depth)
+
+    def incoming_buy():
+        order = MarketOrder(
+            company_id=1, good_id=1, order_type="buy",
+            quantity=1, price_per_unit=1_000, status="open",
+        )
+        db.add(order)
+        db.flush()
+        return (db, order), {}
+
+    benchmark.pedantic(try_execute_order, setup=incoming_buy, rounds=20)
+
+
+@pytest.mark.parametrize("size", BATCH_SIZES)
+def test_place_orders(benchmark, db, size):
+    """A market maker replacing `size` quotes around a 1,000-order book."""
+    seed_book(db, 1_000)
+    db.get(Inventory, 1).quantity += 10**9
+
+    def refresh():
+        return (db, 2, [
+            {"good_id": 1, "order_type": "sell", "quantity": 1, "price_per_unit": 200 + i}
+            for i in range(size)
+        ]), {"replace": True}
+
+    benchmark.pedantic(place_orders, setup=refresh, rounds=10)
+
+
+@pytest.mark.parametrize("size", EXPIRY_BATCHES)
+def test_expire_orders(benchmark, db, size):
+    """One sweep batch cancelling `size` expired asks and releasing their reservations."""
+    seed_book(db, size)
+
+    def reopen():
+        db.execute(update(MarketOrder).values(status="open", expires_at=datetime(2025, 1, 2)))
+        db.get(Inventory, 1).reserved = size * 10
+        db.commit()
+        return (db, size), {}
+
+    benchmark.pedantic(expire_orders, setup=reopen, rounds=5)
@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from app.models.planet import Planet
+from app.models.region import Region
+from app.models.star_system import StarSystem
+from app.models.universe import Universe
+from app.scripts.seed_universe import (
+    populate_location_edge_neighbors,
+    seed_locations_and_resources,
+)
+from benchmarks.conftest import sizes
+
+LOCATIONS_PER_PLANET = sizes([10, 100, 500], [2_000])
+
+
+def new_planet(db, index: int) -> Planet:
+    if db.get(StarSystem, 1) is None:
+        db.add(Universe(name="Bench Universe"))
+        db.flush()
+        db.add(Region(name="Forgeheart Dominion", universe_id=1, x=0, y=0, z=0))
+        db.flush()
+        db.add(StarSystem(name="Forge Prime", region_id=1, x=0, y=0, z=0))
+        db.flush()
+
+    planet = Planet(
+        name=f"Planet {index}", star_system_id=1, biome="Temperate",
+        radius=6371, total_resources=10_000_000,
+    )
+    db.add(planet)
+    db.flush()
+    return planet
+
+
+@pytest.mark.parametrize("locations", LOCATIONS_PER_PLANET)
+def test_seed_locations_and_resources(benchmark, db, locations):
+    """Seeding one planet, including its edge-neighbour pass."""
+    planets = iter(range(10**6))
+
+    def fresh_planet():
+        random.seed(0)
+        return (db, new_planet(db, next(planets)), locations), {}
+
+    benchmark.pedantic(seed_locations_and_resources, setup=fresh_planet, rounds=3)
+
+
+@pytest.mark.parametrize("locations", LOCATIONS_PER_PLANET)
+def test_populate_location_edge_neighbors(benchmark, db, locations):
+    random.seed(0)
+    planet = new_planet(db, 0)
+    seed_locations_and_resources(db, planet, locations)
+    db.flush()
+
+    benchmark.pedantic(populate_location_edge_neighbors, args=(db, planet), rounds=3)
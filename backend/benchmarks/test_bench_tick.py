@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, insert
+
+from app.models.company import Company
+from app.models.good import Good
+from app.models.inventory import Inventory
+from app.models.production_job import ProductionJob
+from app.services.production import complete_finished_jobs
+from benchmarks.conftest import sizes
+
+JOB_COUNTS = sizes([1_000, 10_000], [100_000, 1_000_000])
+
+COMPANIES = 100
+GOODS = 5
+
+
+def seed_companies(db) -> None:
+    db.add_all([Company(name=f"Company {c}", cash=0) for c in range(COMPANIES)])
+    db.add_all([
+        Good(name=f"Good {g}", primary_category="raw", rarity="common")
+        for g in range(GOODS)
+    ])
+    db.flush()
+    db.execute(insert(Inventory), [
+        {"company_id": c, "good_id": g, "quantity": 0, "reserved": 0}
+        for c in range(1, COMPANIES + 1)
+        for g in range(1, GOODS + 1)
+    ])
+    db.commit()
+
+
+@pytest.mark.parametrize("jobs", JOB_COUNTS)
+def test_complete_finished_jobs(benchmark, db, jobs):
+    """
+    One production tick where `jobs` jobs have finished.
+
+    tick_extraction/tick_production (app/simulation) are not benchmarked:
+    the ExtractionSite and ProductionBuilding models they load are not in
+    the tree yet. Job completion is the production tick that runs today.
+    """
+    seed_companies(db)
+    finished = datetime.utcnow() - timedelta(minutes=1)
+
+    def finished_jobs():
+        db.execute(delete(ProductionJob))
+        db.execute(insert(ProductionJob), [
+            {
+                "company_id": i % COMPANIES + 1,
+                "input_good_id": 1,
+                "output_good_id": i % GOODS + 1,
+                "input_quantity": 1,
+                "output_quantity": 1,
+                "started_at": finished,
+                "finishes_at": finished,
+                "status": "running",
+            }
+            for i in range(jobs)
+        ])
+        db.commit()
+        return (db,), {}
+
+    benchmark.pedantic(complete_finished_jobs, setup=finished_jobs, rounds=3)
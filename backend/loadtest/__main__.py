@@ -0,0 +1,86 @@
+"""
+End-to-end load test against a running API.
+
+    python -m loadtest --base-url http://localhost:8000 --profile standard \
+        --output loadtest-report.json
+
+Companies, stock and location claims are created before the clock starts;
+the API's database must already hold goods, blueprints and recipes (see
+app/scripts). Runs are reproducible for a given --seed and profile.
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+
+from loadtest.fixtures import prepare_world
+from loadtest.profiles import PROFILES
+from loadtest.stats import Recorder, format_report, write_report
+from loadtest.users import LoadContext, player, trader, viewer
+
+
+async def run(args: argparse.Namespace) -> dict:
+    profile = PROFILES[args.profile]
+    duration = args.duration or profile.duration_seconds
+    run_id = f"{args.seed}-{int(time.time())}"
+
+    users = profile.traders + profile.viewers + profile.players
+    limits = httpx.Limits(max_connections=users * 2, max_keepalive_connections=users)
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        world = await prepare_world(client, profile, run_id)
+
+        recorder = Recorder()
+        ctx = LoadContext(client, recorder, profile, world)
+
+        def rng(kind: str, index: int) -> random.Random:
+            return random.Random(f"{args.seed}:{kind}:{index}")
+
+        coroutines = (
+            [trader(ctx, company_id, rng("trader", i)) for i, company_id in enumerate(world.trader_company_ids)]
+            + [viewer(ctx, rng("viewer", i)) for i in range(profile.viewers)]
+            + [player(ctx, company_id, rng("player", i)) for i, company_id in enumerate(world.player_company_ids)]
+        )
+        random.Random(args.seed).shuffle(coroutines)
+
+        async def start_after(delay: float, coroutine):
+            await asyncio.sleep(delay)
+            await coroutine
+
+        step = profile.ramp_seconds / max(len(coroutines), 1)
+        start = time.monotonic()
+        ctx.deadline = start + duration
+
+        await asyncio.gather(*(
+            start_after(i * step, coroutine) for i, coroutine in enumerate(coroutines)
+        ))
+
+        report = recorder.report(time.monotonic() - start)
+
+    report["profile"] = profile.name
+    report["seed"] = args.seed
+    report["base_url"] = args.base_url
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="standard")
+    parser.add_argument("--duration", type=float, help="Override the profile duration (seconds)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout (seconds)")
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+
+    print(format_report(report))
+    if args.output:
+        write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
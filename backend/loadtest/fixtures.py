@@ -0,0 +1,115 @@
+from dataclasses import dataclass, field
+
+import httpx
+
+from loadtest.profiles import Profile
+
+# Stock granted to every simulated company for each traded good
+STARTING_STOCK = 100_000
+
+
+@dataclass
+class World:
+    """Ids the simulated users act on, created before the run starts."""
+
+    good_ids: list[int]
+    trader_company_ids: list[int]
+    player_company_ids: list[int]
+    # company id -> claimed location id (missing when claiming was unavailable)
+    player_locations: dict[int, int] = field(default_factory=dict)
+    recipe_ids: list[int] = field(default_factory=list)
+    blueprint_ids: list[int] = field(default_factory=list)
+
+
+async def _create_company(client: httpx.AsyncClient, name: str) -> int:
+    response = await client.post("/companies/", json={"name": name})
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+async def _add_inventory(client: httpx.AsyncClient, company_id: int, good_id: int, quantity: int) -> None:
+    response = await client.post(
+        "/admin/inventory/add",
+        params={"company_id": company_id, "good_id": good_id, "quantity": quantity},
+    )
+    response.raise_for_status()
+
+
+def _claim_locations_and_load_recipes(company_ids: list[int]) -> tuple[dict[int, int], list[tuple[int, int]]]:
+    """
+    Claim one free location per player company and list recipes.
+
+    Done through the database: the claim endpoint cannot be used yet
+    (Company has no home_location_id) and recipe list responses don't
+    validate. Requires the same DATABASE_URL as the API.
+    """
+    from sqlalchemy import select
+
+    from app.db import SessionLocal
+    from app.models.location import Location
+    from app.models.production_recipe import ProductionRecipe
+
+    with SessionLocal() as db:
+        locations = db.scalars(
+            select(Location)
+            .where(Location.claimed_by_company_id.is_(None))
+            .order_by(Location.id)
+            .limit(len(company_ids))
+        ).all()
+
+        claims = {}
+        for company_id, location in zip(company_ids, locations):
+            location.claimed_by_company_id = company_id
+            claims[company_id] = location.id
+
+        recipes = db.execute(
+            select(ProductionRecipe.id, ProductionRecipe.input_good_id)
+        ).all()
+
+        db.commit()
+
+    return claims, [(recipe_id, good_id) for recipe_id, good_id in recipes]
+
+
+async def prepare_world(client: httpx.AsyncClient, profile: Profile, run_id: str) -> World:
+    """Create the companies, stock and claims a profile needs through the API."""
+    goods = (await client.get("/goods/")).json()
+    if not goods:
+        raise SystemExit("No goods found; seed the database first (app/scripts/seed_goods.py)")
+
+    good_ids = [g["id"] for g in goods[:profile.goods]]
+
+    trader_ids = [
+        await _create_company(client, f"loadtest-{run_id}-trader-{i}")
+        for i in range(profile.traders)
+    ]
+    player_ids = [
+        await _create_company(client, f"loadtest-{run_id}-player-{i}")
+        for i in range(profile.players)
+    ]
+
+    for company_id in trader_ids:
+        for good_id in good_ids:
+            await _add_inventory(client, company_id, good_id, STARTING_STOCK)
+
+    world = World(
+        good_ids=good_ids,
+        trader_company_ids=trader_ids,
+        player_company_ids=player_ids,
+        blueprint_ids=[b["id"] for b in (await client.get("/buildings/blueprints")).json()],
+    )
+
+    if player_ids:
+        try:
+            world.player_locations, recipes = _claim_locations_and_load_recipes(player_ids)
+        except Exception as exc:
+            print(f"Skipping location claims and production ({exc}); players will only browse")
+            recipes = []
+
+        world.recipe_ids = [recipe_id for recipe_id, _ in recipes]
+        input_goods = {good_id for _, good_id in recipes}
+        for company_id in player_ids:
+            for good_id in input_goods:
+                await _add_inventory(client, company_id, good_id, STARTING_STOCK)
+
+    return world
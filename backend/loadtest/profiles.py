@@ -0,0 +1,32 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Profile:
+    """How many simulated users of each kind run, and for how long."""
+
+    name: str
+    traders: int  # place and cancel market orders
+    viewers: int  # poll the market page like Market.tsx
+    players: int  # browse their location, place buildings, run production
+    duration_seconds: float
+    ramp_seconds: float  # users start evenly spread over this window
+    goods: int = 10  # distinct goods traded
+    order_interval: float = 1.0  # seconds between a trader's orders
+    build_interval: float = 5.0  # seconds between a player's build/production actions
+
+
+PROFILES = {
+    "smoke": Profile(
+        name="smoke", traders=2, viewers=2, players=1,
+        duration_seconds=15, ramp_seconds=2, goods=3,
+    ),
+    "standard": Profile(
+        name="standard", traders=50, viewers=200, players=25,
+        duration_seconds=120, ramp_seconds=20,
+    ),
+    "stress": Profile(
+        name="stress", traders=250, viewers=2000, players=100,
+        duration_seconds=300, ramp_seconds=60, goods=25, order_interval=0.5,
+    ),
+}
@@ -0,0 +1,95 @@
+import json
+from collections import defaultdict
+
+
+def percentile(sorted_values: list[float], q: float) -> float | None:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(int(round(q * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.status_counts: dict[int, int] = defaultdict(int)
+        self.failures = 0  # transport errors (timeouts, refused connections)
+
+    def summary(self, elapsed: float) -> dict:
+        latencies = sorted(self.latencies)
+        requests = len(latencies) + self.failures
+        return {
+            "requests": requests,
+            "rps": requests / elapsed if elapsed else 0.0,
+            "p50_ms": _ms(percentile(latencies, 0.50)),
+            "p95_ms": _ms(percentile(latencies, 0.95)),
+            "p99_ms": _ms(percentile(latencies, 0.99)),
+            "max_ms": _ms(latencies[-1] if latencies else None),
+            "4xx": sum(n for code, n in self.status_counts.items() if 400 <= code < 500),
+            "5xx": sum(n for code, n in self.status_counts.items() if code >= 500),
+            "failures": self.failures,
+        }
+
+
+def _ms(seconds: float | None) -> float | None:
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+
+class Recorder:
+    """Latency and status samples per endpoint (method + route template)."""
+
+    def __init__(self):
+        self.endpoints: dict[str, EndpointStats] = defaultdict(EndpointStats)
+
+    def record(self, endpoint: str, seconds: float, status_code: int) -> None:
+        stats = self.endpoints[endpoint]
+        stats.latencies.append(seconds)
+        stats.status_counts[status_code] += 1
+
+    def failure(self, endpoint: str) -> None:
+        self.endpoints[endpoint].failures += 1
+
+    def report(self, elapsed: float) -> dict:
+        endpoints = {
+            name: stats.summary(elapsed)
+            for name, stats in sorted(self.endpoints.items())
+        }
+        total = sum(s["requests"] for s in endpoints.values())
+        return {
+            "elapsed_seconds": round(elapsed, 2),
+            "total_requests": total,
+            "total_rps": total / elapsed if elapsed else 0.0,
+            "endpoints": endpoints,
+        }
+
+
+def format_report(report: dict) -> str:
+    header = (
+        f"{'endpoint':<48} {'reqs':>7} {'rps':>8} {'p50':>8} {'p95':>8} "
+        f"{'p99':>8} {'max':>8} {'4xx':>6} {'5xx':>6} {'fail':>6}"
+    )
+    lines = [header, "-" * len(header)]
+
+    for name, s in report["endpoints"].items():
+        lines.append(
+            f"{name:<48} {s['requests']:>7} {s['rps']:>8.1f} "
+            f"{_fmt(s['p50_ms'])} {_fmt(s['p95_ms'])} {_fmt(s['p99_ms'])} {_fmt(s['max_ms'])} "
+            f"{s['4xx']:>6} {s['5xx']:>6} {s['failures']:>6}"
+        )
+
+    lines.append("-" * len(header))
+    lines.append(
+        f"{report['total_requests']} requests in {report['elapsed_seconds']}s "
+        f"({report['total_rps']:.1f} req/s); latencies in ms"
+    )
+    return "\n".join(lines)
+
+
+def _fmt(value: float | None) -> str:
+    return f"{value:>8.1f}" if value is not None else f"{'-':>8}"
+
+
+def write_report(report: dict, path: str) -> None:
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
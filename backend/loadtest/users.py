@@ -0,0 +1,156 @@
+import asyncio
+import random
+import time
+
+import httpx
+
+from loadtest.fixtures import World
+from loadtest.profiles import Profile
+from loadtest.stats import Recorder
+
+# Open orders a trader keeps before cancelling its oldest one
+MAX_OPEN_ORDERS_PER_TRADER = 5
+
+
+class LoadContext:
+    """State shared by every simulated user during one run."""
+
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, profile: Profile, world: World):
+        self.client = client
+        self.recorder = recorder
+        self.profile = profile
+        self.world = world
+        self.deadline = 0.0
+        # Reference price per good; random-walked by traders so books keep crossing
+        self.mid_prices = {good_id: 100.0 for good_id in world.good_ids}
+
+    def running(self) -> bool:
+        return time.monotonic() < self.deadline
+
+    async def pause(self, seconds: float, rng: random.Random) -> None:
+        await asyncio.sleep(seconds * rng.uniform(0.8, 1.2))
+
+    async def call(self, method: str, endpoint: str, url: str, **kwargs) -> httpx.Response | None:
+        """Send one request and record it under `endpoint` (the route template)."""
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.recorder.failure(endpoint)
+            return None
+        self.recorder.record(endpoint, time.perf_counter() - start, response.status_code)
+        return response
+
+
+async def trader(ctx: LoadContext, company_id: int, rng: random.Random) -> None:
+    """Places limit orders around a drifting mid price and cancels stale ones."""
+    open_orders: list[int] = []
+
+    while ctx.running():
+        good_id = rng.choice(ctx.world.good_ids)
+        mid = ctx.mid_prices[good_id] * rng.uniform(0.99, 1.01)
+        ctx.mid_prices[good_id] = mid
+
+        response = await ctx.call(
+            "POST", "POST /market/orders/{company_id}", f"/market/orders/{company_id}",
+            json={
+                "good_id": good_id,
+                "order_type": rng.choice(("buy", "sell")),
+                "quantity": rng.randint(1, 10),
+                "price_per_unit": max(1, round(mid * rng.uniform(0.95, 1.05))),
+            },
+        )
+        if response is not None and response.status_code == 200:
+            order = response.json()
+            if order["status"] == "open":
+                open_orders.append(order["id"])
+
+        if len(open_orders) > MAX_OPEN_ORDERS_PER_TRADER:
+            order_id = open_orders.pop(0)
+            await ctx.call(
+                "POST", "POST /market/orders/{order_id}/cancel",
+                f"/market/orders/{order_id}/cancel", params={"company_id": company_id},
+            )
+
+        await ctx.pause(ctx.profile.order_interval, rng)
+
+
+async def viewer(ctx: LoadContext, rng: random.Random) -> None:
+    """Polls the market page the way Market.tsx does."""
+    await ctx.call("GET", "GET /goods/", "/goods/")
+
+    good_id = rng.choice(ctx.world.good_ids)
+    await ctx.call(
+        "GET", "GET /market/candles/{good_id}", f"/market/candles/{good_id}",
+        params={"minutes": 60},
+    )
+
+    tick = 0
+    while ctx.running():
+        if tick % 2 == 0:
+            await asyncio.gather(
+                ctx.call("GET", "GET /market/orders", "/market/orders"),
+                ctx.call("GET", "GET /market/orderbook/{good_id}", f"/market/orderbook/{good_id}"),
+                ctx.call("GET", "GET /market/stats/{good_id}", f"/market/stats/{good_id}"),
+            )
+        if tick % 3 == 0:
+            await ctx.call("GET", "GET /market/trades/", "/market/trades/")
+
+        # Switching goods reloads the chart
+        if rng.random() < 0.02:
+            good_id = rng.choice(ctx.world.good_ids)
+            await ctx.call(
+                "GET", "GET /market/candles/{good_id}", f"/market/candles/{good_id}",
+                params={"minutes": 60},
+            )
+
+        tick += 1
+        await asyncio.sleep(1.0)
+
+
+async def player(ctx: LoadContext, company_id: int, rng: random.Random) -> None:
+    """Opens its location, then keeps placing buildings and starting production."""
+    location_id = ctx.world.player_locations.get(company_id)
+
+    if location_id is None:
+        # Nothing claimed: browse the map instead
+        while ctx.running():
+            await ctx.call("GET", "GET /map/", "/map/", params={"limit": 100})
+            await ctx.call("GET", "GET /locations/", "/locations/", params={"limit": 100})
+            await ctx.pause(ctx.profile.build_interval, rng)
+        return
+
+    location = await ctx.call("GET", "GET /locations/{location_id}", f"/locations/{location_id}")
+    await ctx.call("GET", "GET /tilemap/location/{location_id}", f"/tilemap/location/{location_id}")
+    await ctx.call(
+        "GET", "GET /tilemap/location/{location_id}/buildability",
+        f"/tilemap/location/{location_id}/buildability",
+    )
+
+    grid = location.json() if location is not None and location.status_code == 200 else {}
+    width, height = grid.get("grid_width", 256), grid.get("grid_height", 256)
+
+    while ctx.running():
+        if ctx.world.blueprint_ids:
+            # Rejections (terrain, collisions) are expected and show up as 4xx
+            await ctx.call(
+                "POST", "POST /buildings/location/{location_id}",
+                f"/buildings/location/{location_id}", params={"company_id": company_id},
+                json={
+                    "blueprint_id": rng.choice(ctx.world.blueprint_ids),
+                    "grid_x": rng.randrange(width),
+                    "grid_y": rng.randrange(height),
+                    "rotation": rng.choice((0, 90, 180, 270)),
+                },
+            )
+        await ctx.call("GET", "GET /buildings/location/{location_id}", f"/buildings/location/{location_id}")
+
+        if ctx.world.recipe_ids:
+            await ctx.call(
+                "POST", "POST /production/start/{company_id}",
+                f"/production/start/{company_id}",
+                params={"recipe_id": rng.choice(ctx.world.recipe_ids)},
+            )
+        await ctx.call("GET", "GET /production/{company_id}", f"/production/{company_id}")
+
+        await ctx.pause(ctx.profile.build_interval, rng)
@@ -0,0 +1,194 @@
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+# Point both engines at a throwaway SQLite file before the app is imported
+_TMP_DIR = tempfile.mkdtemp(prefix="economy-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP_DIR}/test.sqlite"
+os.environ["TERRAIN_CACHE_DIR"] = os.path.join(_TMP_DIR, "terrain")
+os.environ["JOURNAL_DIR"] = os.path.join(_TMP_DIR, "journal")
+os.environ["SQL_ECHO"] = "false"
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+import app.models  # noqa: F401  (registers every model)
+from app.db import Base, SessionLocal, async_engine, engine
+from app.main import app
+from app.models.building import Building
+from app.models.building_blueprint import BuildingBlueprint
+from app.models.company import Company
+from app.models.good import Good
+from app.models.inventory import Inventory
+from app.models.location import Location
+from app.models.market_order import MarketOrder
+from app.models.market_trade import MarketTrade
+from app.models.planet import Planet
+from app.models.production_job import ProductionJob
+from app.models.production_recipe import ProductionRecipe
+from app.models.region import Region
+from app.models.resource_deposit import ResourceDeposit
+from app.models.star_system import StarSystem
+from app.models.universe import Universe
+from app.services.occupancy import OCCUPANCY_CACHE
+from app.services.orders import RECENT_ORDERS
+from app.services.quotes import QUOTE_BOOK
+from app.services.reference_cache import BUILDING_BLUEPRINTS, GOODS, PRODUCTION_RECIPES
+
+# Seed scales; an N+1 shows up as a different statement count between them
+SEED_SCALES = (3, 30)
+
+
+def _date_trunc(unit: str, value: str | None) -> str | None:
+    """SQLite stand-in for Postgres date_trunc on ISO timestamps."""
+    if value is None:
+        return None
+    keep = {"day": 10, "hour": 13, "minute": 16, "second": 19}[unit]
+    return value[:keep]
+
+
+@event.listens_for(engine, "connect")
+def _register_sqlite_functions(dbapi_connection, connection_record):
+    dbapi_connection.create_function("date_trunc", 2, _date_trunc)
+
+
+class QueryCounter:
+    """Counts statements executed on the sync and async engines."""
+
+    def __init__(self):
+        self.count = 0
+        for target in (engine, async_engine.sync_engine):
+            event.listen(target, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def measure(self, fn):
+        start = self.count
+        result = fn()
+        return result, self.count - start
+
+
+def seed(scale: int) -> None:
+    """
+    Rebuild the schema and fill it with `scale`-sized data.
+
+    Company 1 owns location 1 and holds every good; every list an
+    endpoint walks (locations, deposits, buildings, orders, trade
+    buckets, systems) grows linearly with `scale`.
+    """
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    for catalog in (GOODS, BUILDING_BLUEPRINTS, PRODUCTION_RECIPES, QUOTE_BOOK, RECENT_ORDERS, OCCUPANCY_CACHE):
+        catalog.invalidate()
+
+    now = datetime.utcnow()
+
+    with SessionLocal() as db:
+        db.add(Universe(name="Test Universe"))
+        db.flush()
+
+        for r in range(2):
+            db.add(Region(name=f"Region {r}", universe_id=1, x=r * 10_000, y=0, z=0))
+        db.flush()
+
+        for s in range(scale):
+            db.add(StarSystem(name=f"System {s}", region_id=s % 2 + 1, x=s, y=s, z=s))
+        db.flush()
+
+        for p in range(scale):
+            db.add(Planet(
+                name=f"Planet {p}", star_system_id=p + 1, biome="Temperate",
+                radius=1000, total_resources=1000,
+            ))
+        db.flush()
+
+        db.add_all([Company(name=f"Company {c}", cash=1_000_000) for c in range(scale)])
+        db.add_all([
+            Good(name=f"Good {g}", primary_category="raw", rarity="common")
+            for g in range(5)
+        ])
+        db.flush()
+
+        for l in range(scale * 4):
+            location = Location(
+                name=f"Location {l}", planet_id=l % scale + 1, x=l, y=l,
+                biome="Temperate", grid_width=128, grid_height=128,
+                tilemap_seed=1000 + l,
+                claimed_by_company_id=1 if l == 0 else None,
+            )
+            location.resource_deposits = [
+                ResourceDeposit(resource_type=f"Good {d}", quantity=100, rarity="common")
+                for d in range(3)
+            ]
+            db.add(location)
+
+        for company_id in range(1, scale + 1):
+            for good_id in range(1, 6):
+                db.add(Inventory(
+                    company_id=company_id, good_id=good_id, quantity=1_000, reserved=0,
+                ))
+
+        # Non-crossing book so new orders rest instead of matching
+        for i in range(scale):
+            db.add(MarketOrder(
+                company_id=i + 1, good_id=1, order_type="buy",
+                quantity=10, price_per_unit=10 + i % 10, status="open",
+            ))
+            db.add(MarketOrder(
+                company_id=i + 1, good_id=1, order_type="sell",
+                quantity=10, price_per_unit=100 + i % 10, status="open",
+            ))
+
+        # One trade per minute, so candles have `scale` buckets
+        for i in range(scale):
+            db.add(MarketTrade(
+                good_id=1, buyer_company_id=1, seller_company_id=2 if scale > 1 else 1,
+                quantity=1, price_per_unit=50 + i,
+                created_at=now - timedelta(minutes=i),
+            ))
+
+        db.add(BuildingBlueprint(
+            name="Test Smelter", role="Processing", category="Processing",
+            construction_cost={"Good 0": 10}, grid_width=1, grid_height=1,
+        ))
+        db.add_all([
+            ProductionRecipe(
+                input_good_id=1, input_quantity=1, output_good_id=2,
+                output_quantity=1, duration_seconds=3600,
+            ),
+            ProductionRecipe(
+                input_good_id=2, input_quantity=1, output_good_id=3,
+                output_quantity=1, duration_seconds=3600,
+            ),
+        ])
+        db.flush()
+
+        for i in range(scale):
+            db.add(Building(
+                blueprint_id=1, name="Test Smelter", owner_company_id=1,
+                location_id=1, grid_x=i % 100, grid_y=100 + i // 100,
+                rotation=0, status="active", current_capacity=0,
+                current_efficiency=1.0,
+            ))
+            db.add(ProductionJob(
+                company_id=1, input_good_id=1, output_good_id=2,
+                input_quantity=1, output_quantity=1, started_at=now,
+                finishes_at=now + timedelta(hours=1), status="running",
+            ))
+
+        db.commit()
+
+
+@pytest.fixture(scope="session")
+def client() -> TestClient:
+    # Server errors surface as 500s on the failing case instead of aborting the run
+    with TestClient(app, raise_server_exceptions=False) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def query_counter() -> QueryCounter:
+    return QueryCounter()
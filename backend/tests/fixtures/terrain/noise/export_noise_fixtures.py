@@ -0,0 +1,47 @@
+"""
+Writes FastNoiseLite samples from the reference C library for test_terrain.py.
+
+Godot's FastNoiseLite resource wraps the same library, so these pin the
+noise the client's terrain generator builds on (TYPE_SIMPLEX, FRACTAL_FBM,
+Godot's default frequency and octaves). Needs pyfastnoiselite, which the
+app itself does not:
+
+    pip install pyfastnoiselite
+    python tests/fixtures/terrain/noise/export_noise_fixtures.py
+"""
+import json
+import os
+
+import numpy as np
+from pyfastnoiselite.pyfastnoiselite import FastNoiseLite, FractalType, NoiseType
+
+SEEDS = [1, 42, 12345, 2147483647, -7]
+# Spans negative coordinates (FastFloor) and several noise cells per octave
+AXIS = np.linspace(-512.0, 1536.0, 24, dtype=np.float32)
+
+
+def main() -> None:
+    xs, ys = np.meshgrid(AXIS, AXIS)
+    points = np.vstack([xs.ravel(), ys.ravel()]).astype(np.float32)
+    directory = os.path.dirname(os.path.abspath(__file__))
+
+    for seed in SEEDS:
+        noise = FastNoiseLite(seed)
+        noise.noise_type = NoiseType.NoiseType_OpenSimplex2
+        noise.fractal_type = FractalType.FractalType_FBm
+        noise.frequency = 0.01
+        noise.fractal_octaves = 5
+        noise.fractal_lacunarity = 2.0
+        noise.fractal_gain = 0.5
+
+        with open(os.path.join(directory, f"seed_{seed}.json"), "w") as f:
+            json.dump({
+                "seed": seed,
+                "x": points[0].tolist(),
+                "y": points[1].tolist(),
+                "noise": noise.gen_from_coords(points).tolist(),
+            }, f)
+
+
+if __name__ == "__main__":
+    main()
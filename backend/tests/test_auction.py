@@ -0,0 +1,80 @@
+"""Call auction clearing price, fill allocation and the market mode orders are matched under."""
+import numpy as np
+from sqlalchemy import update
+
+from app.db import SessionLocal
+from app.models.good import Good
+from app.services.auction import allocate, clearing_price
+from app.services.reference_cache import GOODS
+from tests.conftest import seed
+
+
+def _clear(buys, sells):
+    buy_prices, buy_quantities = np.array(buys, dtype=np.int64).reshape(-1, 2).T
+    sell_prices, sell_quantities = np.array(sells, dtype=np.int64).reshape(-1, 2).T
+    return clearing_price(buy_prices, buy_quantities, sell_prices, sell_quantities)
+
+
+def test_price_maximises_volume():
+    # Volume 4 at 9-10, 5 at 11-12; equal imbalance, so the lower middle price
+    assert _clear([(12, 5), (10, 5)], [(9, 4), (11, 6)]) == (11, 5)
+
+
+def test_volume_tie_goes_to_smallest_imbalance():
+    # Volume 10 at 10, 11 and 12; demand meets supply exactly only at 10
+    assert _clear([(12, 10)], [(8, 6), (10, 4), (11, 3)]) == (10, 10)
+
+
+def test_remaining_tie_goes_to_middle_price():
+    # Orders outside the crossing range add candidates but no volume
+    assert _clear([(12, 10), (7, 5)], [(8, 10), (13, 5)]) == (8, 10)
+    # Volume 10 with no imbalance at 9, 10 and 12
+    assert _clear([(12, 10)], [(8, 5), (9, 5), (10, 0)]) == (10, 10)
+
+
+def test_no_crossing():
+    assert _clear([(10, 5)], [(11, 5)]) == (None, 0)
+    assert _clear([], [(11, 5)]) == (None, 0)
+    assert _clear([(10, 5)], []) == (None, 0)
+
+
+def test_allocate_fills_in_priority_order():
+    quantities = np.array([5, 3, 4])
+
+    assert allocate(quantities, 6).tolist() == [5, 1, 0]
+    assert allocate(quantities, 0).tolist() == [0, 0, 0]
+    assert allocate(quantities, 12).tolist() == [5, 3, 4]
+    assert allocate(quantities, 20).tolist() == [5, 3, 4]
+
+
+def _cross(client) -> list[str]:
+    """Place a crossing buy and sell of good 2; the statuses they end up with."""
+    statuses = []
+    for company_id, side, price in ((1, "buy", 60), (2, "sell", 40)):
+        order = {"good_id": 2, "order_type": side, "quantity": 5, "price_per_unit": price}
+        statuses.append(client.post(f"/market/orders/{company_id}", json=order).json()["status"])
+    return statuses
+
+
+def _set_mode_elsewhere(mode: str) -> None:
+    """Change good 2's mode as another process would: this process's GOODS is not invalidated."""
+    with SessionLocal() as db:
+        db.execute(update(Good).where(Good.id == 2).values(market_mode=mode))
+        db.commit()
+
+
+def test_matching_reads_the_mode_past_a_stale_catalog(client):
+    seed(3)
+    with SessionLocal() as db:
+        assert GOODS.get(db, 2).market_mode == "continuous"
+
+    _set_mode_elsewhere("auction")
+    assert _cross(client) == ["open", "open"]
+    assert client.post("/admin/goods/2/auction").json()["volume"] == 5
+
+    GOODS.invalidate()
+    with SessionLocal() as db:
+        assert GOODS.get(db, 2).market_mode == "auction"
+    _set_mode_elsewhere("continuous")
+    assert _cross(client) == ["open", "filled"]
+    assert client.post("/admin/goods/2/auction").status_code == 400
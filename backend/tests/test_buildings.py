@@ -0,0 +1,159 @@
+"""Building placement: responses, occupancy-based collisions and atomic batches."""
+import random
+
+import pytest
+from sqlalchemy import func, select
+
+from app.db import SessionLocal
+from app.models.building import Building
+from app.models.building_blueprint import BuildingBlueprint
+from app.services.reference_cache import BUILDING_BLUEPRINTS
+from tests.conftest import seed
+
+COLLISION = "Building placement collides with existing building"
+OUT_OF_BOUNDS = "Building placement out of bounds. Location grid: 128x128"
+
+
+@pytest.fixture(autouse=True)
+def seeded():
+    # Location 1 (128x128, company 1) has 1x1 smelters at (0, 100), (1, 100), (2, 100)
+    seed(3)
+    with SessionLocal() as db:
+        db.add(BuildingBlueprint(
+            name="Test Warehouse", role="Storage", category="Storage",
+            construction_cost={}, grid_width=3, grid_height=2,
+        ))
+        db.commit()
+    BUILDING_BLUEPRINTS.invalidate()
+
+
+def _place(client, blueprint_id, x, y, rotation=0):
+    return client.post("/buildings/location/1?company_id=1", json={
+        "blueprint_id": blueprint_id, "grid_x": x, "grid_y": y, "rotation": rotation,
+    })
+
+
+def _building_count() -> int:
+    with SessionLocal() as db:
+        return db.scalar(select(func.count(Building.id)))
+
+
+def test_place_returns_the_new_building(client):
+    response = _place(client, 2, 10, 20, rotation=90)
+
+    assert response.status_code == 200
+    building = response.json()
+    assert building == {
+        "id": 4, "blueprint_id": 2, "name": "Test Warehouse", "owner_company_id": 1, "location_id": 1,
+        "grid_x": 10, "grid_y": 20, "rotation": 90, "status": "constructing",
+        "current_capacity": 0, "current_efficiency": 1.0,
+    }
+    listed = client.get("/buildings/location/1").json()
+    assert [(b["id"], b["grid_x"], b["grid_y"]) for b in listed] == [
+        (1, 0, 100), (2, 1, 100), (3, 2, 100), (4, 10, 20),
+    ]
+
+
+def test_rotated_footprint_and_demolition(client):
+    assert _place(client, 2, 10, 20, rotation=90).status_code == 200  # 2 wide, 3 high
+
+    assert _place(client, 1, 11, 22).json()["detail"] == COLLISION
+    assert _place(client, 1, 12, 20).status_code == 200
+    assert _place(client, 1, 10, 23).status_code == 200
+    assert _place(client, 1, 2, 100).json()["detail"] == COLLISION
+    assert _place(client, 2, 126, 0).json()["detail"] == OUT_OF_BOUNDS
+    assert _place(client, 2, 127, 0, rotation=270).json()["detail"] == OUT_OF_BOUNDS
+
+    assert client.delete("/buildings/4?company_id=1").status_code == 200
+    assert _place(client, 1, 11, 22).status_code == 200
+
+
+def _overlaps(a, b) -> bool:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    return ax < bx + bw and bx < ax + aw and ay < by + bh and by < ay + ah
+
+
+def test_collisions_match_rectangle_overlap(client):
+    """The occupancy grid answers as the old building-by-building overlap scan did."""
+    sizes = {1: (1, 1), 2: (3, 2)}
+    placed = {1: (0, 100, 1, 1), 2: (1, 100, 1, 1), 3: (2, 100, 1, 1)}
+    rng = random.Random(7)
+
+    for _ in range(300):
+        if placed and rng.random() < 0.15:
+            building_id = rng.choice(sorted(placed))
+            assert client.delete(f"/buildings/{building_id}?company_id=1").status_code == 200
+            del placed[building_id]
+            continue
+
+        blueprint_id = rng.choice([1, 2])
+        rotation = rng.choice([0, 90, 180, 270])
+        width, height = sizes[blueprint_id][::-1] if rotation in (90, 270) else sizes[blueprint_id]
+        rect = (rng.randrange(120, 130), rng.randrange(0, 12), width, height)
+
+        response = _place(client, blueprint_id, rect[0], rect[1], rotation)
+
+        if rect[0] + width > 128:
+            assert response.json()["detail"] == OUT_OF_BOUNDS
+        elif any(_overlaps(rect, other) for other in placed.values()):
+            assert response.json()["detail"] == COLLISION
+        else:
+            assert response.status_code == 200
+            placed[response.json()["id"]] = rect
+
+    with SessionLocal() as db:
+        assert sorted(db.scalars(select(Building.id))) == sorted(placed)
+
+
+def test_batch_places_every_building_in_order(client):
+    response = client.post("/buildings/location/1/batch?company_id=1", json={"placements": [
+        {"blueprint_id": 2, "grid_x": 0, "grid_y": 0},
+        {"blueprint_id": 1, "grid_x": 3, "grid_y": 0},
+        {"blueprint_id": 2, "grid_x": 0, "grid_y": 2, "rotation": 180},
+    ]})
+
+    assert response.status_code == 200
+    assert [(b["id"], b["blueprint_id"], b["name"], b["grid_x"], b["grid_y"], b["rotation"], b["status"])
+            for b in response.json()] == [
+        (4, 2, "Test Warehouse", 0, 0, 0, "constructing"),
+        (5, 1, "Test Smelter", 3, 0, 0, "constructing"),
+        (6, 2, "Test Warehouse", 0, 2, 180, "constructing"),
+    ]
+    # The batch's buildings occupy the grid for later placements
+    assert _place(client, 1, 2, 3).json()["detail"] == COLLISION
+
+
+def test_batch_reports_every_failure_and_places_nothing(client):
+    response = client.post("/buildings/location/1/batch?company_id=1", json={"placements": [
+        {"blueprint_id": 2, "grid_x": 0, "grid_y": 0},
+        {"blueprint_id": 1, "grid_x": 2, "grid_y": 1},
+        {"blueprint_id": 1, "grid_x": 1, "grid_y": 100},
+        {"blueprint_id": 99, "grid_x": 50, "grid_y": 50},
+        {"blueprint_id": 2, "grid_x": 127, "grid_y": 0},
+        {"blueprint_id": 1, "grid_x": 60, "grid_y": 60, "rotation": 45},
+        {"blueprint_id": 1, "grid_x": 70, "grid_y": 70},
+    ]})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == {"message": "Batch placement rejected", "failures": [
+        {"index": 1, "status_code": 400, "reason": "Building placement collides with another placement in this batch"},
+        {"index": 2, "status_code": 400, "reason": COLLISION},
+        {"index": 3, "status_code": 404, "reason": "Blueprint not found"},
+        {"index": 4, "status_code": 400, "reason": OUT_OF_BOUNDS},
+        {"index": 5, "status_code": 400, "reason": "Rotation must be 0, 90, 180, or 270"},
+    ]}
+    assert _building_count() == 3
+    assert _place(client, 1, 70, 70).status_code == 200
+
+
+def test_batch_limits(client):
+    assert client.post("/buildings/location/1/batch?company_id=1", json={"placements": []}).json() == []
+
+    too_many = [{"blueprint_id": 1, "grid_x": i % 128, "grid_y": i // 128} for i in range(501)]
+    response = client.post("/buildings/location/1/batch?company_id=1", json={"placements": too_many})
+    assert response.status_code == 400
+    assert _building_count() == 3
+
+    other = client.post("/buildings/location/2/batch?company_id=1", json={"placements": too_many[:1]})
+    assert other.status_code == 403
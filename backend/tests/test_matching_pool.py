@@ -0,0 +1,79 @@
+"""Orders matched by spawned matching workers, end to end, and the workers' liveness."""
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select
+
+from app.config import settings
+from app.db import SessionLocal
+from app.models.market_order import MarketOrder
+from app.models.market_trade import MarketTrade
+from app.services.matching_pool import MatchingPool
+from tests.conftest import seed
+
+
+def _buy(client_order_id: str | None = None) -> dict:
+    return {
+        "good_id": 2, "order_type": "buy", "quantity": 1, "price_per_unit": 5,
+        "client_order_id": client_order_id, "expires_at": None,
+    }
+
+
+def test_order_matches_in_spawned_worker():
+    seed(3)
+    with SessionLocal() as db:
+        trades_before = db.scalar(select(func.count(MarketTrade.id)))
+
+    pool = MatchingPool()
+    pool.start(1)
+    try:
+        # Crosses the seeded bids at 10..12; the worker imports its own app.models
+        result = pool.submit(1, "place", 1, {
+            "good_id": 1, "order_type": "sell", "quantity": 5, "price_per_unit": 10,
+            "client_order_id": None, "expires_at": None,
+        })
+    finally:
+        pool.stop()
+
+    assert result["status"] == "filled"
+    assert result["good_name"] == "Good 0"
+    with SessionLocal() as db:
+        assert db.scalar(select(func.count(MarketTrade.id))) > trades_before
+
+
+def test_dead_worker_is_restarted():
+    seed(3)
+    pool = MatchingPool()
+    pool.start(1)
+    try:
+        assert pool.submit(2, "place", 1, _buy())["status"] == "open"
+        dead = pool._shards[0].process
+        dead.kill()
+        dead.join()
+
+        assert pool.submit(2, "place", 1, _buy())["status"] == "open"
+        assert pool._shards[0].process is not dead and pool._shards[0].process.is_alive()
+    finally:
+        pool.stop()
+
+
+def test_job_past_its_deadline_is_dropped(monkeypatch):
+    seed(3)
+    pool = MatchingPool()
+    pool.start(1)
+    try:
+        # The worker is still starting up when this job's deadline passes
+        monkeypatch.setattr(settings, "MATCHING_TIMEOUT_SECONDS", 0.01)
+        with pytest.raises(HTTPException) as exc_info:
+            pool.submit(2, "place", 1, _buy("late-1"))
+        assert exc_info.value.status_code == 504
+        assert "client_order_id" in exc_info.value.detail
+
+        monkeypatch.setattr(settings, "MATCHING_TIMEOUT_SECONDS", 30.0)
+        # Jobs run in order: once this one answers, the late one has been seen
+        assert pool.submit(2, "place", 1, _buy("on-time-1"))["status"] == "open"
+    finally:
+        pool.stop()
+
+    with SessionLocal() as db:
+        placed = db.scalars(select(MarketOrder.client_order_id).where(MarketOrder.client_order_id.is_not(None)))
+        assert list(placed) == ["on-time-1"]
@@ -0,0 +1,27 @@
+"""Request metrics: statement timing bookkeeping and access to slow-request samples."""
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.config import settings
+from app.db import engine
+
+
+def test_failed_statement_leaves_no_start_time():
+    with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM no_such_table"))
+        assert "query_start_time" not in conn.info
+
+        conn.execute(text("SELECT 1"))
+        assert "query_start_time" not in conn.info
+
+
+def test_slow_requests_need_admin_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", None)
+    assert client.get("/metrics/slow", headers={"X-Admin-Token": ""}).status_code == 403
+
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "operator")
+    assert client.get("/metrics/slow").status_code == 403
+    assert client.get("/metrics/slow", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.get("/metrics/slow", headers={"X-Admin-Token": "operator"}).status_code == 200
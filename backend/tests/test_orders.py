@@ -0,0 +1,84 @@
+"""Idempotent order placement by client order ID, and expiry of good-till-time orders."""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app.db import SessionLocal
+from app.models.inventory import Inventory
+from app.models.market_order import MarketOrder
+from app.services.orders import RECENT_ORDERS, expire_orders
+from tests.conftest import seed
+
+EXPIRES_AT = (datetime.utcnow() + timedelta(days=1)).replace(microsecond=0)
+ORDER = {
+    "good_id": 2, "order_type": "sell", "quantity": 5, "price_per_unit": 500,
+    "client_order_id": "quote-1", "expires_at": EXPIRES_AT.isoformat(),
+}
+
+
+@pytest.fixture
+def placed(client):
+    seed(3)
+    response = client.post("/market/orders/1", json=ORDER)
+    assert response.status_code == 200
+    # Partly filled, so the remaining quantity no longer matches the submission
+    fill = {"good_id": 2, "order_type": "buy", "quantity": 2, "price_per_unit": 500}
+    assert client.post("/market/orders/2", json=fill).status_code == 200
+    return response.json()
+
+
+@pytest.mark.parametrize("from_cache", [True, False])
+def test_duplicate_returns_original_order(client, placed, from_cache):
+    if not from_cache:
+        RECENT_ORDERS.invalidate()
+
+    response = client.post("/market/orders/1", json=ORDER)
+
+    assert response.status_code == 200
+    assert response.json()["id"] == placed["id"]
+    assert response.json()["original_quantity"] == 5
+    orders = client.get("/market/orders", params={"good_id": 2}).json()
+    assert [order["quantity"] for order in orders] == [3]
+
+
+@pytest.mark.parametrize("from_cache", [True, False])
+@pytest.mark.parametrize("change", [
+    {"quantity": 3},
+    {"quantity": 6},
+    {"price_per_unit": 501},
+    {"order_type": "buy"},
+    {"expires_at": (EXPIRES_AT + timedelta(hours=1)).isoformat()},
+    {"expires_at": None},
+])
+def test_reused_client_order_id_conflicts(client, placed, change, from_cache):
+    if not from_cache:
+        RECENT_ORDERS.invalidate()
+
+    response = client.post("/market/orders/1", json={**ORDER, **change})
+
+    assert response.status_code == 409
+
+
+def test_expiry_cancels_due_orders_and_releases_reservations(client):
+    seed(3)
+    sell = client.post("/market/orders/1", json={**ORDER, "client_order_id": None}).json()
+    buy = client.post("/market/orders/2", json={
+        "good_id": 2, "order_type": "buy", "quantity": 5, "price_per_unit": 100, "expires_at": EXPIRES_AT.isoformat(),
+    }).json()
+    with SessionLocal() as db:
+        db.execute(update(MarketOrder).where(MarketOrder.id == sell["id"]).values(
+            expires_at=datetime.utcnow() - timedelta(minutes=1),
+        ))
+        db.commit()
+        inventory = db.query(Inventory).filter_by(company_id=1, good_id=2).one()
+        assert inventory.reserved == 5
+
+        assert expire_orders(db, 10) == [sell["id"]]
+        assert expire_orders(db, 10) == []
+
+        assert db.get(MarketOrder, sell["id"]).status == "cancelled"
+        not_due = db.get(MarketOrder, buy["id"])
+        assert (not_due.status, not_due.quantity) == ("open", 5)
+        db.refresh(inventory)
+        assert (inventory.quantity, inventory.reserved) == (1000, 0)
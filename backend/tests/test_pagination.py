@@ -0,0 +1,26 @@
+"""Keyset cursors: crafted or malformed cursors are rejected with 400."""
+import pytest
+
+from app.pagination import encode_cursor
+from tests.conftest import seed
+
+
+@pytest.fixture(scope="module", autouse=True)
+def seeded():
+    seed(3)
+
+
+@pytest.mark.parametrize("url", ["/locations/", "/map/"])
+@pytest.mark.parametrize("cursor", [encode_cursor("x"), encode_cursor([1]), encode_cursor(1, 2), "not-base64!"])
+def test_bad_cursor(client, url, cursor):
+    assert client.get(url, params={"cursor": cursor}).status_code == 400
+
+
+@pytest.mark.parametrize("url", ["/locations/", "/map/"])
+def test_cursor_pages(client, url):
+    first = client.get(url, params={"limit": 2})
+    assert first.status_code == 200
+    cursor = first.headers["X-Next-Cursor"]
+
+    second = client.get(url, params={"limit": 2, "cursor": cursor})
+    assert second.status_code == 200
@@ -0,0 +1,158 @@
+"""
+Query-count budgets for every router.
+
+Each case runs once to warm in-process caches, then again while counting
+SQL statements. The count must stay within the case's budget and be the
+same at every seed scale; a per-row query (N+1) makes it grow with the
+data and fails here.
+"""
+import pytest
+
+from tests.conftest import SEED_SCALES, seed
+
+
+def _json(payload):
+    return {"json": payload}
+
+
+# name -> (budget, request builder taking the attempt number)
+CASES = {
+    # goods
+    "GET /goods/": (0, lambda n: ("GET", "/goods/", {})),
+    "GET /goods/{id}": (0, lambda n: ("GET", "/goods/1", {})),
+    # companies
+    "GET /companies/": (1, lambda n: ("GET", "/companies/", {})),
+    "GET /companies/{id}": (1, lambda n: ("GET", "/companies/1", {})),
+    # inventories
+    "GET /inventories/company/{id}": (1, lambda n: ("GET", "/inventories/company/1", {})),
+    # production
+    "GET /production/{company_id}": (2, lambda n: ("GET", "/production/1", {})),
+    "POST /production/start/{company_id}": (
+        5, lambda n: ("POST", "/production/start/1?recipe_id=1", {}),
+    ),
+    # admin recipes (list/get responses don't validate: the schema expects
+    # `tier`, the model has `tier_in`/`tier_out`)
+    "GET /admin/recipes/{id} missing": (0, lambda n: ("GET", "/admin/recipes/999", {})),
+    "DELETE /admin/recipes/{id}": (
+        2, lambda n: ("DELETE", "/admin/recipes/2", {}) if n else ("GET", "/admin/recipes/999", {}),
+    ),
+    # admin
+    "POST /admin/inventory/add": (
+        4, lambda n: ("POST", "/admin/inventory/add?company_id=1&good_id=1&quantity=5", {}),
+    ),
+    # market
+    "GET /market/orders": (1, lambda n: ("GET", "/market/orders", {})),
+    "GET /market/orderbook/{good_id}": (2, lambda n: ("GET", "/market/orderbook/1", {})),
+    # Served from the quote book once loaded
+    "GET /market/stats/{good_id}": (0, lambda n: ("GET", "/market/stats/1", {})),
+    "GET /market/quotes": (0, lambda n: ("GET", "/market/quotes", {"params": {"good_ids": "1,2,3"}})),
+    "GET /market/candles/{good_id}": (1, lambda n: ("GET", "/market/candles/1", {})),
+    "GET /market/trades/": (1, lambda n: ("GET", "/market/trades/?good_id=1", {})),
+    "POST /market/orders/{company_id}": (
+        8, lambda n: ("POST", "/market/orders/1", _json({
+            "good_id": 1, "order_type": "sell", "quantity": 1, "price_per_unit": 500,
+        })),
+    ),
+    # The warm-up places the order; the counted retry is answered from memory
+    "POST /market/orders/{company_id} retry": (
+        0, lambda n: ("POST", "/market/orders/1", _json({
+            "good_id": 1, "order_type": "sell", "quantity": 1, "price_per_unit": 500,
+            "client_order_id": "retry-1",
+        })),
+    ),
+    # Loads the order, then locks it to re-read its status
+    "POST /market/orders/{order_id}/cancel": (
+        5, lambda n: ("POST", f"/market/orders/{n + 1}/cancel?company_id=1", {}),
+    ),
+    # SQLite runs one INSERT per order (10 here); Postgres batches them
+    "POST /market/orders/batch": (
+        17, lambda n: ("POST", "/market/orders/batch?company_id=1", _json({
+            "orders": [
+                {"good_id": 1 + i % 2, "order_type": "sell", "quantity": 1, "price_per_unit": 500 + i}
+                for i in range(10)
+            ],
+        })),
+    ),
+    # The warm-up cancels bids; the counted request cancels every ask placed above
+    "POST /market/orders/cancel-all": (
+        5, lambda n: ("POST", f"/market/orders/cancel-all?company_id=1&side={'sell' if n else 'buy'}", {}),
+    ),
+    # locations
+    "GET /locations/": (2, lambda n: ("GET", "/locations/", {})),
+    "GET /locations/{id}": (2, lambda n: ("GET", "/locations/1", {})),
+    # map
+    "GET /map/": (2, lambda n: ("GET", "/map/", {})),
+    # simulation
+    "GET /simulation/speed": (0, lambda n: ("GET", "/simulation/speed", {})),
+    # tilemap
+    "GET /tilemap/location/{id}": (3, lambda n: ("GET", "/tilemap/location/1", {})),
+    "GET /tilemap/location/{id}/buildability": (
+        1, lambda n: ("GET", "/tilemap/location/1/buildability", {}),
+    ),
+    "GET /tilemap/planets": (1, lambda n: ("GET", "/tilemap/planets", {})),
+    # universe viz
+    "GET /viz/universe": (6, lambda n: ("GET", "/viz/universe", {})),
+    "GET /viz/planet/{id}/resources": (1, lambda n: ("GET", "/viz/planet/1/resources", {})),
+    "GET /viz/universe/data": (6, lambda n: ("GET", "/viz/universe/data", {})),
+    # buildings
+    "GET /buildings/blueprints": (0, lambda n: ("GET", "/buildings/blueprints", {})),
+    "GET /buildings/location/{id}": (1, lambda n: ("GET", "/buildings/location/1", {})),
+    "POST /buildings/location/{id}": (
+        4, lambda n: ("POST", "/buildings/location/1?company_id=1", _json({
+            "blueprint_id": 1, "grid_x": n, "grid_y": 10,
+        })),
+    ),
+    # SQLite runs one INSERT per placement (10 here); Postgres batches them
+    "POST /buildings/location/{id}/batch": (
+        12, lambda n: ("POST", "/buildings/location/1/batch?company_id=1", _json({
+            "placements": [
+                {"blueprint_id": 1, "grid_x": x, "grid_y": 20 + n} for x in range(10)
+            ],
+        })),
+    ),
+    "DELETE /buildings/{id}": (
+        2, lambda n: ("DELETE", f"/buildings/{n + 1}?company_id=1", {}),
+    ),
+    # metrics
+    "GET /metrics/": (0, lambda n: ("GET", "/metrics/", {})),
+}
+
+
+@pytest.fixture(scope="session")
+def query_counts(client, query_counter) -> dict[int, dict[str, tuple[int, int]]]:
+    """(status code, statements) of every case's warm request, per seed scale."""
+    counts = {}
+
+    for scale in SEED_SCALES:
+        seed(scale)
+        counts[scale] = {}
+
+        for name, (_, build) in CASES.items():
+            for attempt in range(2):
+                method, url, kwargs = build(attempt)
+                response, statements = query_counter.measure(
+                    lambda: client.request(method, url, **kwargs)
+                )
+            counts[scale][name] = (response.status_code, statements)
+
+    return counts
+
+
+@pytest.mark.parametrize("name", list(CASES))
+def test_query_budget(name, query_counts):
+    budget = CASES[name][0]
+
+    for scale in SEED_SCALES:
+        status_code, _ = query_counts[scale][name]
+        assert status_code < 400 or name.endswith("missing"), (
+            f"{name} failed with {status_code} at scale {scale}"
+        )
+
+    statements = {scale: query_counts[scale][name][1] for scale in SEED_SCALES}
+
+    assert len(set(statements.values())) == 1, (
+        f"{name} statement count grows with data size: {statements}"
+    )
+    assert statements[SEED_SCALES[-1]] <= budget, (
+        f"{name} ran {statements[SEED_SCALES[-1]]} statements (budget {budget})"
+    )
@@ -0,0 +1,57 @@
+"""Quote book reloads: last trade per good and a single reloader for stale quotes."""
+import asyncio
+from datetime import datetime
+
+from app.db import AsyncSessionLocal, SessionLocal
+from app.models.market_trade import MarketTrade
+from app.services.quotes import QuoteBook
+from tests.conftest import seed
+
+
+def test_last_price_is_newest_trade_per_good():
+    seed(3)
+    now = datetime.utcnow()
+    with SessionLocal() as db:
+        # Same timestamp: the higher id is the later trade
+        db.add_all([
+            MarketTrade(good_id=2, buyer_company_id=1, seller_company_id=2, quantity=1, price_per_unit=70, created_at=now),
+            MarketTrade(good_id=2, buyer_company_id=1, seller_company_id=2, quantity=1, price_per_unit=71, created_at=now),
+        ])
+        db.commit()
+
+    async def read():
+        async with AsyncSessionLocal() as db:
+            return await QuoteBook(60.0).quotes(db, [1, 2, 3])
+
+    quotes = asyncio.run(read())
+
+    # Seeded trades for good 1 run back in time from price 50
+    assert [q["last_price"] for q in quotes] == [50, 71, None]
+
+
+def test_stale_quotes_reload_once():
+    seed(3)
+    book = QuoteBook(0.0)
+    loads = 0
+    load = book._load
+
+    async def counting_load(db):
+        nonlocal loads
+        loads += 1
+        await asyncio.sleep(0.05)
+        await load(db)
+
+    book._load = counting_load
+
+    async def read():
+        async with AsyncSessionLocal() as db:
+            return await book.quotes(db, [1])
+
+    async def main():
+        await read()
+        return await asyncio.gather(*(read() for _ in range(5)))
+
+    results = asyncio.run(main())
+
+    assert loads == 2
+    assert all(result[0]["last_price"] == 50 for result in results)
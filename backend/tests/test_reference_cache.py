@@ -0,0 +1,41 @@
+"""Reference catalogs under concurrent invalidation, and the goods CRUD helpers."""
+import pytest
+from sqlalchemy import event
+
+from app.crud.good import delete_good, get_good
+from app.db import SessionLocal
+from app.models.good import Good
+from app.services.reference_cache import GOODS, ReferenceCatalog
+from tests.conftest import seed
+
+
+@pytest.fixture(autouse=True)
+def seeded():
+    seed(3)
+
+
+def test_invalidate_during_load_still_answers():
+    catalog = ReferenceCatalog(Good, 60.0)
+
+    with SessionLocal() as db:
+        # A writer invalidates while the load's query is running
+        @event.listens_for(db, "do_orm_execute")
+        def invalidate(state):
+            catalog.invalidate()
+
+        assert catalog.get(db, 1).name == "Good 0"
+        assert len(catalog.all(db)) == 5
+        assert catalog.index(db, "name")["Good 4"].id == 5
+
+
+def test_delete_good_through_crud():
+    with SessionLocal() as db:
+        good = Good(name="Scrap", primary_category="raw", rarity="common")
+        db.add(good)
+        db.commit()
+        good_id = good.id
+
+        delete_good(db, get_good(db, good_id))
+
+        assert db.get(Good, good_id) is None
+        assert GOODS.get(db, good_id) is None
@@ -0,0 +1,87 @@
+"""Aggregated settlement of market fills: net deltas, row updates and the cash re-check."""
+import pytest
+from sqlalchemy import delete, select, update
+
+from app.db import SessionLocal
+from app.models.company import Company
+from app.models.inventory import Inventory
+from app.services.settlement import Settlement
+from app.services.transactions import RetryableConflict
+from tests.conftest import seed
+
+
+@pytest.fixture(autouse=True)
+def seeded():
+    seed(3)
+
+
+def _holdings(db) -> dict[tuple[int, int], tuple[int, int]]:
+    rows = db.execute(select(Inventory.company_id, Inventory.good_id, Inventory.quantity, Inventory.reserved))
+    return {(c, g): (q, r) for c, g, q, r in rows}
+
+
+def test_transfers_net_per_company_and_good():
+    settlement = Settlement()
+    settlement.transfer(1, 2, 1, 5, 50)
+    settlement.transfer(1, 2, 1, 3, 36)
+    settlement.transfer(2, 1, 1, 3, 36)
+
+    assert settlement.cash == {1: -50, 2: 50}
+    assert settlement.goods == {(2, 1): [-5, -8], (1, 1): [5, -3]}
+
+
+def test_apply_updates_each_row_once():
+    with SessionLocal() as db:
+        db.execute(delete(Inventory).where(Inventory.company_id == 3, Inventory.good_id == 2))
+        db.execute(update(Inventory).values(reserved=100))
+        company = db.get(Company, 1)  # loaded, so apply must expire it
+
+        settlement = Settlement()
+        settlement.transfer(1, 2, 1, 5, 50)
+        settlement.transfer(3, 2, 2, 4, 40)
+        settlement.transfer(2, 1, 3, 2, 20)
+        settlement.transfer(1, 2, 3, 2, 20)  # bought back: only the sellers' reservations change
+        settlement.apply(db)
+        db.commit()
+
+        assert company.cash == 1_000_000 - 50
+        assert dict(db.execute(select(Company.id, Company.cash)).all()) == {
+            1: 1_000_000 - 50, 2: 1_000_000 + 90, 3: 1_000_000 - 40,
+        }
+        holdings = _holdings(db)
+        assert holdings[(1, 1)] == (1005, 100)
+        assert holdings[(2, 1)] == (995, 95)
+        assert holdings[(2, 2)] == (996, 96)
+        assert holdings[(3, 2)] == (4, 0)  # inserted for the buyer
+        assert holdings[(1, 3)] == holdings[(2, 3)] == (1000, 98)
+        assert holdings[(1, 2)] == (1000, 100)
+        assert settlement.cash == {} and settlement.goods == {}
+
+
+def test_available_cash_includes_pending_transfers():
+    with SessionLocal() as db:
+        settlement = Settlement()
+        assert settlement.available_cash(db, 1) == 1_000_000
+
+        settlement.transfer(1, 2, 1, 5, 400_000)
+        assert settlement.available_cash(db, 1) == 600_000
+        assert settlement.available_cash(db, 2) == 1_400_000
+
+
+def test_cash_spent_meanwhile_is_a_retryable_conflict():
+    with SessionLocal() as db:
+        settlement = Settlement()
+        assert settlement.available_cash(db, 1) >= 600_000
+        settlement.transfer(1, 2, 1, 5, 600_000)
+
+        # A concurrent settlement spends the buyer's cash after the unlocked check
+        with SessionLocal() as other:
+            other.execute(update(Company).where(Company.id == 1).values(cash=500_000))
+            other.commit()
+
+        with pytest.raises(RetryableConflict):
+            settlement.apply(db)
+        db.rollback()
+
+        assert dict(db.execute(select(Company.id, Company.cash)).all()) == {1: 500_000, 2: 1_000_000, 3: 1_000_000}
+        assert _holdings(db)[(2, 1)] == (1000, 0)
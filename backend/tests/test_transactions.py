@@ -0,0 +1,121 @@
+"""@transactional retries on deadlocks and serialization failures."""
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+import app.routers.admin
+from app.config import settings
+from app.db import SessionLocal
+from app.models.company import Company
+from app.models.good import Good
+from app.models.market_order import MarketOrder
+from app.services import transactions
+from app.services.transactions import TRANSACTION_METRICS, lock_rows, transactional
+from tests.conftest import seed
+
+
+class PgError(Exception):
+    """Stands in for a psycopg2 error carrying a SQLSTATE."""
+
+    def __init__(self, pgcode: str):
+        super().__init__(pgcode)
+        self.pgcode = pgcode
+
+
+def _conflict(sqlstate: str) -> OperationalError:
+    return OperationalError("UPDATE companies SET cash=...", {}, PgError(sqlstate))
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(transactions, "_backoff_seconds", lambda attempt: 0)
+    TRANSACTION_METRICS.take()
+
+
+@pytest.mark.parametrize("sqlstate, reason", [("40P01", "deadlock"), ("40001", "serialization")])
+def test_rolled_back_and_retried(sqlstate, reason):
+    seed(3)
+    attempts = 0
+
+    @transactional
+    def pay(db, company_id: int) -> int:
+        nonlocal attempts
+        attempts += 1
+        company = lock_rows(db, {Company: [company_id]})[Company][company_id]
+        company.cash += 100
+        db.flush()
+        if attempts == 1:
+            raise _conflict(sqlstate)
+        db.commit()
+        return company.cash
+
+    with SessionLocal() as db:
+        # The first attempt's write is rolled back, not applied twice
+        assert pay(db, 1) == 1_000_100
+        assert "transactional" not in db.info
+
+    assert attempts == 2
+    counts = TRANSACTION_METRICS.take()[pay.__qualname__]
+    assert counts == {"transactions": 1, f"retry:{reason}": 1}
+
+
+def test_gives_up_after_max_attempts():
+    @transactional
+    def always_deadlocks(db):
+        raise _conflict("40P01")
+
+    with SessionLocal() as db:
+        with pytest.raises(HTTPException) as exc_info:
+            always_deadlocks(db)
+
+    assert exc_info.value.status_code == 503
+    counts = TRANSACTION_METRICS.take()[always_deadlocks.__qualname__]
+    assert counts["exhausted"] == 1
+    assert counts["retry:deadlock"] == settings.TRANSACTION_MAX_ATTEMPTS - 1
+
+
+def test_other_errors_are_not_retried():
+    attempts = 0
+
+    @transactional
+    def fails(db):
+        nonlocal attempts
+        attempts += 1
+        raise OperationalError("SELECT 1", {}, PgError("42P01"))
+
+    with SessionLocal() as db:
+        with pytest.raises(OperationalError):
+            fails(db)
+    assert attempts == 1
+
+
+def test_leaving_auction_retries_mode_change_and_clearing_together(client, monkeypatch):
+    seed(3)
+    assert client.post("/admin/goods/2/market-mode", params={"mode": "auction"}).status_code == 200
+    for company_id, side, price in ((1, "buy", 60), (2, "sell", 40)):
+        order = {"good_id": 2, "order_type": side, "quantity": 5, "price_per_unit": price}
+        assert client.post(f"/market/orders/{company_id}", json=order).json()["status"] == "open"
+
+    uncross = app.routers.admin.uncross
+    calls = 0
+
+    def deadlock_first(db, good_id):
+        nonlocal calls
+        calls += 1
+        result = uncross(db, good_id)
+        if calls == 1:
+            raise _conflict("40P01")
+        return result
+
+    monkeypatch.setattr(app.routers.admin, "uncross", deadlock_first)
+    response = client.post("/admin/goods/2/market-mode", params={"mode": "continuous"})
+
+    assert response.status_code == 200
+    assert calls == 2
+    assert response.json()["auction"]["volume"] == 5
+    with SessionLocal() as db:
+        assert db.get(Good, 2).market_mode == "continuous"
+        statuses = db.scalars(select(MarketOrder.status).where(MarketOrder.good_id == 2)).all()
+        assert statuses == ["filled", "filled"]
+    assert TRANSACTION_METRICS.take()["admin_set_market_mode"]["retry:deadlock"] == 1
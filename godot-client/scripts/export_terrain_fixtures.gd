@@ -0,0 +1,33 @@
+extends SceneTree
+
+## Exports plot heightmaps for fixed seeds so the backend can check its terrain
+## port against the client (backend/tests/test_terrain.py).
+##
+## Run from the repository root:
+##   godot --headless --path godot-client --script res://scripts/export_terrain_fixtures.gd
+
+const SEEDS = [1, 2, 3, 42, 12345, 2147483647]
+const OUTPUT_DIR = "../backend/tests/fixtures/terrain"
+
+func _init() -> void:
+	var generator = load("res://scenes/temperate_map_generator.gd").new()
+	generator._configure_noise()
+
+	var output_dir = ProjectSettings.globalize_path("res://").path_join(OUTPUT_DIR)
+	DirAccess.make_dir_recursive_absolute(output_dir)
+
+	for seed in SEEDS:
+		var result = generator.generate_plot(seed)
+		var path = output_dir.path_join("seed_%d.json" % seed)
+		var file = FileAccess.open(path, FileAccess.WRITE)
+		file.store_string(JSON.stringify({
+			"seed": seed,
+			"grid_resolution": generator.GRID_RESOLUTION,
+			"archetype": result["archetype"],
+			"height_map": result["height_map"],
+		}, "", true, true))
+		file.close()
+		print("Wrote %s (%s)" % [path, result["archetype"]])
+
+	generator.free()
+	quit()